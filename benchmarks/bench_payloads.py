@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark bytes on the wire and modeled time-to-interactive for a quiz page.
+
+Serves a representative quiz through the Flask test client and fetches the
+quiz page plus the assets it links, once per Accept-Encoding. It then models
+a first visit and a repeat visit on phone-like networks:
+
+- first visit: the page, then its assets in parallel (one more round trip),
+- repeat visit: page revalidation (304); fingerprinted assets come from the
+  browser cache without a request. The "legacy" row revalidates the
+  unfingerprinted /static/ files instead, which costs one more round trip.
+
+Time-to-interactive is modeled as server time + round trips + bytes /
+bandwidth. It is not measured in a browser.
+
+Usage: python benchmarks/bench_payloads.py [--questions 20] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from corpus import make_quiz
+
+SERVER_DIR = Path(__file__).resolve().parent.parent / "server"
+
+# name -> (downlink kbit/s, round trip ms)
+NETWORKS = {"3g": (1600, 300), "4g": (9000, 170), "wifi": (30000, 40)}
+
+ASSET_LINK = re.compile(r'(?:href|src)="([^"]+\.(?:css|js))"')
+
+
+def fetch(client, url: str, encoding: str, repeat: int) -> tuple[int, float, int]:
+    """GET url `repeat` times; returns (wire bytes, best server seconds, status)."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url, headers={"Accept-Encoding": encoding})
+        best = min(best, time.perf_counter() - started)
+    return len(response.data), best, response.status_code
+
+
+def transfer_ms(num_bytes: int, network: str) -> float:
+    downlink_kbps, _ = NETWORKS[network]
+    return num_bytes * 8 / downlink_kbps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quiz page payload benchmark")
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20, help="Requests per measurement (best is kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / "data").mkdir()
+        quiz = make_quiz(random.Random(args.seed), 0, args.questions)
+        (root / "data" / f"{quiz['id']}.json").write_text(json.dumps(quiz, indent=2))
+        os.environ["QUIZ_DATA_DIR"] = str(root / "data")
+        os.environ["QUIZ_RESULTS_DIR"] = str(root / "results")
+        sys.path.insert(0, str(SERVER_DIR))
+        import server  # noqa: E402 - configured through the environment above
+        from payloads import brotli  # noqa: E402
+
+        client = server.app.test_client()
+        page_url = f"/quiz/{quiz['id']}"
+        encodings = ["identity", "gzip"] + (["br"] if brotli else [])
+
+        report = {"quiz": quiz["id"], "questions": args.questions, "variants": {}}
+        for encoding in encodings:
+            page_bytes, page_s, _ = fetch(client, page_url, encoding, args.repeat)
+            html = client.get(page_url).data.decode()
+            asset_bytes, asset_s = 0, 0.0
+            for url in ASSET_LINK.findall(html):
+                size, seconds, _ = fetch(client, url, encoding, args.repeat)
+                asset_bytes += size
+                asset_s = max(asset_s, seconds)
+            etag = client.get(page_url, headers={"Accept-Encoding": encoding}).headers["ETag"]
+            started = time.perf_counter()
+            status = client.get(page_url, headers={"Accept-Encoding": encoding, "If-None-Match": etag}).status_code
+            revalidate_s = time.perf_counter() - started
+            report["variants"][encoding] = {
+                "page_bytes": page_bytes, "asset_bytes": asset_bytes,
+                "server_ms": (page_s + asset_s) * 1000, "revalidate_ms": revalidate_s * 1000,
+                "revalidate_status": status,
+            }
+
+        # Before fingerprinting: uncompressed /static/ files, revalidated on every visit
+        legacy = dict(report["variants"]["identity"])
+        legacy["asset_bytes"] = sum(len(client.get(f"/static/{name}").data) for name in ("style.css", "quiz.js"))
+        report["variants"]["legacy"] = legacy
+
+    print(f"Quiz {report['quiz']} ({args.questions} questions)")
+    print(f"{'variant':<10} {'page B':>8} {'assets B':>9} {'server ms':>10} " +
+          " ".join(f"{'TTI ' + n + ' 1st/rep ms':>22}" for n in NETWORKS))
+    for name, v in report["variants"].items():
+        v["tti_ms"] = {}
+        cells = []
+        for network, (_, rtt) in NETWORKS.items():
+            first = v["server_ms"] + 2 * rtt + transfer_ms(v["page_bytes"] + v["asset_bytes"], network)
+            repeat = v["revalidate_ms"] + rtt * (2 if name == "legacy" else 1)
+            v["tti_ms"][network] = {"first": round(first, 1), "repeat": round(repeat, 1)}
+            cells.append(f"{first:>10.0f} / {repeat:>9.0f}")
+        print(f"{name:<10} {v['page_bytes']:>8} {v['asset_bytes']:>9} {v['server_ms']:>10.2f} " +
+              " ".join(f"{c:>22}" for c in cells))
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Start-up benchmark: time to first request and to a fully warmed worker.
+
+For each scale (quizzes x questions per quiz, see corpus.py) a fresh
+interpreter imports the app and requests the index page, in two modes:
+
+- cold:     no start-up snapshot, the catalog is built by scanning every quiz
+- snapshot: the catalog and completions are restored from the snapshot the
+            previous run saved at exit
+
+Each run reports the time from interpreter start to the first 200 response
+("first request") and until the background warm-up (catalog re-scan, search
+index, attempt history) finished ("warmed"). With --budget-ms the script
+exits with status 1 if the median snapshot-mode first request is slower.
+
+Usage: python benchmarks/bench_startup.py [--scales 1000x20,10000x20] [--runs 5] [--budget-ms 500]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from run_benchmarks import parse_scales, prepare_corpus
+
+BENCH_DIR = Path(__file__).resolve().parent
+SERVER_DIR = BENCH_DIR.parent / "server"
+
+# ANSI colors
+RED = "\033[91m"
+GREEN = "\033[92m"
+YELLOW = "\033[93m"
+RESET = "\033[0m"
+
+MODES = ("cold", "snapshot")
+
+
+def time_startup(root: Path) -> dict:
+    """Run in a child process: import the app against `root`, time the first request and warm-up."""
+    started = time.perf_counter()
+    os.environ["QUIZ_DATA_DIR"] = str(root / "data")
+    os.environ["QUIZ_RESULTS_DIR"] = str(root / "results")
+    sys.path.insert(0, str(SERVER_DIR))
+    import server  # noqa: E402 - configured through the environment above
+
+    imported = time.perf_counter()
+    status = server.app.test_client().get("/").status_code
+    first = time.perf_counter()
+    server.warmed_up.wait()
+    warmed = time.perf_counter()
+    return {
+        "status": status,
+        "restored": server.startup["snapshot"],
+        "import_ms": round((imported - started) * 1000, 1),
+        "first_request_ms": round((first - started) * 1000, 1),
+        "warmed_ms": round((warmed - started) * 1000, 1),
+    }
+
+
+def run_once(root: Path, mode: str) -> dict:
+    """One start-up in a fresh interpreter; cold mode removes the snapshot first."""
+    if mode == "cold":
+        shutil.rmtree(root / "results" / "cache", ignore_errors=True)
+    result = subprocess.run(
+        [sys.executable, str(Path(__file__).resolve()), "--child", str(root)],
+        cwd=BENCH_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quiz server start-up benchmark")
+    parser.add_argument("--scales", default="1000x20,10000x20",
+                        help="Comma-separated QUIZZESxQUESTIONS, e.g. 1000x20,100000x20")
+    parser.add_argument("--attempts-per-quiz", type=float, default=2.0,
+                        help="Stored attempts generated per quiz")
+    parser.add_argument("--users", type=int, default=20, help="Users the stored attempts are spread over")
+    parser.add_argument("--runs", type=int, default=3, help="Start-ups per scale and mode (median reported)")
+    parser.add_argument("--budget-ms", type=float,
+                        help="Fail if the median snapshot-mode first request takes longer")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", type=Path,
+                        help="Keep generated corpora here and reuse them across runs (default: temporary)")
+    parser.add_argument("--json", type=Path, help="Write the results to this file")
+    parser.add_argument("--child", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(time_startup(args.child)))
+        return
+
+    work_dir = args.work_dir or Path(tempfile.mkdtemp(prefix="quiz-startup-"))
+    results, over_budget = [], []
+    try:
+        print(f"{'scale':<14} {'mode':<9} {'import ms':>10} {'first request ms':>17} {'warmed ms':>10}")
+        for quizzes, questions in parse_scales(args.scales):
+            attempts = int(quizzes * args.attempts_per_quiz)
+            root = prepare_corpus(work_dir, quizzes, questions, attempts, args.users, args.seed)
+            for mode in MODES:
+                runs = [run_once(root, mode) for _ in range(args.runs)]
+                if any(r["status"] != 200 for r in runs) or any(r["restored"] != (mode == "snapshot") for r in runs):
+                    print(f"{RED}Error: unexpected start-up at {quizzes}x{questions} ({mode}): {runs}{RESET}")
+                    sys.exit(1)
+                row = {"quizzes": quizzes, "questions": questions, "attempts": attempts, "mode": mode,
+                       **{key: statistics.median(r[key] for r in runs)
+                          for key in ("import_ms", "first_request_ms", "warmed_ms")}}
+                results.append(row)
+                failed = mode == "snapshot" and args.budget_ms is not None \
+                    and row["first_request_ms"] > args.budget_ms
+                if failed:
+                    over_budget.append(row)
+                color = RED if failed else ""
+                print(f"{f'{quizzes}x{questions}':<14} {mode:<9} {row['import_ms']:>10.1f} "
+                      f"{color}{row['first_request_ms']:>17.1f}{RESET if color else ''} {row['warmed_ms']:>10.1f}")
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.json:
+        args.json.write_text(json.dumps({"budget_ms": args.budget_ms, "results": results}, indent=2))
+        print(f"\nReport written to {args.json}")
+    if over_budget:
+        print(f"\n{RED}{len(over_budget)} scale(s) over the {args.budget_ms:.0f} ms first-request budget{RESET}")
+        sys.exit(1)
+    if args.budget_ms is not None:
+        print(f"\n{GREEN}First request within {args.budget_ms:.0f} ms at every scale{RESET}")
+
+
+if __name__ == "__main__":
+    main()
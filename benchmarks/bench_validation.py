@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark the compiled schema validator against the original hand-coded one.
+
+Builds a synthetic in-memory corpus (with a share of deliberately broken
+quizzes), checks that both validators report the same problems, and times
+each over the whole corpus.
+
+Usage: python benchmarks/bench_validation.py [--quizzes 20000] [--questions 20]
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from corpus import make_quiz
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "server"))
+
+from quiz_schema import VALIDATOR  # noqa: E402
+
+# --- Original validator (scripts/validate_quizzes.py before quiz_schema), kept for comparison ---
+
+REQUIRED_QUIZ_FIELDS = {"id", "lecture", "topic", "questions"}
+REQUIRED_QUESTION_FIELDS = {"id", "type", "question"}
+VALID_QUESTION_TYPES = {"multiple_choice", "true_false", "short_answer"}
+
+
+def legacy_validate_question(q: dict, quiz_id: str, q_idx: int) -> list[str]:
+    errors = []
+    prefix = f"Quiz '{quiz_id}', Question {q_idx + 1}"
+    for field in REQUIRED_QUESTION_FIELDS:
+        if field not in q:
+            errors.append(f"{prefix}: Missing required field '{field}'")
+    if "type" not in q:
+        return errors
+    q_type = q["type"]
+    if q_type not in VALID_QUESTION_TYPES:
+        errors.append(f"{prefix}: Invalid question type '{q_type}'. Must be one of {VALID_QUESTION_TYPES}")
+        return errors
+    if q_type == "multiple_choice":
+        if "options" not in q:
+            errors.append(f"{prefix}: Multiple choice question missing 'options' array")
+        elif not isinstance(q["options"], list):
+            errors.append(f"{prefix}: 'options' must be an array")
+        elif len(q["options"]) < 2:
+            errors.append(f"{prefix}: Multiple choice needs at least 2 options, has {len(q['options'])}")
+        elif len(q["options"]) > 6:
+            errors.append(f"{prefix}: Multiple choice has {len(q['options'])} options (recommend 4)")
+        if "correct" not in q:
+            errors.append(f"{prefix}: Multiple choice question missing 'correct' index")
+        elif not isinstance(q["correct"], int):
+            errors.append(f"{prefix}: 'correct' must be an integer index, got {type(q['correct']).__name__}")
+        elif "options" in q and isinstance(q["options"], list):
+            if q["correct"] < 0 or q["correct"] >= len(q["options"]):
+                errors.append(f"{prefix}: 'correct' index {q['correct']} out of range for {len(q['options'])} options")
+    elif q_type == "true_false":
+        if "correct" not in q:
+            errors.append(f"{prefix}: True/false question missing 'correct' value")
+        elif not isinstance(q["correct"], bool):
+            errors.append(f"{prefix}: True/false 'correct' must be boolean, got {type(q['correct']).__name__}")
+    elif q_type == "short_answer":
+        if "expected_keywords" not in q:
+            errors.append(f"{prefix}: Short answer question missing 'expected_keywords' array")
+        elif not isinstance(q["expected_keywords"], list):
+            errors.append(f"{prefix}: 'expected_keywords' must be an array")
+        elif len(q["expected_keywords"]) == 0:
+            errors.append(f"{prefix}: 'expected_keywords' is empty")
+    if "question" in q and (not q["question"] or not q["question"].strip()):
+        errors.append(f"{prefix}: Question text is empty")
+    return errors
+
+
+def legacy_validate(quiz: dict, quiz_id: str) -> list[str]:
+    errors = []
+    for field in REQUIRED_QUIZ_FIELDS:
+        if field not in quiz:
+            errors.append(f"Quiz '{quiz_id}': Missing required field '{field}'")
+    if "id" in quiz and quiz["id"] != quiz_id:
+        errors.append(f"Quiz '{quiz_id}': ID in file ('{quiz['id']}') doesn't match filename")
+    if "lecture" in quiz:
+        lecture = quiz["lecture"]
+        if not lecture or not lecture[0].isalpha():
+            errors.append(f"Quiz '{quiz_id}': Invalid lecture format '{lecture}'")
+    if "questions" not in quiz:
+        return errors
+    questions = quiz["questions"]
+    if not isinstance(questions, list):
+        errors.append(f"Quiz '{quiz_id}': 'questions' must be an array")
+        return errors
+    if len(questions) == 0:
+        errors.append(f"Quiz '{quiz_id}': No questions in quiz")
+    elif len(questions) < 5:
+        errors.append(f"Quiz '{quiz_id}': Only {len(questions)} questions (recommend 10+)")
+    q_ids = [q.get("id") for q in questions if "id" in q]
+    if len(q_ids) != len(set(q_ids)):
+        errors.append(f"Quiz '{quiz_id}': Duplicate question IDs detected")
+    for idx, q in enumerate(questions):
+        errors.extend(legacy_validate_question(q, quiz_id, idx))
+    return errors
+
+
+# --- Corpus ---
+
+def break_quiz(rng: random.Random, quiz: dict) -> None:
+    """Introduce one random defect."""
+    q = rng.choice(quiz["questions"])
+    defect = rng.randrange(6)
+    if defect == 0:
+        q.pop("question", None)
+    elif defect == 1:
+        q["type"] = "essay"
+    elif defect == 2:
+        q.pop("correct", None)
+        q.pop("expected_keywords", None)
+    elif defect == 3:
+        q["options"] = ["only one"]
+    elif defect == 4:
+        quiz["lecture"] = "5pcv"
+    else:
+        quiz["questions"] = quiz["questions"][:3]
+
+
+def build_corpus(num_quizzes: int, num_questions: int, broken_share: float, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    quizzes = []
+    for idx in range(num_quizzes):
+        quiz = make_quiz(rng, idx, num_questions)
+        if rng.random() < broken_share:
+            break_quiz(rng, quiz)
+        quizzes.append(quiz)
+    return quizzes
+
+
+def timed(fn, quizzes: list[dict]) -> tuple[float, list]:
+    started = time.perf_counter()
+    out = [fn(quiz, quiz["id"]) for quiz in quizzes]
+    return time.perf_counter() - started, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quiz validators")
+    parser.add_argument("--quizzes", type=int, default=20000)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--broken", type=float, default=0.1, help="Share of quizzes with a defect")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    quizzes = build_corpus(args.quizzes, args.questions, args.broken, args.seed)
+    print(f"Corpus: {len(quizzes)} quizzes x {args.questions} questions")
+
+    def compiled(quiz, quiz_id):
+        return [message for _, message in VALIDATOR.check(quiz, quiz_id)[0]]
+
+    # Same problems, modulo ordering (the legacy validator iterates over sets)
+    _, legacy_out = timed(legacy_validate, quizzes)
+    _, compiled_out = timed(compiled, quizzes)
+    mismatches = sum(1 for a, b in zip(legacy_out, compiled_out) if Counter(a) != Counter(b))
+    invalid = sum(1 for errors in compiled_out if errors)
+    print(f"Invalid quizzes: {invalid}, result mismatches: {mismatches}")
+
+    legacy_time = min(timed(legacy_validate, quizzes)[0] for _ in range(args.repeat))
+    compiled_time = min(timed(compiled, quizzes)[0] for _ in range(args.repeat))
+    server_time = min(timed(VALIDATOR.errors, quizzes)[0] for _ in range(args.repeat))
+
+    print(f"{'validator':<16} {'total s':>9} {'us/quiz':>9}")
+    for name, seconds in (("legacy", legacy_time), ("compiled", compiled_time), ("server errors", server_time)):
+        print(f"{name:<16} {seconds:>9.3f} {seconds / len(quizzes) * 1e6:>9.1f}")
+    print(f"Speedup: {legacy_time / compiled_time:.2f}x")
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
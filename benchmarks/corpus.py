@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Synthetic quiz corpus for benchmarks.
+Usage: Import generate_corpus() / generate_results(), or run directly to write
+a data/ (and optionally results/) tree to a directory.
+"""
+
+import argparse
+import json
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent / "server"
+
+COURSES = ["pcv", "mvg", "slam", "ml"]
+WORDS = [
+    "homography", "epipolar", "fundamental", "essential", "matrix", "camera",
+    "projection", "calibration", "bundle", "adjustment", "triangulation",
+    "keypoint", "descriptor", "ransac", "singular", "value", "decomposition",
+    "rotation", "translation", "pose", "graph", "optimization", "covariance",
+]
+
+
+def _sentence(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def make_question(rng: random.Random, idx: int) -> dict:
+    """Build one random question of a random type."""
+    q_type = rng.choice(["multiple_choice", "true_false", "short_answer"])
+    q = {
+        "id": f"q{idx + 1}",
+        "type": q_type,
+        "question": _sentence(rng, 12) + "?",
+        "topic": rng.choice(WORDS),
+        "slide_ref": f"Slide {rng.randint(1, 60)}",
+    }
+    if q_type == "multiple_choice":
+        q["options"] = [_sentence(rng, 4) for _ in range(4)]
+        q["correct"] = rng.randrange(4)
+    elif q_type == "true_false":
+        q["correct"] = rng.random() < 0.5
+    else:
+        q["expected_keywords"] = rng.sample(WORDS, 3)
+    return q
+
+
+def make_quiz(rng: random.Random, idx: int, num_questions: int) -> dict:
+    """Build one random quiz."""
+    lecture = f"{COURSES[idx % len(COURSES)]}{idx % 20 + 1}"
+    return {
+        "id": f"{lecture}_quiz{idx:06d}",
+        "lecture": lecture,
+        "topic": _sentence(rng, 3).title(),
+        "created": f"2025-{idx % 12 + 1:02d}-{idx % 28 + 1:02d}T{idx % 24:02d}:00:00",
+        "questions": [make_question(rng, i) for i in range(num_questions)],
+    }
+
+
+def make_submission(rng: random.Random, quiz: dict) -> dict:
+    """Build a plausible submission answering every question of a quiz."""
+    answers = []
+    for q in quiz["questions"]:
+        answer = {"question_id": q["id"], "time_spent_sec": rng.randint(3, 60)}
+        if q["type"] == "multiple_choice":
+            answer["selected"] = q["correct"] if rng.random() < 0.7 else rng.randrange(len(q["options"]))
+        elif q["type"] == "true_false":
+            answer["selected"] = q["correct"] if rng.random() < 0.7 else not q["correct"]
+        else:
+            answer["text"] = " ".join(rng.sample(q["expected_keywords"], rng.randint(0, 3)))
+        answers.append(answer)
+    return {"answers": answers, "total_time_sec": sum(a["time_spent_sec"] for a in answers)}
+
+
+def generate_corpus(data_dir: Path, num_quizzes: int, num_questions: int, seed: int = 0) -> list[str]:
+    """Write `num_quizzes` quiz files to `data_dir`. Returns their IDs."""
+    rng = random.Random(seed)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    quiz_ids = []
+    for idx in range(num_quizzes):
+        quiz = make_quiz(rng, idx, num_questions)
+        with open(data_dir / f"{quiz['id']}.json", "w") as f:
+            json.dump(quiz, f, indent=2)
+        quiz_ids.append(quiz["id"])
+    return quiz_ids
+
+
+def bench_user(idx: int) -> str:
+    """Deterministic user token (matches sessions.TOKEN_PATTERN); user 0 is the default user."""
+    return "" if idx == 0 else f"benchuser{idx:08d}"
+
+
+def generate_results(results_dir: Path, data_dir: Path, quiz_ids: list[str], num_attempts: int,
+                     num_users: int = 1, seed: int = 0, batch_size: int = 1000) -> int:
+    """
+    Grade `num_attempts` random submissions spread over `num_users` users
+    with the server's grading code, record them in results.sqlite3 and
+    mirror each user's latest attempt per quiz, as the result writer does.
+    Returns the number of attempts recorded.
+    """
+    sys.path.insert(0, str(SERVER_DIR))
+    from grading import grade_submission
+    from results_store import ResultsStore
+    from results_writer import mirror_path
+
+    rng = random.Random(seed)
+    results_dir.mkdir(parents=True, exist_ok=True)
+    store = ResultsStore(results_dir / "results.sqlite3")
+    started = datetime(2025, 1, 1)
+    latest: dict[tuple[str, str], dict] = {}
+    batch: list[dict] = []
+    # Attempts are grouped by quiz so each quiz file is read once
+    per_quiz: dict[str, int] = {}
+    for _ in range(num_attempts):
+        quiz_id = rng.choice(quiz_ids)
+        per_quiz[quiz_id] = per_quiz.get(quiz_id, 0) + 1
+    recorded = 0
+    for quiz_id, count in per_quiz.items():
+        with open(data_dir / f"{quiz_id}.json") as f:
+            quiz = json.load(f)
+        for _ in range(count):
+            user_id = bench_user(rng.randrange(num_users))
+            result = {
+                "quiz_id": quiz_id,
+                "user_id": user_id,
+                "lecture": quiz["lecture"],
+                "completed": (started + timedelta(minutes=rng.randrange(525600))).isoformat() + "Z",
+                "uid": f"bench-{seed}-{recorded}",
+                **grade_submission(quiz, make_submission(rng, quiz)),
+            }
+            batch.append(result)
+            recorded += 1
+            key = (user_id, quiz_id)
+            if key not in latest or latest[key]["completed"] < result["completed"]:
+                latest[key] = result
+            if len(batch) >= batch_size:
+                store.record_many(batch)
+                batch = []
+    if batch:
+        store.record_many(batch)
+
+    for (user_id, quiz_id), result in latest.items():
+        mirror = {k: v for k, v in result.items() if k != "uid"}
+        mirror_path(results_dir, user_id, quiz_id).write_text(json.dumps(mirror, indent=2))
+    return recorded
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic quiz corpus")
+    parser.add_argument("data_dir", type=Path)
+    parser.add_argument("--quizzes", type=int, default=100)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--results-dir", type=Path, help="Also write graded attempts to this directory")
+    parser.add_argument("--attempts", type=int, default=0, help="Attempts to generate (with --results-dir)")
+    parser.add_argument("--users", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    ids = generate_corpus(args.data_dir, args.quizzes, args.questions, args.seed)
+    print(f"Wrote {len(ids)} quizzes to {args.data_dir}")
+    if args.results_dir:
+        n = generate_results(args.results_dir, args.data_dir, ids, args.attempts, args.users, args.seed)
+        print(f"Wrote {n} attempts to {args.results_dir}")
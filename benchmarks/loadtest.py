@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Load test for the quiz server under gunicorn.
+
+Starts the server with an increasing number of workers against a synthetic
+corpus and measures requests/second on the index, quiz and submit endpoints,
+so you can check that throughput scales with cores.
+
+Usage: python benchmarks/loadtest.py [--workers 1,2,4] [--duration 10] [--json out.json]
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from corpus import generate_corpus
+
+SERVER_DIR = Path(__file__).resolve().parent.parent / "server"
+
+
+def _request(conn: http.client.HTTPConnection, endpoint: str, quiz_id: str) -> int:
+    if endpoint == "index":
+        conn.request("GET", "/")
+    elif endpoint == "quiz":
+        conn.request("GET", f"/quiz/{quiz_id}")
+    else:
+        body = json.dumps({"answers": [{"question_id": "q1", "selected": 0}], "total_time_sec": 30})
+        conn.request("POST", f"/quiz/{quiz_id}/submit", body=body,
+                     headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    response.read()
+    return response.status
+
+
+def _client(args: tuple) -> int:
+    """Issue requests on one keep-alive connection until the deadline."""
+    port, endpoint, quiz_ids, deadline, seed = args
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    done = 0
+    while time.monotonic() < deadline:
+        if _request(conn, endpoint, rng.choice(quiz_ids)) == 200:
+            done += 1
+    conn.close()
+    return done
+
+
+def _wait_ready(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/api/status")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def run(workers: int, threads: int, clients: int, duration: float, root: Path,
+        quiz_ids: list[str], port: int) -> dict:
+    """Benchmark one worker count. Returns requests/second per endpoint."""
+    env = dict(
+        os.environ,
+        QUIZ_DATA_DIR=str(root / "data"),
+        QUIZ_RESULTS_DIR=str(root / "results"),
+        QUIZ_BIND=f"127.0.0.1:{port}",
+        QUIZ_WORKERS=str(workers),
+        QUIZ_THREADS=str(threads),
+        QUIZ_ACCESS_LOG="",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "server:app"],
+        cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        _wait_ready(port)
+        results = {}
+        with multiprocessing.Pool(clients) as pool:
+            for endpoint in ("index", "quiz", "submit"):
+                deadline = time.monotonic() + duration
+                jobs = [(port, endpoint, quiz_ids, deadline, i) for i in range(clients)]
+                results[endpoint] = round(sum(pool.map(_client, jobs)) / duration, 1)
+        return results
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quiz server load test")
+    parser.add_argument("--workers", default=None,
+                        help="Comma-separated worker counts (default: powers of two up to CPU count)")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=None,
+                        help="Concurrent client processes (default: 2 x max workers)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per endpoint")
+    parser.add_argument("--quizzes", type=int, default=500)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--json", type=Path, help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    if args.workers:
+        worker_counts = [int(w) for w in args.workers.split(",")]
+    else:
+        worker_counts, w = [], 1
+        while w <= multiprocessing.cpu_count():
+            worker_counts.append(w)
+            w *= 2
+    clients = args.clients or 2 * max(worker_counts)
+
+    report = {"clients": clients, "threads": args.threads, "duration": args.duration, "runs": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        quiz_ids = generate_corpus(root / "data", args.quizzes, args.questions)
+        (root / "results").mkdir()
+        for workers in worker_counts:
+            report["runs"][workers] = run(workers, args.threads, clients, args.duration,
+                                          root, quiz_ids, args.port)
+
+    base = report["runs"][worker_counts[0]]
+    print(f"{'workers':>8} {'index/s':>16} {'quiz/s':>16} {'submit/s':>16}")
+    for workers, rates in report["runs"].items():
+        cells = []
+        for endpoint in ("index", "quiz", "submit"):
+            speedup = rates[endpoint] / base[endpoint] if base[endpoint] else 0.0
+            cells.append(f"{rates[endpoint]:>8.0f} ({speedup:.1f}x)")
+        print(f"{workers:>8} " + " ".join(f"{c:>16}" for c in cells))
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
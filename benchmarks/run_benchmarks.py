@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: per-endpoint throughput, latency and memory at several scales.
+
+For each scale (quizzes x questions per quiz) a synthetic data/ and results/
+tree is generated (see corpus.py), then every endpoint is driven
+
+- through the Flask test client, in a fresh process per scale, and
+- over real HTTP against gunicorn (one worker by default),
+
+recording requests/second, p50/p99 latency and the server's peak RSS while
+that endpoint ran (Linux: VmHWM, reset between endpoints via clear_refs;
+elsewhere the process peak so far). Results go to a JSON report; compare two
+reports to spot regressions:
+
+    python benchmarks/run_benchmarks.py --scales 100x20,10000x20 --json before.json
+    ... change something ...
+    python benchmarks/run_benchmarks.py --scales 100x20,10000x20 --json after.json --compare before.json
+    python benchmarks/run_benchmarks.py --compare before.json after.json   # compare only
+
+Compare mode exits with status 1 if any endpoint's p50 or p99 rose, or its
+throughput fell, by more than --threshold.
+
+Usage: python benchmarks/run_benchmarks.py [--scales 100x20,1000x50] [--transports client,http]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from corpus import WORDS, generate_corpus, generate_results, make_submission
+
+BENCH_DIR = Path(__file__).resolve().parent
+SERVER_DIR = BENCH_DIR.parent / "server"
+
+# ANSI colors
+RED = "\033[91m"
+GREEN = "\033[92m"
+YELLOW = "\033[93m"
+RESET = "\033[0m"
+
+ENDPOINTS = ("index", "list", "quiz_page", "quiz_api", "submit", "stats", "search")
+TRANSPORTS = ("client", "http")
+
+# The server token (QUIZ_INGEST_TOKEN); single-user results endpoints like /api/stats require it
+SERVER_TOKEN = "benchmark-token"
+AUTH_HEADERS = {"Authorization": f"Bearer {SERVER_TOKEN}"}
+
+# Quizzes sampled for page, API and submit requests
+QUIZ_SAMPLE = 200
+
+
+class Workload:
+    """Builds requests for each endpoint from a corpus on disk."""
+
+    def __init__(self, data_dir: Path, seed: int = 0):
+        self.rng = random.Random(seed)
+        quiz_ids = sorted(p.stem for p in data_dir.glob("*.json"))
+        self.quiz_ids = self.rng.sample(quiz_ids, min(QUIZ_SAMPLE, len(quiz_ids)))
+        self.submissions = {}
+        for quiz_id in self.quiz_ids:
+            with open(data_dir / f"{quiz_id}.json") as f:
+                self.submissions[quiz_id] = json.dumps(make_submission(self.rng, json.load(f))).encode()
+
+    def request(self, endpoint: str) -> tuple[str, str, bytes | None]:
+        """(method, path, body) of one request to an endpoint."""
+        quiz_id = self.rng.choice(self.quiz_ids)
+        if endpoint == "index":
+            return "GET", "/", None
+        if endpoint == "list":
+            return "GET", "/api/quizzes", None
+        if endpoint == "quiz_page":
+            return "GET", f"/quiz/{quiz_id}", None
+        if endpoint == "quiz_api":
+            return "GET", f"/api/quiz/{quiz_id}", None
+        if endpoint == "submit":
+            return "POST", f"/quiz/{quiz_id}/submit", self.submissions[quiz_id]
+        if endpoint == "stats":
+            return "GET", "/api/stats", None
+        if endpoint == "search":
+            return "GET", "/api/search?q=" + "+".join(self.rng.sample(WORDS, self.rng.randint(1, 3))), None
+        raise ValueError(f"Unknown endpoint {endpoint!r}")
+
+
+# --- Memory ---
+
+def reset_peak_rss(pid: int) -> bool:
+    """Reset a process's peak RSS (Linux only). Returns False if unsupported."""
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb(pid: int) -> float | None:
+    """Peak RSS of a process in MiB (VmHWM), or of this process via getrusage."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    if pid == os.getpid():
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return round(maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    return None
+
+
+def child_pids(pid: int) -> list[int]:
+    """Direct children of a process (Linux), e.g. gunicorn's workers."""
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+# --- Measurement ---
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    """Throughput and latency percentiles of one endpoint run."""
+    if not latencies:
+        return {"requests": 0, "errors": errors, "rps": 0.0, "p50_ms": None, "p99_ms": None, "mean_ms": None}
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": round(ordered[int(0.50 * (len(ordered) - 1))] * 1000, 3),
+        "p99_ms": round(ordered[int(0.99 * (len(ordered) - 1))] * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+    }
+
+
+def drive_client(root: Path, endpoints: list[str], requests: int, warmup: int, max_seconds: float,
+                 seed: int) -> dict:
+    """Run in a child process: import the app against `root` and drive its test client."""
+    os.environ["QUIZ_DATA_DIR"] = str(root / "data")
+    os.environ["QUIZ_RESULTS_DIR"] = str(root / "results")
+    os.environ["QUIZ_INGEST_TOKEN"] = SERVER_TOKEN
+    started = time.perf_counter()
+    sys.path.insert(0, str(SERVER_DIR))
+    import server  # noqa: E402 - configured through the environment above
+
+    client = server.app.test_client()
+    client.get("/")
+    report = {"startup_s": round(time.perf_counter() - started, 3), "endpoints": {}}
+    server.warmed_up.wait()  # measure steady state, not the background warm-up
+    workload = Workload(root / "data", seed)
+    pid = os.getpid()
+    for endpoint in endpoints:
+        for _ in range(warmup):
+            method, path, body = workload.request(endpoint)
+            client.open(path, method=method, data=body, content_type="application/json", headers=AUTH_HEADERS)
+        reset_peak_rss(pid)
+        latencies, errors = [], 0
+        run_started = time.perf_counter()
+        deadline = run_started + max_seconds
+        while len(latencies) + errors < requests and time.perf_counter() < deadline:
+            method, path, body = workload.request(endpoint)
+            t0 = time.perf_counter()
+            status = client.open(path, method=method, data=body, content_type="application/json",
+                                 headers=AUTH_HEADERS).status_code
+            if status < 400:
+                latencies.append(time.perf_counter() - t0)
+            else:
+                errors += 1
+        elapsed = time.perf_counter() - run_started
+        server.result_writer.wait_idle(30)
+        report["endpoints"][endpoint] = {**summarize(latencies, errors, elapsed), "peak_rss_mb": peak_rss_mb(pid)}
+    return report
+
+
+def run_client(root: Path, args) -> dict:
+    """Test-client benchmark of one corpus in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, str(Path(__file__).resolve()), "--child", str(root),
+         "--endpoints", ",".join(args.endpoints), "--requests", str(args.requests),
+         "--warmup", str(args.warmup), "--max-seconds", str(args.max_seconds), "--seed", str(args.seed)],
+        cwd=BENCH_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(port: int, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/api/status")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+def _wait_warm(port: int, workers: int, timeout: float) -> None:
+    """Wait until every worker reports its background warm-up done (sampled via /api/status)."""
+    deadline = time.monotonic() + timeout
+    warm = 0
+    while warm < 4 * workers:
+        if time.monotonic() > deadline:
+            raise RuntimeError("server did not finish warming up")
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        conn.request("GET", "/api/status")
+        warming = json.loads(conn.getresponse().read())["startup"]["warming_up"]
+        conn.close()
+        if warming:
+            warm = 0
+            time.sleep(0.1)
+        else:
+            warm += 1
+
+
+def _http_load(port: int, workload: Workload, endpoint: str, requests: int, concurrency: int,
+               max_seconds: float) -> tuple[list[float], int, float]:
+    """Issue `requests` requests over `concurrency` keep-alive connections."""
+    latencies: list[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    remaining = [requests]
+    deadline = time.perf_counter() + max_seconds
+
+    def take() -> tuple[str, str, bytes | None] | None:
+        with lock:
+            if remaining[0] <= 0 or time.perf_counter() >= deadline:
+                return None
+            remaining[0] -= 1
+            return workload.request(endpoint)
+
+    def connection() -> None:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        while (req := take()) is not None:
+            method, path, body = req
+            headers = {"Content-Type": "application/json", **AUTH_HEADERS} if body else AUTH_HEADERS
+            t0 = time.perf_counter()
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            elapsed = time.perf_counter() - t0
+            with lock:
+                if response.status < 400:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+        conn.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=connection) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors[0], time.perf_counter() - started
+
+
+def run_http(root: Path, args) -> dict:
+    """HTTP benchmark of one corpus against gunicorn."""
+    port = _free_port()
+    env = dict(
+        os.environ,
+        QUIZ_DATA_DIR=str(root / "data"),
+        QUIZ_RESULTS_DIR=str(root / "results"),
+        QUIZ_INGEST_TOKEN=SERVER_TOKEN,
+        QUIZ_BIND=f"127.0.0.1:{port}",
+        QUIZ_WORKERS=str(args.workers),
+        QUIZ_THREADS=str(args.threads),
+        QUIZ_ACCESS_LOG="",
+    )
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "server:app"],
+        cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        _wait_ready(port, timeout=max(30.0, args.max_seconds * 3))
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=600)
+        conn.request("GET", "/")
+        conn.getresponse().read()
+        report = {"startup_s": round(time.perf_counter() - started, 3), "endpoints": {}}
+        _wait_warm(port, args.workers, timeout=max(60.0, args.max_seconds * 3))
+        workload = Workload(root / "data", args.seed)
+        for endpoint in args.endpoints:
+            _http_load(port, workload, endpoint, args.warmup, 1, args.max_seconds)
+            workers = child_pids(server.pid)
+            for pid in workers:
+                reset_peak_rss(pid)
+            latencies, errors, elapsed = _http_load(port, workload, endpoint, args.requests,
+                                                    args.concurrency, args.max_seconds)
+            peaks = [rss for rss in map(peak_rss_mb, workers) if rss is not None]
+            report["endpoints"][endpoint] = {**summarize(latencies, errors, elapsed),
+                                             "peak_rss_mb": max(peaks) if peaks else None}
+        return report
+    finally:
+        server.terminate()
+        server.wait()
+
+
+# --- Corpus ---
+
+def parse_scales(spec: str) -> list[tuple[int, int]]:
+    """'100x20,1000x50' -> [(100, 20), (1000, 50)]."""
+    scales = []
+    for part in spec.split(","):
+        quizzes, _, questions = part.strip().lower().partition("x")
+        scales.append((int(quizzes), int(questions or 20)))
+    return scales
+
+
+def prepare_corpus(work_dir: Path, quizzes: int, questions: int, attempts: int, users: int, seed: int) -> Path:
+    """Generate (or reuse) the data/ and results/ trees for one scale."""
+    root = work_dir / f"q{quizzes}x{questions}-a{attempts}-u{users}-s{seed}"
+    marker = root / ".complete"
+    if marker.exists():
+        return root
+    quiz_ids = generate_corpus(root / "data", quizzes, questions, seed)
+    generate_results(root / "results", root / "data", quiz_ids, attempts, users, seed)
+    marker.touch()
+    return root
+
+
+# --- Reports ---
+
+def run_key(run: dict) -> tuple:
+    return run["quizzes"], run["questions"], run["attempts"], run["transport"]
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> int:
+    """Print per-endpoint changes against a baseline. Returns the number of regressions."""
+    base_runs = {run_key(r): r for r in baseline["runs"]}
+    regressions = 0
+    print(f"\n{'scale':<22} {'transport':<9} {'endpoint':<10} {'p50 ms':>18} {'p99 ms':>18} {'req/s':>18}")
+    for run in current["runs"]:
+        base = base_runs.get(run_key(run))
+        if base is None:
+            continue
+        scale = f"{run['quizzes']}x{run['questions']} ({run['attempts']} att.)"
+        for endpoint, now in run["endpoints"].items():
+            before = base["endpoints"].get(endpoint)
+            if not before or not before["requests"] or not now["requests"]:
+                continue
+            cells, regressed = [], False
+            for metric, higher_is_worse in (("p50_ms", True), ("p99_ms", True), ("rps", False)):
+                old, new = before[metric], now[metric]
+                change = (new - old) / old if old else 0.0
+                worse = change > threshold if higher_is_worse else change < -threshold
+                better = change < -threshold if higher_is_worse else change > threshold
+                color = RED if worse else GREEN if better else ""
+                cells.append(f"{color}{f'{new:.2f} {change:+.0%}':>18}{RESET if color else ''}")
+                regressed |= worse
+            regressions += regressed
+            print(f"{scale:<22} {run['transport']:<9} {endpoint:<10} " + " ".join(cells))
+    if regressions:
+        print(f"\n{RED}{regressions} endpoint(s) regressed by more than {threshold:.0%}{RESET}")
+    else:
+        print(f"\n{GREEN}No regressions beyond {threshold:.0%}{RESET}")
+    return regressions
+
+
+def print_report(report: dict) -> None:
+    for run in report["runs"]:
+        print(f"\n{YELLOW}{run['quizzes']} quizzes x {run['questions']} questions, {run['attempts']} attempts "
+              f"- {run['transport']} (startup {run['startup_s']:.2f}s){RESET}")
+        print(f"{'endpoint':<10} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'peak RSS MiB':>13} {'errors':>7}")
+        for endpoint, r in run["endpoints"].items():
+            fmt = lambda v, spec: format(v, spec) if v is not None else "-"  # noqa: E731
+            print(f"{endpoint:<10} {r['rps']:>9.1f} {fmt(r['p50_ms'], '9.2f'):>9} {fmt(r['p99_ms'], '9.2f'):>9} "
+                  f"{fmt(r['peak_rss_mb'], '13.1f'):>13} {r['errors']:>7}")
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quiz server benchmark suite")
+    parser.add_argument("--scales", default="100x20,1000x20",
+                        help="Comma-separated QUIZZESxQUESTIONS, e.g. 100x10,100000x20,1000x500")
+    parser.add_argument("--attempts-per-quiz", type=float, default=2.0,
+                        help="Stored attempts generated per quiz")
+    parser.add_argument("--users", type=int, default=1, help="Users the stored attempts are spread over")
+    parser.add_argument("--transports", default="client,http", help="client, http or both")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per endpoint")
+    parser.add_argument("--max-seconds", type=float, default=20.0, help="Time limit per endpoint")
+    parser.add_argument("--concurrency", type=int, default=4, help="HTTP connections in parallel")
+    parser.add_argument("--workers", type=int, default=1, help="gunicorn workers")
+    parser.add_argument("--threads", type=int, default=4, help="gunicorn threads per worker")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", type=Path,
+                        help="Keep generated corpora here and reuse them across runs (default: temporary)")
+    parser.add_argument("--json", type=Path, help="Write the report to this file")
+    parser.add_argument("--compare", nargs="+", type=Path, metavar="REPORT",
+                        help="Baseline report to compare against (two reports: compare them without running)")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression")
+    parser.add_argument("--child", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.endpoints = [e for e in args.endpoints.split(",") if e]
+
+    if args.child:
+        print(json.dumps(drive_client(args.child, args.endpoints, args.requests, args.warmup,
+                                      args.max_seconds, args.seed)))
+        return
+
+    unknown = set(args.endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoint(s): {', '.join(sorted(unknown))}")
+
+    if args.compare and len(args.compare) == 2:
+        baseline, current = (json.loads(p.read_text()) for p in args.compare)
+        sys.exit(1 if compare(baseline, current, args.threshold) else 0)
+
+    transports = [t for t in args.transports.split(",") if t]
+    if set(transports) - set(TRANSPORTS):
+        parser.error(f"transports must be among {', '.join(TRANSPORTS)}")
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "threads": args.threads,
+        },
+        "runs": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = args.work_dir or Path(tmp)
+        for quizzes, questions in parse_scales(args.scales):
+            attempts = int(quizzes * args.attempts_per_quiz)
+            print(f"Preparing {quizzes} quizzes x {questions} questions, {attempts} attempts...", flush=True)
+            t0 = time.perf_counter()
+            root = prepare_corpus(work_dir, quizzes, questions, attempts, args.users, args.seed)
+            corpus_s = time.perf_counter() - t0
+            for transport in transports:
+                # Each run starts from the pristine corpus, not the previous run's submissions
+                run_root = Path(tmp) / f"run-{transport}"
+                shutil.rmtree(run_root, ignore_errors=True)
+                shutil.copytree(root, run_root)
+                print(f"  {transport}...", flush=True)
+                measured = run_client(run_root, args) if transport == "client" else run_http(run_root, args)
+                report["runs"].append({
+                    "quizzes": quizzes, "questions": questions, "attempts": attempts, "users": args.users,
+                    "transport": transport, "corpus_s": round(corpus_s, 2), **measured,
+                })
+
+    print_report(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"\nReport written to {args.json}")
+    if args.compare:
+        sys.exit(1 if compare(json.loads(args.compare[0].read_text()), report, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
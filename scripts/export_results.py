@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Results Export Script
+Exports quiz answers (one row per answered question) as NDJSON or Parquet,
+incrementally: each run writes only the attempts recorded since the last one
+to a new part file and remembers the cursor in <out-dir>/cursor.json.
+
+Usage:
+    python scripts/export_results.py --url https://your-server.com/quizzes  # over HTTP (/api/export)
+    python scripts/export_results.py --db server/results/results.sqlite3    # from a results store
+    python scripts/export_results.py --db ... --format parquet              # needs pyarrow
+    python scripts/export_results.py --url ... --scope class --token ...    # every student
+
+Part files are named answers-<first attempt>-<last attempt>.<ext>; read them
+all with e.g. pandas.read_json(..., lines=True) or pyarrow.dataset.
+"""
+
+import argparse
+import json
+import os
+import sys
+import urllib.request
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).parent.parent / "server"
+sys.path.insert(0, str(SERVER_DIR))
+
+from export import answer_rows, ndjson_chunks, pyarrow, write_parquet  # noqa: E402
+from results_store import ResultsStore  # noqa: E402
+
+# ANSI colors
+RED = "\033[91m"
+GREEN = "\033[92m"
+YELLOW = "\033[93m"
+RESET = "\033[0m"
+
+
+def load_cursor(path: Path, source: str) -> int:
+    """Cursor of the last export from `source` (0 if none or from elsewhere)."""
+    try:
+        state = json.loads(path.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return 0
+    return state.get("cursor", 0) if state.get("source") == source else 0
+
+
+def save_cursor(path: Path, source: str, cursor: int) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps({"source": source, "cursor": cursor}))
+    os.replace(tmp, path)
+
+
+def rows_from_http(url: str, since: int, scope: str | None, token: str, user: str | None):
+    """Open /api/export; returns (rows iterator, cursor)."""
+    query = f"?since={since}" + (f"&scope={scope}" if scope else "")
+    headers = {}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    if user:
+        headers["X-Quiz-User"] = user
+    response = urllib.request.urlopen(urllib.request.Request(url.rstrip("/") + "/api/export" + query,
+                                                             headers=headers), timeout=300)
+    cursor = int(response.headers["X-Export-Cursor"])
+    # The response is read line by line, never held in memory as a whole
+    return (json.loads(line) for line in response if line.strip()), cursor
+
+
+def rows_from_db(db: Path, since: int, user: str | None):
+    """Read a results store directly; returns (rows iterator, cursor)."""
+    store = ResultsStore(db)
+    cursor = store.last_attempt_id()
+    return answer_rows(store.iter_attempts(since, cursor, user)), max(since, cursor)
+
+
+def write_part(rows, path: Path, fmt: str) -> int:
+    """Write rows to `path` atomically. Returns the row count."""
+    tmp = path.with_name(f".{path.name}.tmp")
+    if fmt == "parquet":
+        count = write_parquet(rows, tmp)
+    else:
+        count = 0
+        with open(tmp, "wb") as f:
+            for chunk in ndjson_chunks(rows):
+                f.write(chunk)
+                count += chunk.count(b"\n")
+    if count:
+        os.replace(tmp, path)
+    else:
+        tmp.unlink(missing_ok=True)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export quiz answers incrementally")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--url", help="Server base URL, e.g. https://your-server.com/quizzes")
+    source.add_argument("--db", type=Path, help="Path to results.sqlite3")
+    parser.add_argument("--out-dir", type=Path, default=Path(".cache/quiz-results/export"))
+    parser.add_argument("--format", choices=("ndjson", "parquet"), default="ndjson")
+    parser.add_argument("--full", action="store_true", help="Ignore the saved cursor and export everything")
+    parser.add_argument("--scope", choices=("class",), help="(--url) Export every student (needs --token)")
+    parser.add_argument("--token", default=os.environ.get("QUIZ_INGEST_TOKEN", ""))
+    parser.add_argument("--user", help="Only this user's answers (--url: the X-Quiz-User token)")
+    args = parser.parse_args()
+
+    if args.format == "parquet" and pyarrow is None:
+        print(f"{RED}Error: Parquet output needs pyarrow (pip install pyarrow){RESET}")
+        sys.exit(1)
+    if args.db and not args.db.exists():
+        print(f"{RED}Error: Results store not found: {args.db}{RESET}")
+        sys.exit(1)
+
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    source_id = args.url or str(args.db.resolve())
+    source_id += f"|{args.scope or ''}|{args.user or ''}"
+    cursor_file = args.out_dir / "cursor.json"
+    since = 0 if args.full else load_cursor(cursor_file, source_id)
+
+    try:
+        if args.url:
+            rows, cursor = rows_from_http(args.url, since, args.scope, args.token, args.user)
+        else:
+            rows, cursor = rows_from_db(args.db, since, args.user)
+    except OSError as e:
+        print(f"{RED}✗ Export failed: {e}{RESET}")
+        sys.exit(1)
+
+    if cursor <= since:
+        print(f"{GREEN}✓ Up to date (cursor {cursor}){RESET}")
+        return
+
+    ext = "parquet" if args.format == "parquet" else "ndjson"
+    part = args.out_dir / f"answers-{since + 1:09d}-{cursor:09d}.{ext}"
+    count = write_part(rows, part, args.format)
+    save_cursor(cursor_file, source_id, cursor)
+    if count:
+        print(f"{GREEN}✓ Exported {count} answer(s) from attempts {since + 1}-{cursor} to {part}{RESET}")
+    else:
+        print(f"{YELLOW}No answers in attempts {since + 1}-{cursor}; cursor advanced{RESET}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Quiz Ingest Client
+Uploads new and changed quizzes to the server's /api/ingest endpoint as one
+atomic batch. Only quizzes whose SHA-256 differs from the server's copy are
+sent. Invalid quizzes reject the whole batch, so nothing is half-published.
+
+Usage:
+    python scripts/ingest_quizzes.py --url https://your-server.com/quizzes            # upload changes
+    python scripts/ingest_quizzes.py --url https://your-server.com/quizzes --prune    # also delete removed quizzes
+    python scripts/ingest_quizzes.py --url https://your-server.com/quizzes --dry-run  # only show the plan
+
+The token is read from --token or QUIZ_INGEST_TOKEN and must match the
+server's QUIZ_INGEST_TOKEN.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+# ANSI colors
+RED = "\033[91m"
+GREEN = "\033[92m"
+YELLOW = "\033[93m"
+RESET = "\033[0m"
+
+
+def local_manifest(data_dir: Path) -> dict[str, bytes]:
+    """Contents of every quiz file, keyed by quiz ID."""
+    return {path.stem: path.read_bytes() for path in sorted(data_dir.glob("*.json"))
+            if not path.name.startswith(".")}
+
+
+def post(url: str, token: str, payload: dict) -> tuple[int, dict]:
+    """POST JSON; returns (status, decoded body)."""
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode(), method="POST",
+        headers={"Content-Type": "application/json", "Authorization": f"Bearer {token}"},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        body = e.read()
+        try:
+            return e.code, json.loads(body)
+        except json.JSONDecodeError:
+            return e.code, {"errors": [body.decode(errors="replace").strip()[:200] or e.reason]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload changed quizzes to the quiz server")
+    parser.add_argument("--url", required=True, help="Server base URL, e.g. https://your-server.com/quizzes")
+    parser.add_argument("--token", default=os.environ.get("QUIZ_INGEST_TOKEN", ""))
+    parser.add_argument("--data-dir", type=Path, default=Path(".cache/web-quizzes"))
+    parser.add_argument("--prune", action="store_true", help="Delete server quizzes missing locally")
+    parser.add_argument("--dry-run", action="store_true", help="Show what would change without uploading")
+    args = parser.parse_args()
+
+    if not args.token:
+        print(f"{RED}Error: no token (--token or QUIZ_INGEST_TOKEN){RESET}")
+        sys.exit(1)
+    if not args.data_dir.is_dir():
+        print(f"{RED}Error: Local quizzes directory not found: {args.data_dir}{RESET}")
+        sys.exit(1)
+
+    base_url = args.url.rstrip("/")
+    files = local_manifest(args.data_dir)
+    status, plan = post(f"{base_url}/api/ingest/plan", args.token, {
+        "manifest": {quiz_id: hashlib.sha256(data).hexdigest() for quiz_id, data in files.items()},
+        "prune": args.prune,
+    })
+    if status != 200:
+        print(f"{RED}Plan failed ({status}): {'; '.join(plan.get('errors', []))}{RESET}")
+        sys.exit(1)
+
+    upload, delete = plan["upload"], plan["delete"]
+    print(f"{len(files)} local quiz(zes): {len(upload)} to upload, {len(delete)} to delete, "
+          f"{len(files) - len(upload)} unchanged")
+    if not upload and not delete:
+        print(f"{GREEN}✓ Server is up to date (generation {plan['generation']}){RESET}")
+        return
+    for quiz_id in upload:
+        print(f"  + {quiz_id}")
+    for quiz_id in delete:
+        print(f"  - {quiz_id}")
+    if args.dry_run:
+        return
+
+    status, result = post(f"{base_url}/api/ingest", args.token, {
+        "upserts": [{"id": quiz_id, "sha256": hashlib.sha256(files[quiz_id]).hexdigest(),
+                     "content": files[quiz_id].decode()} for quiz_id in upload],
+        "deletes": delete,
+        "base_generation": plan["generation"],
+    })
+    if status == 409:
+        print(f"{YELLOW}The server's quizzes changed during the sync; run again.{RESET}")
+        sys.exit(1)
+    if status != 200:
+        print(f"{RED}✗ Batch rejected ({status}), nothing was published:{RESET}")
+        for error in result.get("errors", []):
+            print(f"  {error}")
+        sys.exit(1)
+    print(f"{GREEN}✓ Published generation {result['generation']}: {len(result['upserted'])} upserted, "
+          f"{len(result['deleted'])} deleted{RESET}")
+
+
+if __name__ == "__main__":
+    main()
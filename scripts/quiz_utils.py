@@ -2,18 +2,39 @@
 """
 Quiz generation utilities.
 Usage: Import and use in quiz generation, or run directly to test.
+
+For whole quizzes, write_quiz() builds every question from a list (or
+generator) of specs with a per-quiz seeded RNG, so regenerating a quiz gives
+byte-identical output, and streams the JSON to disk question by question.
 """
 
+import hashlib
+import json
+import os
 import random
+from pathlib import Path
+from typing import Iterable, Iterator
+
 
+def quiz_rng(quiz_id: str, seed: int | None = None) -> random.Random:
+    """RNG for one quiz: seeded from `seed`, or deterministically from the quiz ID."""
+    if seed is None:
+        seed = int.from_bytes(hashlib.sha256(quiz_id.encode()).digest()[:8], "big")
+    return random.Random(seed)
 
-def shuffle_options(options: list[str], correct_index: int) -> tuple[list[str], int]:
+
+def shuffle_options(options: list[str], correct_index: int,
+                    rng: random.Random | None = None) -> tuple[list[str], int]:
     """
     Shuffle multiple choice options and return new correct index.
 
+    The correct option is followed through the permutation rather than
+    searched for afterwards, so duplicate option strings are handled.
+
     Args:
         options: List of answer options (e.g., ["4", "6", "8", "9"])
         correct_index: Index of correct answer in original list
+        rng: Random source (defaults to the global `random` module)
 
     Returns:
         Tuple of (shuffled_options, new_correct_index)
@@ -24,10 +45,17 @@ def shuffle_options(options: list[str], correct_index: int) -> tuple[list[str],
         >>> shuffled[new_idx]
         'Correct'
     """
-    correct_answer = options[correct_index]
+    rng = rng or random
     shuffled = options.copy()
-    random.shuffle(shuffled)
-    new_index = shuffled.index(correct_answer)
+    new_index = correct_index
+    # Fisher-Yates, tracking where the correct option moves
+    for i in range(len(shuffled) - 1, 0, -1):
+        j = rng.randrange(i + 1)
+        shuffled[i], shuffled[j] = shuffled[j], shuffled[i]
+        if new_index == i:
+            new_index = j
+        elif new_index == j:
+            new_index = i
     return shuffled, new_index
 
 
@@ -35,6 +63,7 @@ def create_mc_question(
     question: str,
     correct: str,
     distractors: list[str],
+    rng: random.Random | None = None,
     **kwargs
 ) -> dict:
     """
@@ -44,6 +73,7 @@ def create_mc_question(
         question: The question text
         correct: The correct answer
         distractors: List of incorrect answers (typically 3)
+        rng: Random source (defaults to the global `random` module)
         **kwargs: Additional fields (id, topic, slide_ref, etc.)
 
     Returns:
@@ -62,7 +92,7 @@ def create_mc_question(
         '8'
     """
     all_options = [correct] + distractors
-    shuffled, correct_idx = shuffle_options(all_options, 0)
+    shuffled, correct_idx = shuffle_options(all_options, 0, rng)
 
     return {
         "type": "multiple_choice",
@@ -73,6 +103,54 @@ def create_mc_question(
     }
 
 
+def build_questions(specs: Iterable[dict], rng: random.Random) -> Iterator[dict]:
+    """
+    Turn question specs into quiz questions, one at a time.
+
+    A spec without a "type" (or with type "multiple_choice" and a
+    "distractors" list) is passed to create_mc_question(); other specs are
+    used as-is. Questions without an "id" are numbered q1, q2, ...
+    """
+    for n, spec in enumerate(specs, start=1):
+        spec = dict(spec)
+        spec.setdefault("id", f"q{n}")
+        if spec.get("type", "multiple_choice") == "multiple_choice" and "distractors" in spec:
+            spec.pop("type", None)
+            yield create_mc_question(spec.pop("question"), spec.pop("correct"), spec.pop("distractors"),
+                                     rng=rng, **spec)
+        else:
+            yield spec
+
+
+def write_quiz(path: Path, quiz: dict, specs: Iterable[dict], seed: int | None = None) -> int:
+    """
+    Build a quiz from question specs and write it to `path` in one pass.
+
+    `quiz` holds the quiz-level fields (id, lecture, topic, ...). Questions
+    are generated and written one by one, so `specs` can be a generator over
+    a large bank. Options are shuffled with quiz_rng(quiz["id"], seed), so
+    the same inputs always produce the same file. The file is replaced
+    atomically. Returns the number of questions written.
+    """
+    rng = quiz_rng(quiz["id"], seed)
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    count = 0
+    with open(tmp, "w") as f:
+        f.write("{\n")
+        for key, value in quiz.items():
+            if key != "questions":
+                f.write(f"  {json.dumps(key)}: {json.dumps(value)},\n")
+        f.write('  "questions": [')
+        for question in build_questions(specs, rng):
+            f.write(",\n    " if count else "\n    ")
+            f.write(json.dumps(question))
+            count += 1
+        f.write("\n  ]\n}\n" if count else "]\n}\n")
+    os.replace(tmp, path)
+    return count
+
+
 if __name__ == "__main__":
     # Test the utilities
     print("Testing shuffle_options:")
@@ -92,3 +170,21 @@ if __name__ == "__main__":
     print(f"  Options: {q['options']}")
     print(f"  Correct index: {q['correct']}")
     print(f"  Correct answer: {q['options'][q['correct']]}")
+
+    print("\nTesting write_quiz (duplicate options, seeded):")
+    import tempfile
+    specs = [
+        {"question": f"Question {i}", "correct": "same", "distractors": ["same", "other", "same"]}
+        for i in range(1000)
+    ]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        outputs = []
+        for _ in range(2):
+            out = Path(tmp_dir) / "demo.json"
+            count = write_quiz(out, {"id": "demo", "lecture": "demo1", "topic": "Demo"}, iter(specs))
+            outputs.append(out.read_bytes())
+        questions = json.loads(outputs[0])["questions"]
+        print(f"  Questions written: {count}")
+        print(f"  Deterministic: {outputs[0] == outputs[1]}")
+        print(f"  Correct index distribution: "
+              f"{[sum(q['correct'] == i for q in questions) for i in range(4)]}")
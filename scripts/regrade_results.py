@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Re-grade stored quiz attempts against the current answer keys.
+Run after correcting a quiz's answers to see (and optionally apply) score changes.
+
+--apply updates the attempts in the results store and rewrites the
+latest-attempt mirror files (<quiz_id>_result.json, next to the store) of
+attempts that changed. Not updated:
+- running server workers, which folded each attempt into their mastery
+  statistics and review schedules when it was recorded; reload them
+  (sudo systemctl reload quiz-server) to rebuild both from the store;
+- review quiz attempts, which keep their original grading;
+- answer exports already taken (scripts/export_results.py --full redoes them).
+
+Usage:
+    python scripts/regrade_results.py                  # report changes for all quizzes
+    python scripts/regrade_results.py --quiz pcv5_dlt  # only one quiz
+    python scripts/regrade_results.py --jobs 8 --apply # re-grade in parallel and save
+"""
+
+import argparse
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).parent.parent / "server"
+sys.path.insert(0, str(SERVER_DIR))
+
+from grading import grade_batch, submission_from_result  # noqa: E402
+from results_store import DEFAULT_USER, ResultsStore  # noqa: E402
+from results_writer import mirror_path, write_atomic  # noqa: E402
+from scheduler import REVIEW_QUIZ_ID  # noqa: E402
+
+# ANSI colors
+RED = "\033[91m"
+GREEN = "\033[92m"
+YELLOW = "\033[93m"
+BOLD = "\033[1m"
+RESET = "\033[0m"
+
+
+def regrade_quiz(args: tuple) -> tuple[str, list[tuple[int, dict, dict, bool]], str | None]:
+    """
+    Re-grade every attempt at one quiz. Returns (quiz_id, [(attempt_id,
+    old_result, new_result, is_users_latest) for changed attempts], error).
+    """
+    quiz_id, data_dir, db_path = args
+    try:
+        with open(data_dir / f"{quiz_id}.json") as f:
+            quiz = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        return quiz_id, [], f"cannot load quiz: {e}"
+
+    attempts = ResultsStore(db_path).attempts(quiz_id)
+    graded = grade_batch(quiz, [submission_from_result(a) for a in attempts])
+    # Attempts are oldest first, so the last one per user is the mirrored one
+    latest = {a.get("user_id", DEFAULT_USER): a["attempt_id"] for a in attempts}
+
+    changes = []
+    for old, new in zip(attempts, graded):
+        attempt_id = old.pop("attempt_id")
+        if new["score"] != old.get("score") or new["answers"] != old.get("answers"):
+            is_latest = latest[old.get("user_id", DEFAULT_USER)] == attempt_id
+            changes.append((attempt_id, old, {**old, **new}, is_latest))
+    return quiz_id, changes, None
+
+
+def rewrite_mirrors(results_dir: Path, results: list[dict]) -> None:
+    """Rewrite the latest-attempt mirror files of re-graded results (as the result writer does)."""
+    for result in results:
+        mirror = {k: v for k, v in result.items() if k != "uid"}
+        write_atomic(mirror_path(results_dir, result.get("user_id", DEFAULT_USER), result["quiz_id"]),
+                     json.dumps(mirror, indent=2).encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-grade stored quiz attempts")
+    parser.add_argument("--data-dir", type=Path, default=SERVER_DIR / "data")
+    parser.add_argument("--db", type=Path, default=SERVER_DIR / "results" / "results.sqlite3")
+    parser.add_argument("--quiz", action="append", help="Only re-grade this quiz (repeatable)")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--apply", action="store_true",
+                        help="Write new scores to the store and its latest-attempt mirror files "
+                             "(reload the server afterwards; review quiz attempts are not re-graded)")
+    args = parser.parse_args()
+
+    if not args.db.exists():
+        print(f"{RED}Error: Results database not found: {args.db}{RESET}")
+        sys.exit(1)
+
+    store = ResultsStore(args.db)
+    # Review quizzes mix questions from several quizzes and have no answer key of their own
+    quiz_ids = sorted(args.quiz or store.completed_quiz_ids(user_id=None) - {REVIEW_QUIZ_ID})
+
+    print(f"{BOLD}Re-grading {len(quiz_ids)} quiz(zes){RESET}")
+    print("=" * 50)
+
+    all_changes = []
+    latest_results = []
+    errors = 0
+    jobs = [(quiz_id, args.data_dir, args.db) for quiz_id in quiz_ids]
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        for quiz_id, changes, error in pool.map(regrade_quiz, jobs):
+            if error:
+                errors += 1
+                print(f"  {RED}•{RESET} {quiz_id}: {error}")
+                continue
+            for attempt_id, old, new, is_latest in changes:
+                delta = new["score"] - old.get("score", 0)
+                color = GREEN if delta > 0 else RED if delta < 0 else YELLOW
+                print(f"  {quiz_id} attempt {attempt_id}: "
+                      f"{old.get('score', 0)}/{old.get('total', 0)} -> "
+                      f"{color}{new['score']}/{new['total']}{RESET}")
+                all_changes.append((attempt_id, new))
+                if is_latest:
+                    latest_results.append(new)
+
+    print()
+    print(f"{len(all_changes)} attempt(s) changed, {errors} quiz(zes) skipped")
+
+    if args.apply and all_changes:
+        store.update_results(all_changes)
+        rewrite_mirrors(args.db.parent, latest_results)
+        print(f"{GREEN}✓ Saved re-graded results ({len(latest_results)} latest-attempt file(s) rewritten){RESET}")
+        print(f"{YELLOW}Reload the server (sudo systemctl reload quiz-server) so its statistics and "
+              f"review schedules use the new scores.{RESET}")
+    elif all_changes:
+        print("Run with --apply to save the new scores.")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,15 @@
 SERVER_USER="your-username"
 SERVER_HOST="your-server.com"
 REMOTE_PATH="/var/www/quizzes/data/"
+# Set to "true" to gracefully restart server workers after syncing
+RELOAD_AFTER_SYNC="false"
+# Set to "true" to compile binary quiz packs (.qzp) before syncing
+COMPILE_PACKS="false"
+# "rsync" copies files over ssh; "ingest" uploads only changed quizzes through
+# the server's /api/ingest as one atomic batch (needs QUIZ_INGEST_TOKEN set
+# here and in the service file). Packs are only transferred by rsync.
+SYNC_METHOD="rsync"
+INGEST_URL="https://your-server.com/quizzes"
 
 # Local paths
 LOCAL_QUIZZES=".cache/web-quizzes/"
@@ -16,6 +25,16 @@ if [ ! -d "$LOCAL_QUIZZES" ]; then
     exit 1
 fi
 
+if [ "$COMPILE_PACKS" = "true" ]; then
+    python3 scripts/validate_quizzes.py --data-dir "$LOCAL_QUIZZES" --incremental --compile > /dev/null \
+        || echo "Warning: some quizzes failed validation and were not packed"
+fi
+
+if [ "$SYNC_METHOD" = "ingest" ]; then
+    python3 scripts/ingest_quizzes.py --url "$INGEST_URL" --data-dir "$LOCAL_QUIZZES" || exit 1
+    exit 0
+fi
+
 # Count files to sync
 FILE_COUNT=$(find "$LOCAL_QUIZZES" -name "*.json" | wc -l | tr -d ' ')
 echo "Syncing $FILE_COUNT quiz file(s) to server..."
@@ -27,6 +46,10 @@ rsync -avz --progress \
 
 if [ $? -eq 0 ]; then
     echo "✓ Quizzes synced successfully!"
+    if [ "$RELOAD_AFTER_SYNC" = "true" ]; then
+        ssh "${SERVER_USER}@${SERVER_HOST}" "sudo systemctl reload quiz-server" \
+            && echo "✓ Server workers reloaded"
+    fi
 else
     echo "✗ Sync failed. Check your connection and credentials."
     exit 1
@@ -6,6 +6,11 @@
 SERVER_USER="your-username"
 SERVER_HOST="your-server.com"
 REMOTE_PATH="/var/www/quizzes/results/"
+# "rsync" copies the whole results directory; "export" downloads only the
+# answers recorded since the last run as NDJSON (scripts/export_results.py;
+# set QUIZ_INGEST_TOKEN to include every student)
+SYNC_METHOD="rsync"
+EXPORT_URL="https://your-server.com/quizzes"
 
 # Local paths
 LOCAL_RESULTS=".cache/quiz-results/"
@@ -13,10 +18,18 @@ LOCAL_RESULTS=".cache/quiz-results/"
 # Ensure local directory exists
 mkdir -p "$LOCAL_RESULTS"
 
+if [ "$SYNC_METHOD" = "export" ]; then
+    SCOPE_ARGS=()
+    [ -n "$QUIZ_INGEST_TOKEN" ] && SCOPE_ARGS=(--scope class)
+    python3 scripts/export_results.py --url "$EXPORT_URL" --out-dir "${LOCAL_RESULTS}export" "${SCOPE_ARGS[@]}" \
+        || exit 1
+    exit 0
+fi
+
 echo "Pulling quiz results from server..."
 
 # Rsync from server
-rsync -avz --progress \
+rsync -avz --progress --exclude "cache/" \
     "${SERVER_USER}@${SERVER_HOST}:${REMOTE_PATH}" \
     "$LOCAL_RESULTS"
 
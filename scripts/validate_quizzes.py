@@ -2,13 +2,28 @@
 """
 Quiz Validation Script
 Validates all quiz JSON files against the expected format for the web app.
+
+Usage:
+    python scripts/validate_quizzes.py                        # validate everything
+    python scripts/validate_quizzes.py --incremental --jobs 8 # only changed files, in parallel
+    python scripts/validate_quizzes.py --json                 # machine-readable report
+    python scripts/validate_quizzes.py --compile              # also write .qzp packs for loadable quizzes
 """
 
+import argparse
+import hashlib
 import json
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import List, Tuple
 
+SERVER_DIR = Path(__file__).parent.parent / "server"
+sys.path.insert(0, str(SERVER_DIR))
+
+from quiz_schema import VALIDATOR  # noqa: E402
+from quizpack import PACK_SUFFIX, fresh_pack_path, pack_path, write_pack  # noqa: E402
+
 # ANSI colors
 RED = "\033[91m"
 GREEN = "\033[92m"
@@ -16,182 +31,197 @@ YELLOW = "\033[93m"
 BOLD = "\033[1m"
 RESET = "\033[0m"
 
-REQUIRED_QUIZ_FIELDS = {"id", "lecture", "topic", "questions"}
-OPTIONAL_QUIZ_FIELDS = {"source_pdf", "created"}
-
-REQUIRED_QUESTION_FIELDS = {"id", "type", "question"}
-OPTIONAL_QUESTION_FIELDS = {"topic", "slide_ref"}
-
-VALID_QUESTION_TYPES = {"multiple_choice", "true_false", "short_answer"}
 
+def validate_quiz(filepath: Path) -> Tuple[bool, bool, List[str], dict]:
+    """
+    Validate a quiz file against QUIZ_SCHEMA (see server/quiz_schema.py).
+    Warnings count as failures here so the CLI stays strict, but a quiz with
+    only warnings is still loadable (the server accepts it).
+    Returns: (is_valid, is_loadable, error_messages, stats_dict)
+    """
+    try:
+        with open(filepath) as f:
+            quiz = json.load(f)
+    except json.JSONDecodeError as e:
+        return False, False, [f"Invalid JSON: {e}"], {"questions": 0, "mc": 0, "tf": 0, "sa": 0}
 
-def validate_question(q: dict, quiz_id: str, q_idx: int) -> List[str]:
-    """Validate a single question. Returns list of error messages."""
-    errors = []
-    prefix = f"Quiz '{quiz_id}', Question {q_idx + 1}"
-
-    # Check required fields
-    for field in REQUIRED_QUESTION_FIELDS:
-        if field not in q:
-            errors.append(f"{prefix}: Missing required field '{field}'")
-
-    if "type" not in q:
-        return errors  # Can't validate further without type
+    problems, stats = VALIDATOR.check(quiz, filepath.stem)
+    errors = [message for _, message in problems]
+    return len(errors) == 0, all(is_warning for is_warning, _ in problems), errors, stats
 
-    q_type = q["type"]
 
-    # Check valid question type
-    if q_type not in VALID_QUESTION_TYPES:
-        errors.append(f"{prefix}: Invalid question type '{q_type}'. Must be one of {VALID_QUESTION_TYPES}")
-        return errors
+def file_digest(filepath: Path) -> str:
+    """SHA-256 of a file's contents."""
+    return hashlib.sha256(filepath.read_bytes()).hexdigest()
 
-    # Type-specific validation
-    if q_type == "multiple_choice":
-        if "options" not in q:
-            errors.append(f"{prefix}: Multiple choice question missing 'options' array")
-        elif not isinstance(q["options"], list):
-            errors.append(f"{prefix}: 'options' must be an array")
-        elif len(q["options"]) < 2:
-            errors.append(f"{prefix}: Multiple choice needs at least 2 options, has {len(q['options'])}")
-        elif len(q["options"]) > 6:
-            errors.append(f"{prefix}: Multiple choice has {len(q['options'])} options (recommend 4)")
 
-        if "correct" not in q:
-            errors.append(f"{prefix}: Multiple choice question missing 'correct' index")
-        elif not isinstance(q["correct"], int):
-            errors.append(f"{prefix}: 'correct' must be an integer index, got {type(q['correct']).__name__}")
-        elif "options" in q and isinstance(q["options"], list):
-            if q["correct"] < 0 or q["correct"] >= len(q["options"]):
-                errors.append(f"{prefix}: 'correct' index {q['correct']} out of range for {len(q['options'])} options")
+def validator_digest() -> str:
+    """Hash of the validation rules; a change invalidates the whole manifest."""
+    digest = hashlib.sha256(Path(__file__).read_bytes())
+    digest.update((SERVER_DIR / "quiz_schema.py").read_bytes())
+    return digest.hexdigest()
 
-    elif q_type == "true_false":
-        if "correct" not in q:
-            errors.append(f"{prefix}: True/false question missing 'correct' value")
-        elif not isinstance(q["correct"], bool):
-            errors.append(f"{prefix}: True/false 'correct' must be boolean, got {type(q['correct']).__name__}")
 
-    elif q_type == "short_answer":
-        if "expected_keywords" not in q:
-            errors.append(f"{prefix}: Short answer question missing 'expected_keywords' array")
-        elif not isinstance(q["expected_keywords"], list):
-            errors.append(f"{prefix}: 'expected_keywords' must be an array")
-        elif len(q["expected_keywords"]) == 0:
-            errors.append(f"{prefix}: 'expected_keywords' is empty")
+def load_manifest(manifest_path: Path) -> dict:
+    """Load the incremental validation manifest, or an empty one if stale/missing."""
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {"validator": validator_digest(), "files": {}}
+    if manifest.get("validator") != validator_digest():
+        return {"validator": validator_digest(), "files": {}}
+    return manifest
 
-    # Check question text is non-empty
-    if "question" in q and (not q["question"] or not q["question"].strip()):
-        errors.append(f"{prefix}: Question text is empty")
 
-    return errors
+def save_manifest(manifest_path: Path, manifest: dict) -> None:
+    """Atomically write the manifest."""
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = manifest_path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f)
+    tmp.replace(manifest_path)
 
 
-def validate_quiz(filepath: Path) -> Tuple[bool, List[str], dict]:
+def validate_files(quiz_files: List[Path], manifest: dict | None, jobs: int) -> Tuple[dict, int]:
     """
-    Validate a quiz file.
-    Returns: (is_valid, error_messages, stats_dict)
+    Validate quiz files, reusing manifest entries for unchanged files.
+    Returns ({filename: {"valid", "loadable", "errors", "stats"}}, number_skipped).
+    The manifest (if given) is updated in place.
     """
-    errors = []
-    stats = {"questions": 0, "mc": 0, "tf": 0, "sa": 0}
-
-    try:
-        with open(filepath) as f:
-            quiz = json.load(f)
-    except json.JSONDecodeError as e:
-        return False, [f"Invalid JSON: {e}"], stats
+    results = {}
+    to_validate = []
+    skipped = 0
+    cached_files = manifest["files"] if manifest is not None else {}
+    fresh_files = {}
 
-    quiz_id = filepath.stem
-
-    # Check required fields
-    for field in REQUIRED_QUIZ_FIELDS:
-        if field not in quiz:
-            errors.append(f"Quiz '{quiz_id}': Missing required field '{field}'")
-
-    # Validate quiz ID matches filename
-    if "id" in quiz and quiz["id"] != quiz_id:
-        errors.append(f"Quiz '{quiz_id}': ID in file ('{quiz['id']}') doesn't match filename")
-
-    # Validate lecture format (should be like 'pcv5', 'pcv15', etc.)
-    if "lecture" in quiz:
-        lecture = quiz["lecture"]
-        if not lecture or not lecture[0].isalpha():
-            errors.append(f"Quiz '{quiz_id}': Invalid lecture format '{lecture}'")
-
-    # Validate questions
-    if "questions" not in quiz:
-        return len(errors) == 0, errors, stats
-
-    questions = quiz["questions"]
-    if not isinstance(questions, list):
-        errors.append(f"Quiz '{quiz_id}': 'questions' must be an array")
-        return False, errors, stats
-
-    stats["questions"] = len(questions)
+    for filepath in quiz_files:
+        st = filepath.stat()
+        cached = cached_files.get(filepath.name)
+        digest = None
+        if cached and (cached["mtime_ns"], cached["size"]) == (st.st_mtime_ns, st.st_size):
+            digest = cached["sha256"]
+        elif cached:
+            digest = file_digest(filepath)
+        if cached and digest == cached["sha256"]:
+            results[filepath.name] = cached["result"]
+            fresh_files[filepath.name] = dict(cached, mtime_ns=st.st_mtime_ns, size=st.st_size)
+            skipped += 1
+        else:
+            to_validate.append((filepath, st, digest))
 
-    if len(questions) == 0:
-        errors.append(f"Quiz '{quiz_id}': No questions in quiz")
-    elif len(questions) < 5:
-        errors.append(f"Quiz '{quiz_id}': Only {len(questions)} questions (recommend 10+)")
+    paths = [filepath for filepath, _, _ in to_validate]
+    if jobs > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            outcomes = list(pool.map(validate_quiz, paths, chunksize=max(1, len(paths) // (jobs * 4))))
+    else:
+        outcomes = [validate_quiz(filepath) for filepath in paths]
 
-    # Check for duplicate question IDs
-    q_ids = [q.get("id") for q in questions if "id" in q]
-    if len(q_ids) != len(set(q_ids)):
-        errors.append(f"Quiz '{quiz_id}': Duplicate question IDs detected")
+    for (filepath, st, digest), (is_valid, is_loadable, errors, stats) in zip(to_validate, outcomes):
+        result = {"valid": is_valid, "loadable": is_loadable, "errors": errors, "stats": stats}
+        results[filepath.name] = result
+        if manifest is not None:
+            fresh_files[filepath.name] = {
+                "mtime_ns": st.st_mtime_ns,
+                "size": st.st_size,
+                "sha256": digest or file_digest(filepath),
+                "result": result,
+            }
 
-    # Validate each question
-    for idx, q in enumerate(questions):
-        q_errors = validate_question(q, quiz_id, idx)
-        errors.extend(q_errors)
+    if manifest is not None:
+        manifest["files"] = fresh_files  # drops entries for deleted files
+    return {name: results[name] for name in sorted(results)}, skipped
 
-        # Count question types
-        q_type = q.get("type", "")
-        if q_type == "multiple_choice":
-            stats["mc"] += 1
-        elif q_type == "true_false":
-            stats["tf"] += 1
-        elif q_type == "short_answer":
-            stats["sa"] += 1
 
-    return len(errors) == 0, errors, stats
+def compile_packs(data_dir: Path, results: dict) -> Tuple[int, int]:
+    """
+    Write a pack for every loadable quiz (no errors; warnings are fine, as
+    on the server) whose pack is missing or stale, and delete packs of
+    unloadable or deleted quizzes so the server never serves them.
+    Returns (packs_written, packs_removed).
+    """
+    written = removed = 0
+    for name, result in results.items():
+        json_path = data_dir / name
+        if result["loadable"]:
+            if fresh_pack_path(json_path) is None:
+                with open(json_path) as f:
+                    write_pack(json.load(f), pack_path(json_path))
+                written += 1
+        elif pack_path(json_path).exists():
+            pack_path(json_path).unlink()
+            removed += 1
+
+    for packed in data_dir.glob(f"*{PACK_SUFFIX}"):
+        if not packed.with_suffix(".json").exists():
+            packed.unlink()
+            removed += 1
+    return written, removed
 
 
 def main():
-    data_dir = Path(__file__).parent.parent / "server" / "data"
+    project_root = SERVER_DIR.parent
+    parser = argparse.ArgumentParser(description="Validate quiz JSON files for the web app")
+    parser.add_argument("--data-dir", type=Path, default=SERVER_DIR / "data")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Skip files unchanged since the last run (content-hash manifest)")
+    parser.add_argument("--manifest", type=Path,
+                        default=project_root / ".cache" / "validation-manifest.json")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Validate changed files across N processes")
+    parser.add_argument("--json", action="store_true", help="Print a machine-readable JSON report")
+    parser.add_argument("--compile", action="store_true",
+                        help="Write binary quiz packs (.qzp) for quizzes without errors (warnings are fine)")
+    args = parser.parse_args()
+
+    data_dir = args.data_dir
 
     if not data_dir.exists():
-        print(f"{RED}Error: Data directory not found: {data_dir}{RESET}")
+        if args.json:
+            print(json.dumps({"error": f"Data directory not found: {data_dir}"}))
+        else:
+            print(f"{RED}Error: Data directory not found: {data_dir}{RESET}")
         sys.exit(1)
 
     quiz_files = sorted(data_dir.glob("*.json"))
 
     if not quiz_files:
-        print(f"{YELLOW}No quiz files found in {data_dir}{RESET}")
+        if args.json:
+            print(json.dumps({"total": 0, "valid": 0, "invalid": 0, "skipped": 0, "files": {}}))
+        else:
+            print(f"{YELLOW}No quiz files found in {data_dir}{RESET}")
         sys.exit(0)
 
+    manifest = load_manifest(args.manifest) if args.incremental else None
+    results, skipped = validate_files(quiz_files, manifest, args.jobs)
+    if manifest is not None:
+        save_manifest(args.manifest, manifest)
+    packs_written, packs_removed = compile_packs(data_dir, results) if args.compile else (0, 0)
+
+    total_quizzes = len(results)
+    valid_quizzes = sum(1 for r in results.values() if r["valid"])
+    total_questions = sum(r["stats"]["questions"] for r in results.values())
+    total_mc = sum(r["stats"]["mc"] for r in results.values())
+    total_tf = sum(r["stats"]["tf"] for r in results.values())
+    total_sa = sum(r["stats"]["sa"] for r in results.values())
+    all_errors = [e for r in results.values() if not r["valid"] for e in r["errors"]]
+
+    if args.json:
+        print(json.dumps({
+            "total": total_quizzes,
+            "valid": valid_quizzes,
+            "invalid": total_quizzes - valid_quizzes,
+            "skipped": skipped,
+            "packs": {"written": packs_written, "removed": packs_removed},
+            "questions": {"total": total_questions, "mc": total_mc, "tf": total_tf, "sa": total_sa},
+            "files": results,
+        }, indent=2))
+        sys.exit(0 if valid_quizzes == total_quizzes else 1)
+
     print(f"{BOLD}Quiz Validation Report{RESET}")
     print("=" * 50)
     print()
 
-    total_quizzes = 0
-    valid_quizzes = 0
-    total_questions = 0
-    total_mc = 0
-    total_tf = 0
-    total_sa = 0
-    all_errors = []
-
-    for filepath in quiz_files:
-        is_valid, errors, stats = validate_quiz(filepath)
-        total_quizzes += 1
-        total_questions += stats["questions"]
-        total_mc += stats["mc"]
-        total_tf += stats["tf"]
-        total_sa += stats["sa"]
-
-        if is_valid:
-            valid_quizzes += 1
-        else:
-            all_errors.extend(errors)
-
     # Summary
     if valid_quizzes == total_quizzes:
         print(f"{GREEN}✓ All {total_quizzes} quizzes are valid!{RESET}")
@@ -202,6 +232,10 @@ def main():
     print(f"{BOLD}Statistics:{RESET}")
     print(f"  Total quizzes:     {total_quizzes}")
     print(f"  Valid quizzes:     {valid_quizzes}")
+    if args.incremental:
+        print(f"  Unchanged:         {skipped} (skipped)")
+    if args.compile:
+        print(f"  Packs written:     {packs_written} ({packs_removed} removed)")
     print(f"  Total questions:   {total_questions}")
     print(f"  Multiple choice:   {total_mc} ({total_mc/total_questions*100:.1f}%)" if total_questions else "")
     print(f"  True/False:        {total_tf} ({total_tf/total_questions*100:.1f}%)" if total_questions else "")
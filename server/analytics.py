@@ -0,0 +1,195 @@
+"""
+Analytics - incrementally maintained mastery statistics over stored results.
+
+Every graded answer carries its topic, slide_ref, correctness and time spent.
+MasteryStats folds each attempt into per-dimension aggregates once, as it is
+recorded, so querying accuracy and median time per topic, slide, lecture or
+course costs the same however many attempts are stored.
+
+ClassStats keeps one MasteryStats for the whole class and one per user.
+
+Aggregates are columnar: each dimension maps a key to a slot, and counters
+live in flat arrays indexed by slot. Median times come from a fixed
+histogram per slot rather than from the raw samples, clamped to the
+smallest and largest time seen.
+"""
+
+import bisect
+import logging
+import threading
+from array import array
+
+from course_index import extract_course
+from results_store import DEFAULT_USER
+
+# Upper bounds (seconds) of the time histogram buckets; the last is open-ended
+TIME_BUCKETS = (1, 2, 3, 5, 8, 12, 20, 30, 45, 60, 90, 120, 180, 300, 600, float("inf"))
+
+DIMENSIONS = ("topic", "slide_ref", "lecture", "course")
+
+log = logging.getLogger(__name__)
+
+
+class Aggregate:
+    """Counters for one dimension, stored column-wise by slot."""
+
+    def __init__(self):
+        self.slots: dict[str, int] = {}
+        self.answered = array("q")
+        self.correct = array("q")
+        self.time_total = array("d")
+        self.time_min = array("d")
+        self.time_max = array("d")
+        self.time_hist = array("q")  # len(slots) x len(TIME_BUCKETS)
+
+    def _slot(self, key: str) -> int:
+        slot = self.slots.get(key)
+        if slot is None:
+            slot = self.slots[key] = len(self.answered)
+            self.answered.append(0)
+            self.correct.append(0)
+            self.time_total.append(0.0)
+            self.time_min.append(float("inf"))
+            self.time_max.append(0.0)
+            self.time_hist.extend([0] * len(TIME_BUCKETS))
+        return slot
+
+    def add(self, key: str, is_correct: bool, time_sec: float) -> None:
+        slot = self._slot(key)
+        self.answered[slot] += 1
+        self.correct[slot] += is_correct
+        self.time_total[slot] += time_sec
+        self.time_min[slot] = min(self.time_min[slot], time_sec)
+        self.time_max[slot] = max(self.time_max[slot], time_sec)
+        self.time_hist[slot * len(TIME_BUCKETS) + bisect.bisect_left(TIME_BUCKETS, time_sec)] += 1
+
+    def median_time(self, slot: int) -> float:
+        """
+        Median time estimated by linear interpolation inside the median
+        bucket, clamped to the observed range (so it never reports a time
+        no answer took, e.g. 0.5 s when every answer took 0 s).
+        """
+        n = self.answered[slot]
+        base = slot * len(TIME_BUCKETS)
+        half = n / 2
+        seen = 0
+        for i, count in enumerate(self.time_hist[base:base + len(TIME_BUCKETS)]):
+            if count and seen + count >= half:
+                lower = TIME_BUCKETS[i - 1] if i else 0
+                upper = TIME_BUCKETS[i]
+                estimate = float(lower) if upper == float("inf") else lower + (upper - lower) * (half - seen) / count
+                return round(min(max(estimate, self.time_min[slot]), self.time_max[slot]), 1)
+            seen += count
+        return 0.0
+
+    def row(self, key: str) -> dict:
+        slot = self.slots[key]
+        answered = self.answered[slot]
+        return {
+            "key": key,
+            "answered": answered,
+            "correct": self.correct[slot],
+            "accuracy": round(self.correct[slot] / answered * 100, 1) if answered else 0.0,
+            "median_time_sec": self.median_time(slot),
+            "mean_time_sec": round(self.time_total[slot] / answered, 1) if answered else 0.0,
+        }
+
+    def rows(self, min_answered: int = 1) -> list[dict]:
+        """All keys with enough answers, weakest (lowest accuracy) first."""
+        rows = [self.row(key) for key, slot in self.slots.items() if self.answered[slot] >= min_answered]
+        rows.sort(key=lambda r: (r["accuracy"], -r["answered"], r["key"]))
+        return rows
+
+
+class MasteryStats:
+    """Per-topic, per-slide, per-lecture and per-course answer statistics."""
+
+    def __init__(self, lectures: dict[str, str] | None = None):
+        self.aggregates = {dim: Aggregate() for dim in DIMENSIONS}
+        self.attempts = 0
+        self.answers = 0
+        # quiz_id -> lecture, for results without one (may be shared)
+        self._lectures = {} if lectures is None else lectures
+        self._lock = threading.Lock()
+
+    def apply_catalog_changes(self, upserted: list[dict], removed: list[str]) -> None:
+        """Catalog listener: remember each quiz's lecture."""
+        with self._lock:
+            for summary in upserted:
+                self._lectures[summary["id"]] = summary["lecture"]
+
+    def add_attempt(self, result: dict) -> None:
+        """Fold one graded attempt into the aggregates."""
+        with self._lock:
+            lecture = result.get("lecture")
+            if not isinstance(lecture, str) or not lecture:
+                lecture = self._lectures.get(result.get("quiz_id"), "Unknown")
+            course = extract_course(lecture)
+            agg = self.aggregates
+            skipped = 0
+            for answer in result.get("answers", []):
+                if answer.get("quiz_id"):
+                    # Review attempts mix questions from several quizzes
+                    lecture = self._lectures.get(answer["quiz_id"], "Unknown")
+                    course = extract_course(lecture)
+                is_correct = bool(answer.get("is_correct"))
+                time_sec = answer.get("time_spent_sec") or 0
+                if not isinstance(time_sec, (int, float)) or time_sec < 0:
+                    time_sec = 0
+                topic = answer.get("topic")
+                if topic and not isinstance(topic, str):
+                    # Results stored before topics were type-checked may hold other values
+                    skipped += 1
+                elif topic:
+                    agg["topic"].add(topic, is_correct, time_sec)
+                if answer.get("slide_ref"):
+                    # Slide numbers repeat across lectures
+                    agg["slide_ref"].add(f"{lecture}: {answer['slide_ref']}", is_correct, time_sec)
+                agg["lecture"].add(lecture, is_correct, time_sec)
+                agg["course"].add(course, is_correct, time_sec)
+                self.answers += 1
+            self.attempts += 1
+        if skipped:
+            log.warning("Left %d answer(s) of attempt on %s out of the topic stats: topic is not a string",
+                        skipped, result.get("quiz_id"))
+
+    def report(self, by: str | None = None, min_answered: int = 1) -> dict:
+        """Stats for one dimension, or all of them."""
+        with self._lock:
+            report = {"attempts": self.attempts, "answers": self.answers}
+            for dim in (by,) if by else DIMENSIONS:
+                report[dim] = self.aggregates[dim].rows(min_answered)
+            return report
+
+
+class ClassStats:
+    """Class-wide MasteryStats plus one per user, sharing the quiz -> lecture map."""
+
+    def __init__(self):
+        self.overall = MasteryStats()
+        self._users: dict[str, MasteryStats] = {}
+        self._lock = threading.Lock()
+
+    def apply_catalog_changes(self, upserted: list[dict], removed: list[str]) -> None:
+        """Catalog listener (the lecture map is shared with every user's stats)."""
+        self.overall.apply_catalog_changes(upserted, removed)
+
+    def _user(self, user_id: str) -> MasteryStats:
+        with self._lock:
+            stats = self._users.get(user_id)
+            if stats is None:
+                stats = self._users[user_id] = MasteryStats(self.overall._lectures)
+            return stats
+
+    def add_attempt(self, result: dict) -> None:
+        """Fold an attempt into the class-wide and its user's statistics."""
+        self.overall.add_attempt(result)
+        self._user(result.get("user_id", DEFAULT_USER)).add_attempt(result)
+
+    def report(self, user_id: str | None, by: str | None = None, min_answered: int = 1) -> dict:
+        """One user's statistics, or the whole class's if user_id is None."""
+        if user_id is None:
+            return self.overall.report(by, min_answered)
+        with self._lock:
+            stats = self._users.get(user_id)
+        return (stats or MasteryStats()).report(by, min_answered)
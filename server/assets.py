@@ -0,0 +1,71 @@
+"""
+Static assets - fingerprinted, precompressed copies of the files in static/.
+
+Each file is read once at startup, hashed and compressed (see
+payloads.compile_payload). Templates link to `<stem>.<hash><suffix>` via
+asset_url(), so those URLs can be cached forever: a changed file gets a new
+URL, and the quiz pages that embed it get a new ETag. Deploying new static
+files therefore needs a worker restart (`systemctl reload quiz-server`).
+"""
+
+import mimetypes
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from payloads import CompiledPayload, compile_payload
+
+FINGERPRINT_LENGTH = 12
+FINGERPRINTED = re.compile(rf"(?P<stem>.+)\.(?P<hash>[0-9a-f]{{{FINGERPRINT_LENGTH}}})(?P<suffix>\.[^.]+)")
+
+
+@dataclass(frozen=True)
+class Asset:
+    """One static file with its fingerprinted name."""
+    name: str
+    url_name: str
+    mimetype: str
+    payload: CompiledPayload
+
+
+class AssetManifest:
+    """Fingerprinted assets for the top-level files of a static directory."""
+
+    def __init__(self, static_dir: Path):
+        self.static_dir = static_dir
+        self._assets: dict[str, Asset] = {}  # file name -> asset
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self) -> None:
+        """(Re)read and compress every static file."""
+        assets = {}
+        for path in sorted(self.static_dir.iterdir()):
+            if not path.is_file() or path.name.startswith("."):
+                continue
+            payload = compile_payload(path.read_bytes())
+            url_name = f"{path.stem}.{payload.etag[:FINGERPRINT_LENGTH]}{path.suffix}"
+            mimetype = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+            assets[path.name] = Asset(name=path.name, url_name=url_name, mimetype=mimetype, payload=payload)
+        with self._lock:
+            self._assets = assets
+
+    def url_name(self, name: str) -> str | None:
+        """Fingerprinted name of a static file, or None if it isn't known."""
+        asset = self._assets.get(name)
+        return asset.url_name if asset else None
+
+    def lookup(self, url_name: str) -> tuple[Asset | None, bool]:
+        """
+        Resolve a fingerprinted name to (asset, fingerprint is current). An
+        outdated fingerprint (e.g. a page cached across a deploy) still gets
+        the current file, just without the far-future caching.
+        """
+        match = FINGERPRINTED.fullmatch(url_name)
+        if not match:
+            return None, False
+        asset = self._assets.get(match["stem"] + match["suffix"])
+        if asset is None:
+            return None, False
+        return asset, asset.url_name == url_name
@@ -0,0 +1,225 @@
+"""
+Quiz catalog - in-memory index of quiz summaries in the data directory.
+
+The catalog keeps one summary per quiz file and only re-parses files whose
+mtime or size changed since the last scan. The listing is kept pre-sorted
+(newest first) so serving it is a list copy rather than a directory scan.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from quizpack import PackError, QuizPack, fresh_pack_path
+
+# Called with (upserted summaries, removed quiz IDs) after each changed refresh
+CatalogListener = Callable[[list[dict], list[str]], None]
+
+# Returns the problems that make a parsed quiz unusable (empty if valid)
+QuizCheck = Callable[[dict, str], list[str]]
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class CatalogEntry:
+    """Stat signature and summary of a single quiz file."""
+    mtime_ns: int
+    size: int
+    summary: dict | None  # None if the file could not be parsed
+
+
+def summarize_quiz(quiz: dict, fallback_id: str) -> dict:
+    """Build the listing summary for a parsed quiz."""
+    return {
+        "id": quiz.get("id", fallback_id),
+        "lecture": quiz.get("lecture", "Unknown"),
+        "topic": quiz.get("topic", "Unknown"),
+        "num_questions": len(quiz.get("questions", [])),
+        "created": quiz.get("created", "Unknown")
+    }
+
+
+class QuizCatalog:
+    """
+    Incrementally refreshed catalog of quiz summaries.
+
+    A full stat pass over the data directory only happens when the directory
+    mtime changes (files added, removed or renamed into place, as rsync does)
+    or when `rescan_interval` seconds have passed, which catches files that
+    were rewritten in place. `scan_lock` is held around each scan, so a
+    writer holding it exclusively (see ingest.py) is never seen half-done.
+
+    Once the catalog has a listing (from a scan or a restored snapshot), a
+    non-forced refresh never waits for a scan running in another thread; the
+    caller serves the current listing instead.
+    """
+
+    def __init__(self, data_dir: Path, rescan_interval: float = 5.0, validate: QuizCheck | None = None,
+                 scan_lock: Callable[[], AbstractContextManager] = nullcontext):
+        self.data_dir = data_dir
+        self.rescan_interval = rescan_interval
+        self.validate = validate
+        self.scan_lock = scan_lock
+        self._entries: dict[str, CatalogEntry] = {}
+        self._sorted: list[dict] = []
+        self._dir_mtime_ns: int | None = None
+        self._last_scan = 0.0
+        self._loaded = False
+        self._listeners: list[CatalogListener] = []
+        self._lock = threading.Lock()
+        self.scans = 0
+        self.disk_reads = 0  # quiz files or packs parsed for their summary
+        self.version = 0  # bumped by every changed refresh or restore
+
+    def _needs_scan(self) -> bool:
+        try:
+            dir_mtime_ns = os.stat(self.data_dir).st_mtime_ns
+        except FileNotFoundError:
+            dir_mtime_ns = None
+        if dir_mtime_ns != self._dir_mtime_ns:
+            return True
+        return time.monotonic() - self._last_scan >= self.rescan_interval
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Bring the catalog up to date with the data directory.
+        Returns True if any summary was added, changed or removed.
+        """
+        if not force and not self._needs_scan():
+            return False
+        if not self._lock.acquire(blocking=force or not self._loaded):
+            return False
+
+        try:
+            if not force and not self._needs_scan():
+                return False
+            upserted: list[dict] = []
+            removed: list[str] = []
+            seen = set()
+            with self.scan_lock():
+                try:
+                    dir_mtime_ns = os.stat(self.data_dir).st_mtime_ns
+                    scanned = list(os.scandir(self.data_dir))
+                except FileNotFoundError:
+                    dir_mtime_ns, scanned = None, []
+                self.scans += 1
+
+                for dirent in scanned:
+                    if not dirent.name.endswith(".json") or not dirent.is_file():
+                        continue
+                    try:
+                        st = dirent.stat()
+                    except FileNotFoundError:
+                        continue
+                    seen.add(dirent.name)
+                    entry = self._entries.get(dirent.name)
+                    if entry and entry.mtime_ns == st.st_mtime_ns and entry.size == st.st_size:
+                        continue
+                    summary = self._read_summary(Path(dirent.path), st.st_mtime_ns)
+                    self._entries[dirent.name] = CatalogEntry(
+                        mtime_ns=st.st_mtime_ns, size=st.st_size, summary=summary
+                    )
+                    if entry and entry.summary and (not summary or summary["id"] != entry.summary["id"]):
+                        removed.append(entry.summary["id"])
+                    if summary:
+                        upserted.append(summary)
+
+            for name in self._entries.keys() - seen:
+                entry = self._entries.pop(name)
+                if entry.summary:
+                    removed.append(entry.summary["id"])
+
+            changed = bool(upserted or removed)
+            if changed:
+                summaries = [e.summary for e in self._entries.values() if e.summary]
+                # Sort by creation date, newest first
+                summaries.sort(key=lambda x: x.get("created", ""), reverse=True)
+                self._sorted = summaries
+
+            self._dir_mtime_ns = dir_mtime_ns
+            self._last_scan = time.monotonic()
+            self._loaded = True
+
+            if changed:
+                self.version += 1
+                for listener in self._listeners:
+                    listener([dict(s) for s in upserted], removed)
+            return changed
+        finally:
+            self._lock.release()
+
+    def snapshot(self) -> dict:
+        """Entries and directory mtime as JSON-serializable state for restore()."""
+        with self._lock:
+            return {
+                "dir_mtime_ns": self._dir_mtime_ns,
+                "entries": {name: [e.mtime_ns, e.size, e.summary] for name, e in self._entries.items()},
+            }
+
+    def restore(self, state: dict) -> None:
+        """
+        Load entries saved by snapshot() in place of a first scan. Listeners
+        subscribed afterwards see the restored listing; files changed since
+        are re-read by the next refresh, like any other change.
+        """
+        entries = {name: CatalogEntry(mtime_ns, size, summary)
+                   for name, (mtime_ns, size, summary) in state["entries"].items()}
+        summaries = [e.summary for e in entries.values() if e.summary]
+        summaries.sort(key=lambda x: x.get("created", ""), reverse=True)
+        with self._lock:
+            self._entries, self._sorted = entries, summaries
+            self._dir_mtime_ns = state["dir_mtime_ns"]
+            self._last_scan = time.monotonic()
+            self._loaded = True
+            self.version += 1
+
+    def subscribe(self, listener: CatalogListener) -> None:
+        """
+        Register a listener for catalog changes. It is called once with the
+        current summaries and then with the delta of every changed refresh.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+            listener([dict(s) for s in self._sorted], [])
+
+    def _read_summary(self, quiz_file: Path, mtime_ns: int) -> dict | None:
+        self.disk_reads += 1
+        # A fresh pack holds the summary in its header area
+        packed = fresh_pack_path(quiz_file, mtime_ns)
+        if packed:
+            try:
+                pack = QuizPack(packed)
+                try:
+                    return pack.summary()
+                finally:
+                    pack.close()
+            except (OSError, PackError, json.JSONDecodeError):
+                pass  # fall back to the JSON
+
+        # Missing, half-written or invalid files are left out of the listing
+        # and retried once their stat changes
+        try:
+            with open(quiz_file) as f:
+                quiz = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        errors = self.validate(quiz, quiz_file.stem) if self.validate else []
+        if errors:
+            log.warning("Rejected %s: %s", quiz_file.name, "; ".join(errors))
+            return None
+        try:
+            return summarize_quiz(quiz, quiz_file.stem)
+        except (AttributeError, TypeError):
+            return None
+
+    def list(self) -> list[dict]:
+        """Return the sorted summaries (copies, safe for callers to mutate)."""
+        self.refresh()
+        return [dict(s) for s in self._sorted]
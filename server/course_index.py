@@ -0,0 +1,158 @@
+"""
+Course index - materialized course -> lecture -> quiz tree for the index page.
+
+The tree is shared by all users and updated in place from catalog deltas;
+sorting only happens for the lecture or course whose membership changed.
+Completion is tracked per user in a UserProgress, whose per-course and
+per-lecture counters are adjusted by +/-1 on submissions and catalog
+changes, so rendering a user's index page never recounts anything.
+"""
+
+import re
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+from results_store import DEFAULT_USER
+
+COURSE_PATTERN = re.compile(r'^([a-zA-Z]+)')
+
+
+def extract_course(lecture: str) -> str:
+    """Extract course code from lecture string (e.g., 'pcv5' -> 'PCV')."""
+    match = COURSE_PATTERN.match(lecture)
+    return match.group(1).upper() if match else "OTHER"
+
+
+class UserProgress:
+    """One user's completed quizzes and completed-quiz counts per course and lecture."""
+
+    def __init__(self):
+        self.completed: set[str] = set()
+        self._counts: dict[tuple[str, str], int] = {}
+
+    def done(self, quiz_id: str) -> bool:
+        return quiz_id in self.completed
+
+    def course(self, name: str) -> int:
+        return self._counts.get(("course", name), 0)
+
+    def lecture(self, name: str) -> int:
+        return self._counts.get(("lecture", name), 0)
+
+    def count(self, lecture: str, delta: int) -> None:
+        for key in (("course", extract_course(lecture)), ("lecture", lecture)):
+            self._counts[key] = self._counts.get(key, 0) + delta
+
+
+class CourseIndex:
+    """
+    Tree of quizzes grouped by course and lecture:
+    {
+        'PCV': {
+            'lectures': {
+                'pcv5': {'name': 'pcv5', 'quizzes': [...], 'total': 3},
+                ...
+            },
+            'total': 10
+        },
+        ...
+    }
+    Courses are sorted alphabetically, lectures by name and quizzes newest first.
+    """
+
+    def __init__(self):
+        self._courses: dict[str, dict] = {}
+        self._quizzes: dict[str, dict] = {}  # quiz_id -> quiz node in the tree
+        self._users: dict[str, UserProgress] = {}
+        self._completers: dict[str, set[str]] = {}  # quiz_id -> users who completed it
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def view(self, user_id: str = DEFAULT_USER) -> Iterator[tuple[dict, UserProgress]]:
+        """Hold the tree stable while the caller reads (e.g. renders) it with a user's progress."""
+        with self._lock:
+            yield self._courses, self._users.get(user_id) or UserProgress()
+
+    def apply_catalog_changes(self, upserted: list[dict], removed: list[str]) -> None:
+        """Catalog listener: add, replace or remove quizzes in the tree."""
+        with self._lock:
+            for quiz_id in removed:
+                self._remove_quiz(quiz_id)
+            for summary in upserted:
+                self._remove_quiz(summary["id"])
+                self._insert_quiz(summary)
+
+    def mark_completed(self, quiz_id: str, user_id: str = DEFAULT_USER) -> None:
+        """Record that a user has completed a quiz and bump their counters."""
+        with self._lock:
+            progress = self._users.get(user_id)
+            if progress is None:
+                progress = self._users[user_id] = UserProgress()
+            if quiz_id in progress.completed:
+                return
+            progress.completed.add(quiz_id)
+            self._completers.setdefault(quiz_id, set()).add(user_id)
+            quiz = self._quizzes.get(quiz_id)
+            if quiz:
+                progress.count(quiz["lecture"], 1)
+
+    def completions(self) -> list[tuple[str, str]]:
+        """Every recorded (quiz_id, user_id) completion."""
+        with self._lock:
+            return [(quiz_id, user_id) for user_id, progress in self._users.items()
+                    for quiz_id in progress.completed]
+
+    def _adjust(self, quiz: dict, total: int) -> None:
+        course = self._courses[extract_course(quiz["lecture"])]
+        lecture = course["lectures"][quiz["lecture"]]
+        for node in (course, lecture):
+            node["total"] += total
+        for user_id in self._completers.get(quiz["id"], ()):
+            self._users[user_id].count(quiz["lecture"], total)
+
+    def _insert_quiz(self, summary: dict) -> None:
+        quiz = dict(summary)
+        course_name = extract_course(quiz["lecture"])
+        lecture_name = quiz["lecture"]
+
+        if course_name not in self._courses:
+            self._courses[course_name] = {"lectures": {}, "total": 0}
+            self._courses = dict(sorted(self._courses.items()))
+        course = self._courses[course_name]
+
+        if lecture_name not in course["lectures"]:
+            course["lectures"][lecture_name] = {
+                "name": lecture_name,
+                "quizzes": [],
+                "total": 0
+            }
+            course["lectures"] = dict(sorted(course["lectures"].items()))
+
+        # Keep the lecture's quizzes newest first (the catalog hands over its
+        # listing newest first, so a bulk load appends without scanning)
+        quizzes = course["lectures"][lecture_name]["quizzes"]
+        created = quiz.get("created", "")
+        if not quizzes or quizzes[-1].get("created", "") >= created:
+            quizzes.append(quiz)
+        else:
+            pos = next((i for i, q in enumerate(quizzes) if q.get("created", "") < created), len(quizzes))
+            quizzes.insert(pos, quiz)
+
+        self._quizzes[quiz["id"]] = quiz
+        self._adjust(quiz, total=1)
+
+    def _remove_quiz(self, quiz_id: str) -> None:
+        quiz = self._quizzes.pop(quiz_id, None)
+        if not quiz:
+            return
+        self._adjust(quiz, total=-1)
+
+        course_name = extract_course(quiz["lecture"])
+        course = self._courses[course_name]
+        lecture = course["lectures"][quiz["lecture"]]
+        lecture["quizzes"] = [q for q in lecture["quizzes"] if q is not quiz]
+        if not lecture["quizzes"]:
+            del course["lectures"][quiz["lecture"]]
+        if not course["lectures"]:
+            del self._courses[course_name]
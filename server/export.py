@@ -0,0 +1,106 @@
+"""
+Results export - one row per answered question, streamed from the results store.
+
+Rows are produced by generators over ResultsStore.iter_attempts, so memory
+use stays flat however many attempts are exported. Each export covers the
+attempts up to a cursor (the newest attempt ID when it started); passing
+that cursor back as `since` exports only what was recorded after it.
+Attempts re-graded after they were exported are not exported again.
+
+NDJSON is always available; Parquet needs the optional `pyarrow` package.
+"""
+
+import json
+from typing import Iterable, Iterator, Mapping
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional: Parquet output
+    pyarrow = None
+
+ANSWER_COLUMNS = (
+    "attempt_id", "user_id", "quiz_id", "lecture", "completed",
+    "question_id", "type", "topic", "slide_ref", "is_correct", "time_spent_sec",
+)
+
+# Parquet rows buffered per row group
+PARQUET_ROW_GROUP = 65536
+
+
+def answer_rows(attempts: Iterable[tuple[int, dict]],
+                lectures: Mapping[str, str] | None = None) -> Iterator[dict]:
+    """
+    Flatten (attempt_id, result) pairs into one row per answer. Review quiz
+    answers carry their source quiz; `lectures` (quiz ID -> lecture) resolves
+    the lecture of those.
+    """
+    for attempt_id, result in attempts:
+        for answer in result.get("answers", []):
+            quiz_id = answer.get("quiz_id", result["quiz_id"])
+            lecture = result.get("lecture", "")
+            if "quiz_id" in answer:
+                lecture = (lectures or {}).get(quiz_id, "")
+            yield {
+                "attempt_id": attempt_id,
+                "user_id": result.get("user_id", ""),
+                "quiz_id": quiz_id,
+                "lecture": lecture,
+                "completed": result.get("completed", ""),
+                "question_id": str(answer.get("question_id", "")),
+                "type": answer.get("type", ""),
+                "topic": answer.get("topic", ""),
+                "slide_ref": answer.get("slide_ref", ""),
+                "is_correct": answer.get("is_correct"),
+                "time_spent_sec": answer.get("time_spent_sec", 0),
+            }
+
+
+def ndjson_chunks(rows: Iterable[dict], chunk_bytes: int = 64 * 1024) -> Iterator[bytes]:
+    """Serialize rows as newline-delimited JSON, in chunks of about `chunk_bytes`."""
+    buffer, size = [], 0
+    for row in rows:
+        line = json.dumps(row, separators=(",", ":")).encode() + b"\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def parquet_schema():
+    return pyarrow.schema([
+        ("attempt_id", pyarrow.int64()),
+        ("user_id", pyarrow.string()),
+        ("quiz_id", pyarrow.string()),
+        ("lecture", pyarrow.string()),
+        ("completed", pyarrow.string()),
+        ("question_id", pyarrow.string()),
+        ("type", pyarrow.string()),
+        ("topic", pyarrow.string()),
+        ("slide_ref", pyarrow.string()),
+        ("is_correct", pyarrow.bool_()),
+        ("time_spent_sec", pyarrow.float64()),
+    ])
+
+
+def write_parquet(rows: Iterable[dict], path, row_group: int = PARQUET_ROW_GROUP) -> int:
+    """Write rows to a Parquet file one row group at a time. Returns the row count."""
+    if pyarrow is None:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    schema = parquet_schema()
+    written = 0
+    with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= row_group:
+                writer.write_table(pyarrow.Table.from_pylist(batch, schema=schema))
+                written += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pyarrow.Table.from_pylist(batch, schema=schema))
+            written += len(batch)
+    return written
@@ -0,0 +1,141 @@
+"""
+Grading engine - scores quiz submissions against a quiz's answer key.
+
+`grade_submission()` scores one submission (used by the submit route);
+`grade_batch()` scores many submissions for the same quiz at once, comparing
+all multiple choice / true-false answers as one array operation. NumPy is
+used for the comparison when installed; otherwise a pure-Python path gives
+identical results.
+"""
+
+from keywords import KeywordMatcher, compile_matchers
+
+try:
+    import numpy as np
+except ImportError:  # optional: only speeds up large batches
+    np = None
+
+CHOICE_TYPES = ("multiple_choice", "true_false")
+
+# Below this many submissions the NumPy setup costs more than it saves
+NUMPY_MIN_BATCH = 32
+
+
+def _encode(value) -> int | None:
+    """Encode a choice answer or key as an int (True/False -> 1/0), None if unusable."""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return None
+
+
+def _choice_correctness(choice_questions: list[dict], submissions: list[dict]) -> list[list[bool]]:
+    """
+    Return a [submission][choice question] matrix of correctness for all
+    multiple choice and true/false questions.
+    """
+    selected = []
+    for sub in submissions:
+        by_id = {a.get("question_id"): a for a in sub.get("answers", [])}
+        selected.append([_encode(by_id.get(q["id"], {}).get("selected")) for q in choice_questions])
+    key = [_encode(q.get("correct")) for q in choice_questions]
+
+    if np is not None and len(submissions) >= NUMPY_MIN_BATCH and choice_questions:
+        sel = np.array([[-1 if v is None else v for v in row] for row in selected], dtype=np.int64)
+        sel_valid = np.array([[v is not None for v in row] for row in selected], dtype=bool)
+        key_arr = np.array([-1 if v is None else v for v in key], dtype=np.int64)
+        key_valid = np.array([v is not None for v in key], dtype=bool)
+        return (sel_valid & key_valid & (sel == key_arr)).tolist()
+
+    return [
+        [s is not None and s == k for s, k in zip(row, key)]
+        for row in selected
+    ]
+
+
+def grade_batch(quiz: dict, submissions: list[dict],
+                matchers: dict[str, KeywordMatcher] | None = None) -> list[dict]:
+    """
+    Grade submissions ({"answers": [...], "total_time_sec": n}) for one quiz.
+    `matchers` are the quiz's compiled keyword matchers (see
+    keywords.compile_matchers); pass cached ones to avoid recompiling.
+    Returns one result per submission with answers, score, total,
+    total_time_sec and percentage.
+    """
+    if matchers is None:
+        matchers = compile_matchers(quiz)
+    questions = quiz.get("questions", [])
+    choice_questions = [q for q in questions if q.get("type") in CHOICE_TYPES]
+    choice_col = {id(q): j for j, q in enumerate(choice_questions)}
+    correctness = _choice_correctness(choice_questions, submissions)
+
+    results = []
+    for row, sub in zip(correctness, submissions):
+        result = {"answers": [], "score": 0, "total": len(questions)}
+        answers_by_id = {a.get("question_id"): a for a in sub.get("answers", [])}
+
+        for q in questions:
+            answer_data = answers_by_id.get(q["id"], {})
+            answer_record = {
+                "question_id": q["id"],
+                "topic": q.get("topic", ""),
+                "slide_ref": q.get("slide_ref", ""),
+                "type": q["type"],
+            }
+
+            if q["type"] in CHOICE_TYPES:
+                answer_record["selected"] = answer_data.get("selected")
+                if q["type"] == "multiple_choice":
+                    answer_record["correct_index"] = q["correct"]
+                else:
+                    answer_record["correct_value"] = q["correct"]
+                answer_record["is_correct"] = row[choice_col[id(q)]]
+                if answer_record["is_correct"]:
+                    result["score"] += 1
+
+            elif q["type"] == "short_answer":
+                text = answer_data.get("text") or ""
+                answer_record["text"] = text
+                keywords = q.get("expected_keywords", [])
+                found = matchers[q["id"]].count(text)
+                answer_record["keywords_found"] = found
+                answer_record["keywords_expected"] = len(keywords)
+                # Partial credit for short answers
+                if keywords and found >= len(keywords) // 2:
+                    result["score"] += 1
+                    answer_record["is_correct"] = found == len(keywords)
+                else:
+                    answer_record["is_correct"] = False
+
+            answer_record["time_spent_sec"] = answer_data.get("time_spent_sec", 0)
+            result["answers"].append(answer_record)
+
+        result["total_time_sec"] = sub.get("total_time_sec", 0)
+        result["percentage"] = round(result["score"] / result["total"] * 100) if result["total"] > 0 else 0
+        results.append(result)
+    return results
+
+
+def grade_submission(quiz: dict, submission: dict,
+                     matchers: dict[str, KeywordMatcher] | None = None) -> dict:
+    """Grade a single submission. See grade_batch()."""
+    return grade_batch(quiz, [submission], matchers)[0]
+
+
+def submission_from_result(result: dict) -> dict:
+    """Rebuild the original submission from a stored result, for re-grading."""
+    return {
+        "answers": [
+            {
+                "question_id": a["question_id"],
+                "selected": a.get("selected"),
+                "text": a.get("text"),
+                "time_spent_sec": a.get("time_spent_sec", 0),
+            }
+            for a in result.get("answers", [])
+        ],
+        "total_time_sec": result.get("total_time_sec", 0),
+    }
@@ -0,0 +1,32 @@
+"""
+Gunicorn configuration for the quiz server.
+
+Run with:
+    ./venv/bin/gunicorn -c gunicorn.conf.py server:app
+
+Each worker keeps its own catalog, quiz cache and course index. These
+revalidate against file mtimes and the shared SQLite results store, so
+workers stay consistent without coordinating. Send SIGHUP (systemctl reload
+quiz-server) after a quiz sync to gracefully replace workers with fresh ones.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get("QUIZ_BIND", "127.0.0.1:5000")
+workers = int(os.environ.get("QUIZ_WORKERS", multiprocessing.cpu_count()))
+threads = int(os.environ.get("QUIZ_THREADS", 4))
+worker_class = "gthread"
+
+# Workers open their own SQLite connections; don't import the app in the master
+preload_app = False
+
+# Replace workers periodically and give in-flight requests time to finish
+max_requests = int(os.environ.get("QUIZ_MAX_REQUESTS", 10000))
+max_requests_jitter = max_requests // 10
+graceful_timeout = 30
+timeout = 30
+
+# Set QUIZ_ACCESS_LOG to an empty string to disable access logging
+accesslog = os.environ.get("QUIZ_ACCESS_LOG", "-") or None
+errorlog = "-"
@@ -0,0 +1,270 @@
+"""
+Quiz ingest - atomic, content-addressed uploads into the data directory.
+
+A sync first sends the SHA-256 of every local quiz file (`plan`); the
+server answers with the quizzes whose content it doesn't have. The sync
+then uploads only those (`apply`). A batch is validated as a whole and
+rejected as a whole. Accepted files are written to temp files, then renamed
+into place together under an exclusive lock on `.ingest.lock`, and the
+generation counter in `.generation` is bumped. Catalog scans hold the same
+lock shared (see QuizCatalog's `scan_lock`), so a listing shows either all
+of a batch or none of it. Unchanged files keep their mtime, so caches in
+every worker only reload the quizzes that actually changed.
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from pathlib import Path
+from typing import IO, Callable, Iterator
+
+from quizpack import pack_path
+
+log = logging.getLogger(__name__)
+
+GENERATION_FILE = ".generation"
+HASHES_FILE = ".ingest-hashes"  # not *.json, so the catalog never lists it
+LOCK_FILE = ".ingest.lock"
+
+# Quiz IDs become file names
+QUIZ_ID_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]{0,127}")
+
+
+class IngestError(ValueError):
+    """A rejected batch, with one message per problem."""
+
+    def __init__(self, errors: list[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+class GenerationConflict(IngestError):
+    """The data directory changed since the plan the batch was built from."""
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 hex digest of a quiz file's bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write_synced(path: Path, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _fsync_dir(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class QuizIngest:
+    """Plans and applies content-addressed quiz batches to a data directory."""
+
+    def __init__(self, data_dir: Path, validate: Callable[[dict, str], list[str]] | None = None,
+                 reserved_ids: frozenset[str] = frozenset()):
+        self.data_dir = data_dir
+        self.validate = validate
+        self.reserved_ids = reserved_ids
+        self._hashes: dict[str, tuple[int, int, str]] = self._load_hashes()  # id -> (mtime_ns, size, sha256)
+        self._thread_lock = threading.Lock()  # flock doesn't exclude threads of one process
+
+    @staticmethod
+    @contextmanager
+    def _flock(lock: IO, operation: int) -> Iterator[None]:
+        with lock:
+            fcntl.flock(lock, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def reading(self) -> AbstractContextManager:
+        """
+        Shared lock: no batch is applied while it is held. Only opens the lock
+        file for reading, so a read-only data directory still works; without
+        one (nothing ingested yet, or unreadable) there is nothing to wait for.
+        """
+        try:
+            lock = open(self.data_dir / LOCK_FILE)
+        except OSError:
+            return nullcontext()
+        return self._flock(lock, fcntl.LOCK_SH)
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        with self._thread_lock, self._flock(open(self.data_dir / LOCK_FILE, "a"), fcntl.LOCK_EX):
+            yield
+
+    def generation(self) -> int:
+        """Number of batches applied to the data directory so far."""
+        try:
+            return int((self.data_dir / GENERATION_FILE).read_text())
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _load_hashes(self) -> dict[str, tuple[int, int, str]]:
+        try:
+            return {k: tuple(v) for k, v in json.loads((self.data_dir / HASHES_FILE).read_text()).items()}
+        except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+            return {}
+
+    def _save_hashes(self) -> None:
+        path = self.data_dir / HASHES_FILE
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self._hashes))
+        os.replace(tmp, path)
+
+    def _manifest(self) -> dict[str, str]:
+        # Hashes are reused while a file's stat is unchanged (rsync'd files included)
+        manifest, changed = {}, False
+        seen = set()
+        for dirent in os.scandir(self.data_dir):
+            if not dirent.name.endswith(".json") or dirent.name.startswith(".") or not dirent.is_file():
+                continue
+            quiz_id = dirent.name[:-len(".json")]
+            seen.add(quiz_id)
+            st = dirent.stat()
+            cached = self._hashes.get(quiz_id)
+            if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+                manifest[quiz_id] = cached[2]
+                continue
+            try:
+                digest = content_hash(Path(dirent.path).read_bytes())
+            except FileNotFoundError:
+                continue
+            self._hashes[quiz_id] = (st.st_mtime_ns, st.st_size, digest)
+            manifest[quiz_id] = digest
+            changed = True
+        for quiz_id in self._hashes.keys() - seen:
+            del self._hashes[quiz_id]
+            changed = True
+        if changed:
+            self._save_hashes()
+        return manifest
+
+    def manifest(self) -> dict[str, str]:
+        """SHA-256 of every quiz file, keyed by quiz ID."""
+        with self._thread_lock, self.reading():
+            return self._manifest()
+
+    def plan(self, client_manifest: dict[str, str], prune: bool = False) -> dict:
+        """
+        Compare a client's {quiz_id: sha256} with the data directory. Returns
+        the current generation, the IDs to upload and, with `prune`, the IDs
+        the client no longer has.
+        """
+        server_manifest = self.manifest()
+        return {
+            "generation": self.generation(),
+            "upload": sorted(q for q, digest in client_manifest.items() if server_manifest.get(q) != digest),
+            "delete": sorted(server_manifest.keys() - client_manifest.keys()) if prune else [],
+        }
+
+    def _check_id(self, quiz_id, errors: list[str]) -> bool:
+        if not isinstance(quiz_id, str) or not QUIZ_ID_PATTERN.fullmatch(quiz_id):
+            errors.append(f"Invalid quiz ID {quiz_id!r}")
+            return False
+        if quiz_id in self.reserved_ids:
+            errors.append(f"Quiz ID '{quiz_id}' is reserved")
+            return False
+        return True
+
+    def _prepare(self, upserts: list[dict], deletes: list[str]) -> dict[str, bytes]:
+        """Validate a batch. Returns {quiz_id: file bytes} or raises IngestError."""
+        errors: list[str] = []
+        files: dict[str, bytes] = {}
+        for item in upserts:
+            quiz_id = item.get("id") if isinstance(item, dict) else None
+            if not self._check_id(quiz_id, errors):
+                continue
+            if quiz_id in files:
+                errors.append(f"Quiz '{quiz_id}' appears more than once")
+                continue
+            content = item.get("content")
+            if not isinstance(content, str):
+                errors.append(f"Quiz '{quiz_id}': 'content' must be the quiz file as a string")
+                continue
+            data = content.encode()
+            if item.get("sha256") and item["sha256"] != content_hash(data):
+                errors.append(f"Quiz '{quiz_id}': content doesn't match its sha256")
+                continue
+            try:
+                quiz = json.loads(data)
+            except json.JSONDecodeError as e:
+                errors.append(f"Quiz '{quiz_id}': Invalid JSON: {e}")
+                continue
+            problems = self.validate(quiz, quiz_id) if self.validate else []
+            if problems:
+                errors.extend(problems)
+                continue
+            files[quiz_id] = data
+        for quiz_id in deletes:
+            if self._check_id(quiz_id, errors) and quiz_id in files:
+                errors.append(f"Quiz '{quiz_id}' is both uploaded and deleted")
+        if errors:
+            raise IngestError(errors)
+        return files
+
+    def apply(self, upserts: list[dict], deletes: list[str] = (), base_generation: int | None = None) -> dict:
+        """
+        Atomically publish a batch: upserts are {"id", "content", "sha256"}
+        with `content` the quiz file's text. With `base_generation`, the batch
+        is refused (GenerationConflict) if another batch was applied since.
+        Returns the new generation and the upserted, deleted and unchanged IDs.
+        """
+        files = self._prepare(upserts, list(deletes))
+        with self._writing():
+            generation = self.generation()
+            if base_generation is not None and base_generation != generation:
+                raise GenerationConflict([f"Data changed since generation {base_generation} "
+                                          f"(now {generation}); plan again"])
+            current = self._manifest()
+            changed = {q: data for q, data in files.items() if current.get(q) != content_hash(data)}
+            removed = [q for q in deletes if q in current]
+            result = {"generation": generation, "upserted": sorted(changed), "deleted": sorted(removed),
+                      "unchanged": sorted(files.keys() - changed.keys())}
+            if not changed and not removed:
+                return result
+
+            staged: list[tuple[Path, Path]] = []
+            try:
+                for quiz_id, data in changed.items():
+                    final = self.data_dir / f"{quiz_id}.json"
+                    tmp = self.data_dir / f".{quiz_id}.json.{os.getpid()}.ingest"
+                    _write_synced(tmp, data)
+                    staged.append((tmp, final))
+            except OSError:
+                for tmp, _ in staged:
+                    tmp.unlink(missing_ok=True)
+                raise
+
+            # Point of no return: rename the whole batch into place
+            for tmp, final in staged:
+                os.replace(tmp, final)
+            for quiz_id in removed:
+                (self.data_dir / f"{quiz_id}.json").unlink(missing_ok=True)
+                # A pack would be ignored anyway (older than any new JSON), but don't leave it behind
+                pack_path(self.data_dir / f"{quiz_id}.json").unlink(missing_ok=True)
+            result["generation"] = generation + 1
+            _write_synced(self.data_dir / f"{GENERATION_FILE}.tmp", str(generation + 1).encode())
+            os.replace(self.data_dir / f"{GENERATION_FILE}.tmp", self.data_dir / GENERATION_FILE)
+            _fsync_dir(self.data_dir)
+
+            for quiz_id, data in changed.items():
+                st = os.stat(self.data_dir / f"{quiz_id}.json")
+                self._hashes[quiz_id] = (st.st_mtime_ns, st.st_size, content_hash(data))
+            for quiz_id in removed:
+                self._hashes.pop(quiz_id, None)
+            self._save_hashes()
+        log.info("Ingested generation %d: %d upserted, %d deleted", generation + 1, len(changed), len(removed))
+        return result
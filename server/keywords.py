@@ -0,0 +1,65 @@
+"""
+Keyword matching for short answer grading.
+
+Each question's `expected_keywords` are compiled once into a single regex
+that is run over the normalized answer in one pass. Matching is
+case-insensitive, treats hyphens/underscores/runs of whitespace alike, and
+requires a keyword to start at a word boundary ("rank" doesn't match
+"frank") while still allowing suffixes ("homograph" matches "homographies").
+"""
+
+import re
+import unicodedata
+
+_SEPARATORS = re.compile(r"[\s_\-]+")
+
+
+def normalize(text: str) -> str:
+    """Case-fold and canonicalize text for keyword matching."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return _SEPARATORS.sub(" ", text).strip()
+
+
+class KeywordMatcher:
+    """Compiled matcher for one question's expected keywords."""
+
+    def __init__(self, keywords: list[str]):
+        self.expected = len(keywords)
+        # Duplicate keywords count once per occurrence in the list, as before
+        self._weights: dict[str, int] = {}
+        for kw in keywords:
+            norm = normalize(kw)
+            self._weights[norm] = self._weights.get(norm, 0) + 1
+        self._always = self._weights.get("", 0)  # empty keywords match anything
+
+        unique = sorted((k for k in self._weights if k), key=len, reverse=True)
+        # A zero-width lookahead is tried at every position, so keywords that
+        # start inside another keyword's match are still found. Alternatives
+        # are longest first; shorter keywords matching at the same position
+        # are necessarily prefixes of the longest and credited via _prefixes.
+        alternatives = "|".join(
+            (r"(?<!\w)" if re.match(r"\w", kw) else "") + re.escape(kw) for kw in unique
+        )
+        self._pattern = re.compile(f"(?=({alternatives}))") if unique else None
+        self._prefixes = {
+            kw: [other for other in unique if kw.startswith(other)]
+            for kw in unique
+        }
+
+    def count(self, text: str) -> int:
+        """Return how many expected keywords appear in text."""
+        if not self._pattern:
+            return self._always
+        found = set()
+        for match in self._pattern.finditer(normalize(text)):
+            found.update(self._prefixes[match.group(1)])
+        return self._always + sum(self._weights[kw] for kw in found)
+
+
+def compile_matchers(quiz: dict) -> dict[str, KeywordMatcher]:
+    """Compile matchers for every short answer question, keyed by question ID."""
+    return {
+        q["id"]: KeywordMatcher(q.get("expected_keywords", []))
+        for q in quiz.get("questions", [])
+        if q.get("type") == "short_answer"
+    }
@@ -0,0 +1,236 @@
+"""
+Metrics - request and operation timings in Prometheus text format.
+
+MetricsRegistry holds counters and latency histograms for one process.
+Component counters (cache hits, disk reads, queue depth, ...) are pulled
+from collectors when a snapshot is taken. Under gunicorn every worker
+writes its snapshot to a shared directory every few seconds (see
+SnapshotExporter), and /metrics merges the snapshots of all live workers,
+so a scrape reports the whole server whichever worker answers it.
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+log = logging.getLogger(__name__)
+
+# Latency bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# A collector returns (name, labels, value, kind) samples, kind "counter" or "gauge"
+Collector = Callable[[], list[tuple[str, dict, float, str]]]
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (not thread-safe; guarded by its owner)."""
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+class MetricsRegistry:
+    """Counters and histograms for one process, plus pulled component samples."""
+
+    def __init__(self):
+        self._counters: dict[tuple[str, tuple], float] = {}
+        self._histograms: dict[tuple[str, tuple], Histogram] = {}
+        self._collectors: list[Collector] = []
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, _key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        key = (name, _key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Observe the duration of a with-block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def add_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def snapshot(self) -> dict:
+        """JSON-serializable copy of every metric, including collected samples."""
+        samples = []
+        for collector in self._collectors:
+            try:
+                samples.extend(collector())
+            except Exception:
+                log.exception("Metrics collector failed")
+        with self._lock:
+            return {
+                "counters": [[name, dict(labels), value] for (name, labels), value in self._counters.items()],
+                "histograms": [
+                    [name, dict(labels), list(h.buckets), list(h.counts), h.sum, h.count]
+                    for (name, labels), h in self._histograms.items()
+                ],
+                "samples": [[name, labels, value, kind] for name, labels, value, kind in samples],
+            }
+
+
+def merge(snapshots: list[dict]) -> dict:
+    """Sum snapshots from several processes."""
+    counters: dict[tuple, float] = {}
+    samples: dict[tuple, tuple[float, str]] = {}
+    histograms: dict[tuple, list] = {}
+    for snap in snapshots:
+        for name, labels, value in snap["counters"]:
+            key = (name, _key(labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, value, kind in snap["samples"]:
+            key = (name, _key(labels))
+            samples[key] = (samples.get(key, (0, kind))[0] + value, kind)
+        for name, labels, buckets, counts, total, count in snap["histograms"]:
+            key = (name, _key(labels))
+            merged = histograms.get(key)
+            if merged is None or merged[0] != buckets:
+                histograms[key] = [buckets, list(counts), total, count]
+            else:
+                merged[1] = [a + b for a, b in zip(merged[1], counts)]
+                merged[2] += total
+                merged[3] += count
+    return {
+        "counters": [[name, dict(labels), value] for (name, labels), value in counters.items()],
+        "histograms": [[name, dict(labels), *h] for (name, labels), h in histograms.items()],
+        "samples": [[name, dict(labels), value, kind] for (name, labels), (value, kind) in samples.items()],
+    }
+
+
+def _labels(labels: dict, **extra) -> str:
+    items = {**labels, **extra}
+    if not items:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in items.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(items, escaped)) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def render(snapshot: dict, help_text: dict[str, str] | None = None) -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    help_text = help_text or {}
+    # name -> (type, [(label key, lines of one series)])
+    families: dict[str, tuple[str, list[tuple[tuple, list[str]]]]] = {}
+
+    def series(name: str, kind: str, labels: dict, lines: list[str]) -> None:
+        families.setdefault(name, (kind, []))[1].append((_key(labels), lines))
+
+    for name, labels, value in snapshot["counters"]:
+        series(name, "counter", labels, [f"{name}{_labels(labels)} {_number(value)}"])
+    for name, labels, value, kind in snapshot["samples"]:
+        series(name, kind, labels, [f"{name}{_labels(labels)} {_number(value)}"])
+    for name, labels, buckets, counts, total, count in snapshot["histograms"]:
+        lines = []
+        cumulative = 0
+        for bound, n in zip([*buckets, "+Inf"], counts):
+            cumulative += n
+            lines.append(f"{name}_bucket{_labels(labels, le=bound)} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+        lines.append(f"{name}_count{_labels(labels)} {count}")
+        series(name, "histogram", labels, lines)
+
+    out = []
+    for name in sorted(families):
+        kind, members = families[name]
+        if name in help_text:
+            out.append(f"# HELP {name} {help_text[name]}")
+        out.append(f"# TYPE {name} {kind}")
+        for _, lines in sorted(members, key=lambda m: m[0]):
+            out.extend(lines)
+    return "\n".join(out) + "\n"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SnapshotExporter:
+    """Periodically writes this process's snapshot to `<directory>/<pid>.json`."""
+
+    def __init__(self, registry: MetricsRegistry, directory: Path, interval: float = 5.0):
+        self.registry = registry
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.interval = interval
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        (self.directory / f"{os.getpid()}.json").unlink(missing_ok=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError:
+                log.exception("Failed to write metrics snapshot")
+
+    def write(self) -> dict:
+        """Write and return this process's current snapshot."""
+        snapshot = self.registry.snapshot()
+        path = self.directory / f"{os.getpid()}.json"
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_text(json.dumps(snapshot))
+        os.replace(tmp, path)
+        return snapshot
+
+    def collect(self) -> dict:
+        """Merged snapshot of every live process (this one freshly taken)."""
+        snapshots = [self.write()]
+        for path in self.directory.glob("*.json"):
+            pid = int(path.stem) if path.stem.isdigit() else None
+            if pid is None or pid == os.getpid():
+                continue
+            if not _pid_alive(pid):
+                path.unlink(missing_ok=True)
+                continue
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, json.JSONDecodeError):
+                continue
+        return merge(snapshots)
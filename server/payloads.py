@@ -0,0 +1,125 @@
+"""
+Client payloads - answer-free representations of a quiz.
+
+These are built once per quiz version (see CachedQuiz.derive) and kept
+together with their serialized bytes, gzip/brotli encodings and a strong
+ETag, so repeat requests only cost a cache lookup and, for revisiting
+clients, a 304.
+"""
+
+import gzip
+import hashlib
+import json
+from dataclasses import dataclass, field
+
+from werkzeug.datastructures import Accept
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+# Question fields that reveal the answer and must never reach the client
+ANSWER_FIELDS = ("correct", "expected_keywords")
+
+# Fields of a stored attempt, and of each of its answers, that may be served
+# back to the client (the stored answers also carry the answer key)
+ATTEMPT_FIELDS = ("attempt_id", "quiz_id", "lecture", "completed", "score", "total", "percentage",
+                  "total_time_sec")
+ATTEMPT_ANSWER_FIELDS = ("question_id", "quiz_id", "type", "topic", "slide_ref", "selected", "text",
+                         "is_correct", "keywords_found", "keywords_expected", "time_spent_sec")
+
+
+# Bodies smaller than this aren't worth compressing
+MIN_COMPRESS_BYTES = 512
+
+
+@dataclass(frozen=True)
+class CompiledPayload:
+    """Serialized response body, its strong ETag and precompressed encodings."""
+    body: bytes
+    etag: str
+    encodings: dict[str, bytes] = field(default_factory=dict)  # "br"/"gzip" -> body
+
+    @property
+    def nbytes(self) -> int:
+        """Body plus encodings, as counted by the quiz cache."""
+        return len(self.body) + sum(map(len, self.encodings.values()))
+
+    def negotiate(self, accepted: Accept) -> tuple[str | None, bytes]:
+        """
+        Pick the encoding with the highest q-value the client accepts (q=0
+        refuses it), the smaller one on ties: (encoding or None, bytes).
+        """
+        best, best_quality = None, 0
+        for encoding in ("br", "gzip"):  # smallest first
+            quality = accepted.quality(encoding)
+            if encoding in self.encodings and quality > best_quality:
+                best, best_quality = encoding, quality
+        return best, self.encodings[best] if best else self.body
+
+
+def compress(body: bytes) -> dict[str, bytes]:
+    """Brotli (if installed) and gzip encodings of body, keeping only those that are smaller."""
+    if len(body) < MIN_COMPRESS_BYTES:
+        return {}
+    encodings = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encodings["br"] = brotli.compress(body, quality=11)
+    return {name: data for name, data in encodings.items() if len(data) < len(body)}
+
+
+def compile_payload(body: bytes) -> CompiledPayload:
+    """Wrap response bytes with a content-derived ETag and compressed encodings."""
+    return CompiledPayload(body=body, etag=hashlib.sha256(body).hexdigest()[:32], encodings=compress(body))
+
+
+def compile_json(obj) -> CompiledPayload:
+    """Serialize an object compactly and wrap it with its ETag."""
+    return compile_payload(json.dumps(obj, separators=(",", ":")).encode())
+
+
+def client_quiz(quiz: dict) -> dict:
+    """Minimal quiz representation embedded in the quiz-taking page."""
+    client = {
+        "id": quiz["id"],
+        "lecture": quiz.get("lecture", ""),
+        "topic": quiz.get("topic", ""),
+        "questions": []
+    }
+    for q in quiz.get("questions", []):
+        client_q = {
+            "id": q["id"],
+            "type": q["type"],
+            "question": q["question"],
+            "topic": q.get("topic", ""),
+        }
+        if q["type"] == "multiple_choice":
+            client_q["options"] = q["options"]
+        client["questions"].append(client_q)
+    return client
+
+
+def public_attempt(result: dict) -> dict:
+    """A stored attempt without its answer key (whitelisted fields only)."""
+    attempt = {k: result[k] for k in ATTEMPT_FIELDS if k in result}
+    attempt["answers"] = [
+        {k: answer[k] for k in ATTEMPT_ANSWER_FIELDS if k in answer}
+        for answer in result.get("answers", []) if isinstance(answer, dict)
+    ]
+    return attempt
+
+
+def public_quiz(entry) -> dict:
+    """Answer-free quiz for a cache entry; packed quizzes never load their answer key."""
+    return entry.pack.public_quiz() if entry.pack else api_quiz(entry.quiz)
+
+
+def api_quiz(quiz: dict) -> dict:
+    """Full quiz with answer fields removed, as served by the JSON API."""
+    stripped = dict(quiz)
+    stripped["questions"] = [
+        {k: v for k, v in q.items() if k not in ANSWER_FIELDS}
+        for q in quiz.get("questions", [])
+    ]
+    return stripped
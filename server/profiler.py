@@ -0,0 +1,83 @@
+"""
+Profiler - opt-in sampling profiler for slow requests.
+
+A background thread samples the stacks of the threads that are handling
+requests (sys._current_frames) every `interval` seconds. When a request
+finishes slower than the threshold, its samples are written as collapsed
+stacks ("frame;frame;frame count" lines), which flamegraph.pl, speedscope
+and inferno read directly. Requests that finish in time just drop their
+samples, so the steady-state cost is the sampling thread alone.
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class SlowRequestProfiler:
+    """Samples request threads and dumps collapsed stacks of slow requests."""
+
+    def __init__(self, out_dir: Path, threshold: float, interval: float = 0.005, keep: int = 200):
+        self.out_dir = out_dir
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.threshold = threshold
+        self.interval = interval
+        self.keep = keep
+        self._active: dict[int, Counter] = {}  # thread ident -> stack samples
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.profiles_written = 0
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for ident, samples in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is None or ident == own:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(_frame_label(frame))
+                        frame = frame.f_back
+                    samples[";".join(reversed(stack))] += 1
+
+    def begin(self) -> None:
+        """Start sampling the calling (request) thread."""
+        with self._lock:
+            self._active[threading.get_ident()] = Counter()
+
+    def end(self, duration: float, label: str) -> Path | None:
+        """Stop sampling the calling thread; write its profile if the request was slow."""
+        with self._lock:
+            samples = self._active.pop(threading.get_ident(), None)
+        if not samples or duration < self.threshold:
+            return None
+        safe_label = re.sub(r"[^A-Za-z0-9_.-]+", "_", label).strip("_")[:80]
+        path = self.out_dir / f"{time.strftime('%Y%m%d-%H%M%S')}-{duration * 1000:.0f}ms-{safe_label}.folded"
+        path.write_text("".join(f"{stack} {count}\n" for stack, count in samples.most_common()))
+        self.profiles_written += 1
+        self._prune()
+        return path
+
+    def _prune(self) -> None:
+        profiles = sorted(self.out_dir.glob("*.folded"), key=lambda p: p.stat().st_mtime)
+        for old in profiles[:-self.keep]:
+            old.unlink(missing_ok=True)
@@ -0,0 +1,209 @@
+"""
+Quiz cache - bounded LRU cache of parsed quiz files.
+
+Entries are keyed by quiz ID and validated against the file's mtime and size
+on every lookup, so a sync that rewrites a quiz is picked up on the next
+request. The cache is bounded by the total on-disk size of the cached files
+plus the artifacts derived from them (rendered pages, compressed payloads,
+matchers; see artifact_size).
+Quizzes with a fresh pack (see quizpack.py) are loaded from the pack instead.
+
+Cached quizzes are shared between requests and must be treated as read-only;
+callers that need to drop fields (e.g. correct answers) build a new dict.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Callable
+
+from quizpack import PackError, QuizPack, fresh_pack_path
+
+log = logging.getLogger(__name__)
+
+
+def artifact_size(value, quiz_size: int) -> int:
+    """
+    Bytes a derived artifact counts against the cache: exact for serialized
+    payloads (anything with `nbytes`), otherwise the quiz's on-disk size,
+    which is what the parsed quiz itself is counted as.
+    """
+    nbytes = getattr(value, "nbytes", None)
+    return nbytes if isinstance(nbytes, int) else quiz_size
+
+
+@dataclass
+class CachedQuiz:
+    """
+    One version of a quiz, backed by either its parsed JSON or its pack.
+    Packed quizzes only deserialize the answer key when `quiz` is accessed.
+    """
+    mtime_ns: int
+    size: int
+    full: dict | None = None  # parsed quiz including answers
+    pack: QuizPack | None = None
+    derived: dict = field(default_factory=dict)  # per-version artifacts
+    nbytes: int = 0  # size plus derived artifacts, while counted by a cache
+    on_derive: Callable[["CachedQuiz", int], None] | None = field(default=None, repr=False)
+
+    @property
+    def quiz(self) -> dict:
+        """The full quiz, answers included (shared; don't mutate)."""
+        if self.full is None:
+            self.full = self.pack.quiz()
+        return self.full
+
+    def derive(self, key, build):
+        """
+        Return the artifact stored under `key`, building it with
+        build(entry) on first use. Artifacts live as long as this version
+        of the quiz does, and count towards the cache's byte limit.
+        """
+        value = self.derived.get(key)
+        if value is None:
+            built = build(self)
+            value = self.derived.setdefault(key, built)
+            if value is built and self.on_derive:
+                self.on_derive(self, artifact_size(built, self.size))
+        return value
+
+
+class QuizCache:
+    """Size-aware LRU cache of parsed quizzes with hit/miss/eviction/disk-read counters."""
+
+    def __init__(self, data_dir: Path, max_bytes: int = 64 * 1024 * 1024,
+                 validate: Callable[[dict, str], list[str]] | None = None):
+        self.data_dir = data_dir
+        self.max_bytes = max_bytes
+        self.validate = validate
+        self._entries: OrderedDict[str, CachedQuiz] = OrderedDict()
+        self._rejected: dict[str, tuple[int, int]] = {}  # quiz_id -> stat of invalid file
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_reads = 0  # quiz files or packs opened
+
+    def get_entry(self, quiz_id: str) -> CachedQuiz | None:
+        """Return the cache entry for a quiz, loading it if missing or stale."""
+        quiz_file = self.data_dir / f"{quiz_id}.json"
+        try:
+            st = os.stat(quiz_file)
+        except FileNotFoundError:
+            self.invalidate(quiz_id)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(quiz_id)
+            if entry and entry.mtime_ns == st.st_mtime_ns and entry.size == st.st_size:
+                self._entries.move_to_end(quiz_id)
+                self.hits += 1
+                return entry
+            if self._rejected.get(quiz_id) == (st.st_mtime_ns, st.st_size):
+                return None
+            self.misses += 1
+
+        entry = self._load_pack(quiz_file, st) or self._load_json(quiz_id, quiz_file, st)
+        if entry is None:
+            return None
+        with self._lock:
+            self._remove(quiz_id)
+            self._rejected.pop(quiz_id, None)
+            if entry.size <= self.max_bytes:
+                self._entries[quiz_id] = entry
+                entry.nbytes = entry.size
+                entry.on_derive = partial(self._grow, quiz_id)
+                self._bytes += entry.size
+                self._evict()
+        return entry
+
+    def _grow(self, quiz_id: str, entry: CachedQuiz, nbytes: int) -> None:
+        """Count an artifact derived from a cached entry, evicting as needed."""
+        with self._lock:
+            if self._entries.get(quiz_id) is not entry:
+                return  # already evicted or replaced
+            entry.nbytes += nbytes
+            self._bytes += nbytes
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until within max_bytes (lock held)."""
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def _load_pack(self, quiz_file: Path, st: os.stat_result) -> CachedQuiz | None:
+        # Packs are compiled from validated quizzes, so they skip validation
+        packed = fresh_pack_path(quiz_file, st.st_mtime_ns)
+        if not packed:
+            return None
+        self.disk_reads += 1
+        try:
+            pack = QuizPack(packed)
+        except (OSError, PackError) as e:
+            log.warning("Ignoring pack %s: %s", packed.name, e)
+            return None
+        return CachedQuiz(mtime_ns=st.st_mtime_ns, size=st.st_size, pack=pack)
+
+    def _load_json(self, quiz_id: str, quiz_file: Path, st: os.stat_result) -> CachedQuiz | None:
+        self.disk_reads += 1
+        try:
+            with open(quiz_file) as f:
+                quiz = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        errors = self.validate(quiz, quiz_id) if self.validate else []
+        if errors:
+            log.warning("Rejected %s: %s", quiz_file.name, "; ".join(errors))
+            with self._lock:
+                self._rejected[quiz_id] = (st.st_mtime_ns, st.st_size)
+            return None
+        return CachedQuiz(mtime_ns=st.st_mtime_ns, size=st.st_size, full=quiz)
+
+    def read(self, quiz_id: str) -> CachedQuiz | None:
+        """
+        Like get_entry, but a quiz that isn't cached is loaded without being
+        added, so bulk readers (e.g. the search index) don't evict hot quizzes.
+        """
+        quiz_file = self.data_dir / f"{quiz_id}.json"
+        try:
+            st = os.stat(quiz_file)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            entry = self._entries.get(quiz_id)
+            if entry and entry.mtime_ns == st.st_mtime_ns and entry.size == st.st_size:
+                return entry
+        return self._load_pack(quiz_file, st) or self._load_json(quiz_id, quiz_file, st)
+
+    def _remove(self, quiz_id: str) -> None:
+        entry = self._entries.pop(quiz_id, None)
+        if entry:
+            self._bytes -= entry.nbytes
+
+    def invalidate(self, quiz_id: str) -> None:
+        """Drop a quiz from the cache."""
+        with self._lock:
+            self._remove(quiz_id)
+            self._rejected.pop(quiz_id, None)
+
+    def stats(self) -> dict:
+        """Return cache counters."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_reads": self.disk_reads,
+            }
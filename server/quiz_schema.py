@@ -0,0 +1,276 @@
+"""
+Quiz schema - declarative description of a valid quiz, compiled into validators.
+
+QUIZ_SCHEMA is the single source of truth for quiz validation. It is used by
+scripts/validate_quizzes.py and by the server when quizzes are loaded into
+the catalog and cache, so malformed files are rejected once on ingest rather
+than failing inside request handlers.
+
+Problems come in two severities: errors make a quiz unusable; warnings
+("recommend ...") are style issues the CLI reports but the server accepts.
+"""
+
+from typing import Callable
+
+QUIZ_SCHEMA = {
+    "quiz": {
+        "required": ("id", "lecture", "topic", "questions"),
+        "optional": ("source_pdf", "created"),
+        # Must be strings when present (listings sort and group by them)
+        "strings": ("lecture", "topic", "created"),
+        "recommended_min_questions": 5,
+    },
+    "question": {
+        "required": ("id", "type", "question"),
+        "optional": ("topic", "slide_ref"),
+        # Must be strings when present (stats and exports key answers by them)
+        "strings": ("topic", "slide_ref"),
+    },
+    # Type-specific fields, checked in order
+    "types": {
+        "multiple_choice": (
+            {
+                "field": "options", "kind": "array", "items": "string", "min_items": 2,
+                "recommended_max_items": 6,
+                "missing": "Multiple choice question missing 'options' array",
+                "too_few": "Multiple choice needs at least {min} options, has {n}",
+                "too_many": "Multiple choice has {n} options (recommend 4)",
+            },
+            {
+                "field": "correct", "kind": "index", "into": "options",
+                "missing": "Multiple choice question missing 'correct' index",
+                "wrong_kind": "'correct' must be an integer index, got {type}",
+            },
+        ),
+        "true_false": (
+            {
+                "field": "correct", "kind": "boolean",
+                "missing": "True/false question missing 'correct' value",
+                "wrong_kind": "True/false 'correct' must be boolean, got {type}",
+            },
+        ),
+        "short_answer": (
+            {
+                "field": "expected_keywords", "kind": "array", "items": "string", "min_items": 1,
+                "missing": "Short answer question missing 'expected_keywords' array",
+                "too_few": "'expected_keywords' is empty",
+            },
+        ),
+    },
+}
+
+# A check appends (is_warning, message) pairs for one question
+Check = Callable[[dict, str, list], None]
+
+
+def _compile_field(rule: dict) -> Check:
+    """Compile one type-specific field rule into a check function."""
+    field = rule["field"]
+    kind = rule["kind"]
+    missing = rule["missing"]
+
+    if kind == "array":
+        min_items = rule.get("min_items", 0)
+        max_items = rule.get("recommended_max_items")
+        too_few = rule.get("too_few", "")
+        too_many = rule.get("too_many", "")
+        wrong_kind = f"'{field}' must be an array"
+        strings = rule.get("items") == "string"
+        wrong_items = f"'{field}' must contain only strings"
+
+        def check(q, prefix, out):
+            if field not in q:
+                out.append((False, f"{prefix}: {missing}"))
+                return
+            value = q[field]
+            if not isinstance(value, list):
+                out.append((False, f"{prefix}: {wrong_kind}"))
+            elif len(value) < min_items:
+                out.append((False, f"{prefix}: " + too_few.format(min=min_items, n=len(value))))
+            elif strings and not all(isinstance(item, str) for item in value):
+                out.append((False, f"{prefix}: {wrong_items}"))
+            elif max_items is not None and len(value) > max_items:
+                out.append((True, f"{prefix}: " + too_many.format(n=len(value))))
+
+    elif kind == "index":
+        into = rule["into"]
+        wrong_kind = rule["wrong_kind"]
+
+        def check(q, prefix, out):
+            if field not in q:
+                out.append((False, f"{prefix}: {missing}"))
+                return
+            value = q[field]
+            if not isinstance(value, int):
+                out.append((False, f"{prefix}: " + wrong_kind.format(type=type(value).__name__)))
+                return
+            options = q.get(into)
+            if isinstance(options, list) and not 0 <= value < len(options):
+                out.append((False, f"{prefix}: '{field}' index {value} out of range for {len(options)} {into}"))
+
+    elif kind == "boolean":
+        wrong_kind = rule["wrong_kind"]
+
+        def check(q, prefix, out):
+            if field not in q:
+                out.append((False, f"{prefix}: {missing}"))
+            elif not isinstance(q[field], bool):
+                out.append((False, f"{prefix}: " + wrong_kind.format(type=type(q[field]).__name__)))
+
+    else:
+        raise ValueError(f"Unknown field kind '{kind}' for '{field}'")
+
+    return check
+
+
+def _compile_fast_path(required: tuple, strings: tuple, rules: tuple) -> Callable[[dict], bool]:
+    """
+    Compile a question type's rules into a single predicate that is True only
+    when the question has no problems at all. Most questions are valid, so
+    the message-producing checks only run when this returns False.
+    """
+    terms = [f"{field!r} in q" for field in required]
+    terms.append("isinstance(q['question'], str) and q['question'].strip() != ''")
+    terms.extend(f"isinstance(q.get({field!r}, ''), str)" for field in strings)
+    for rule in rules:
+        field = rule["field"]
+        if rule["kind"] == "array":
+            terms.append(f"isinstance(q.get({field!r}), list)")
+            terms.append(f"{rule.get('min_items', 0)} <= len(q[{field!r}])")
+            if rule.get("items") == "string":
+                terms.append(f"{{*map(type, q[{field!r}])}} <= {{str}}")
+            if rule.get("recommended_max_items") is not None:
+                terms.append(f"len(q[{field!r}]) <= {rule['recommended_max_items']}")
+        elif rule["kind"] == "index":
+            into = rule["into"]
+            terms.append(f"isinstance(q.get({field!r}), int)")
+            terms.append(f"(not isinstance(q.get({into!r}), list) or 0 <= q[{field!r}] < len(q[{into!r}]))")
+        elif rule["kind"] == "boolean":
+            terms.append(f"isinstance(q.get({field!r}), bool)")
+    return eval(f"lambda q: bool({' and '.join(terms)})")  # noqa: S307 - built from the schema only
+
+
+# Question type -> stats counter
+STAT_KEYS = {"multiple_choice": "mc", "true_false": "tf", "short_answer": "sa"}
+
+
+class QuizValidator:
+    """Validator compiled from a schema dict (see QUIZ_SCHEMA)."""
+
+    def __init__(self, schema: dict):
+        self.quiz_required = tuple(schema["quiz"]["required"])
+        self.quiz_strings = tuple(schema["quiz"].get("strings", ()))
+        self.min_questions = schema["quiz"]["recommended_min_questions"]
+        self.question_required = tuple(schema["question"]["required"])
+        self.question_strings = tuple(schema["question"].get("strings", ()))
+        self.type_checks = {
+            q_type: tuple(_compile_field(rule) for rule in rules)
+            for q_type, rules in schema["types"].items()
+        }
+        self.fast_paths = {
+            q_type: _compile_fast_path(self.question_required, self.question_strings, rules)
+            for q_type, rules in schema["types"].items()
+        }
+        self.valid_types = set(self.type_checks)
+
+    def _check_question(self, q, quiz_id: str, q_idx: int, out: list) -> None:
+        prefix = f"Quiz '{quiz_id}', Question {q_idx + 1}"
+        if not isinstance(q, dict):
+            out.append((False, f"{prefix}: Question must be an object"))
+            return
+
+        for field in self.question_required:
+            if field not in q:
+                out.append((False, f"{prefix}: Missing required field '{field}'"))
+
+        for field in self.question_strings:
+            if field in q and not isinstance(q[field], str):
+                out.append((False, f"{prefix}: '{field}' must be a string, got {type(q[field]).__name__}"))
+
+        if "type" not in q:
+            return  # Can't validate further without type
+
+        checks = self.type_checks.get(q["type"]) if isinstance(q["type"], str) else None
+        if checks is None:
+            out.append((False, f"{prefix}: Invalid question type '{q['type']}'. "
+                               f"Must be one of {self.valid_types}"))
+            return
+
+        for check in checks:
+            check(q, prefix, out)
+
+        if "question" in q:
+            text = q["question"]
+            if not isinstance(text, str) or not text.strip():
+                out.append((False, f"{prefix}: Question text is empty"))
+
+    def check(self, quiz, quiz_id: str) -> tuple[list[tuple[bool, str]], dict]:
+        """
+        Validate a parsed quiz whose file name (without .json) is `quiz_id`.
+        Returns ([(is_warning, message), ...], stats).
+        """
+        out: list[tuple[bool, str]] = []
+        stats = {"questions": 0, "mc": 0, "tf": 0, "sa": 0}
+
+        if not isinstance(quiz, dict):
+            return [(False, f"Quiz '{quiz_id}': Quiz must be an object")], stats
+
+        for field in self.quiz_required:
+            if field not in quiz:
+                out.append((False, f"Quiz '{quiz_id}': Missing required field '{field}'"))
+
+        for field in self.quiz_strings:
+            if field in quiz and not isinstance(quiz[field], str):
+                out.append((False, f"Quiz '{quiz_id}': '{field}' must be a string, "
+                                   f"got {type(quiz[field]).__name__}"))
+
+        if "id" in quiz and quiz["id"] != quiz_id:
+            out.append((False, f"Quiz '{quiz_id}': ID in file ('{quiz['id']}') doesn't match filename"))
+
+        # Lecture should look like 'pcv5', 'pcv15', etc.
+        if "lecture" in quiz:
+            lecture = quiz["lecture"]
+            if not isinstance(lecture, str) or not lecture or not lecture[0].isalpha():
+                out.append((False, f"Quiz '{quiz_id}': Invalid lecture format '{lecture}'"))
+
+        if "questions" not in quiz:
+            return out, stats
+
+        questions = quiz["questions"]
+        if not isinstance(questions, list):
+            out.append((False, f"Quiz '{quiz_id}': 'questions' must be an array"))
+            return out, stats
+
+        stats["questions"] = len(questions)
+        if not questions:
+            out.append((False, f"Quiz '{quiz_id}': No questions in quiz"))
+        elif len(questions) < self.min_questions:
+            out.append((True, f"Quiz '{quiz_id}': Only {len(questions)} questions (recommend 10+)"))
+
+        q_ids = [q["id"] for q in questions if isinstance(q, dict) and "id" in q]
+        try:
+            duplicates = len(q_ids) != len(set(q_ids))
+        except TypeError:  # unhashable IDs
+            duplicates = True
+        if duplicates:
+            out.append((False, f"Quiz '{quiz_id}': Duplicate question IDs detected"))
+
+        fast_paths = self.fast_paths
+        for idx, q in enumerate(questions):
+            q_type = q.get("type") if isinstance(q, dict) else None
+            if q_type.__class__ is not str:
+                q_type = None
+            fast_path = fast_paths.get(q_type)
+            if fast_path is None or not fast_path(q):
+                self._check_question(q, quiz_id, idx, out)
+            if q_type in STAT_KEYS:
+                stats[STAT_KEYS[q_type]] += 1
+
+        return out, stats
+
+    def errors(self, quiz, quiz_id: str) -> list[str]:
+        """Return only the problems that make a quiz unusable (ignores warnings)."""
+        return [message for is_warning, message in self.check(quiz, quiz_id)[0] if not is_warning]
+
+
+VALIDATOR = QuizValidator(QUIZ_SCHEMA)
@@ -0,0 +1,153 @@
+"""
+Quiz packs - compact, memory-mapped form of a quiz JSON file.
+
+A pack (`<quiz_id>.qzp`, next to `<quiz_id>.json`) is compiled from a valid
+quiz at sync/validate time. Its layout lets the server read just what a
+request needs:
+
+    header          fixed-size struct (see HEADER)
+    summary         JSON: id, lecture, topic, num_questions, created
+    meta            JSON: quiz-level fields except questions
+    question table  num_questions x (offset, length) into the records below
+    questions       one JSON record per question, answer fields removed
+    answer key      JSON list of {"correct", "expected_keywords"} per question
+
+Listing reads only the header and summary; the quiz page reads the question
+records; only grading deserializes the answer key. A pack is used only while
+it is at least as new as its JSON file, so a stale pack is ignored.
+"""
+
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+
+from payloads import ANSWER_FIELDS
+
+MAGIC = b"QZPK"
+VERSION = 1
+PACK_SUFFIX = ".qzp"
+
+# magic, version, summary (off, len), meta (off, len), table off, num questions, key (off, len)
+HEADER = struct.Struct("<4sHxxIIIIIIII")
+TABLE_ENTRY = struct.Struct("<II")
+
+
+class PackError(ValueError):
+    """Raised when a pack file is truncated or not a quiz pack."""
+
+
+def _dump(obj) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def encode_pack(quiz: dict) -> bytes:
+    """Serialize a (validated) quiz into pack bytes."""
+    questions = quiz.get("questions", [])
+    summary = _dump({
+        "id": quiz["id"],
+        "lecture": quiz.get("lecture", "Unknown"),
+        "topic": quiz.get("topic", "Unknown"),
+        "num_questions": len(questions),
+        "created": quiz.get("created", "Unknown"),
+    })
+    meta = _dump({k: v for k, v in quiz.items() if k != "questions"})
+    records = [_dump({k: v for k, v in q.items() if k not in ANSWER_FIELDS}) for q in questions]
+    key = _dump([{k: q[k] for k in ANSWER_FIELDS if k in q} for q in questions])
+
+    summary_off = HEADER.size
+    meta_off = summary_off + len(summary)
+    table_off = meta_off + len(meta)
+    offset = table_off + TABLE_ENTRY.size * len(records)
+    table = []
+    for record in records:
+        table.append(TABLE_ENTRY.pack(offset, len(record)))
+        offset += len(record)
+    key_off = offset
+
+    header = HEADER.pack(MAGIC, VERSION, summary_off, len(summary), meta_off, len(meta),
+                         table_off, len(records), key_off, len(key))
+    return b"".join([header, summary, meta, *table, *records, key])
+
+
+def write_pack(quiz: dict, path: Path) -> None:
+    """Write a pack atomically (temp file + rename)."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(encode_pack(quiz))
+    os.replace(tmp, path)
+
+
+def pack_path(json_path: Path) -> Path:
+    """Pack file that belongs to a quiz JSON file."""
+    return json_path.with_suffix(PACK_SUFFIX)
+
+
+def fresh_pack_path(json_path: Path, json_mtime_ns: int | None = None) -> Path | None:
+    """Return the quiz's pack if it exists and is not older than the JSON."""
+    path = pack_path(json_path)
+    try:
+        pack_mtime_ns = os.stat(path).st_mtime_ns
+        if json_mtime_ns is None:
+            json_mtime_ns = os.stat(json_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return path if pack_mtime_ns >= json_mtime_ns else None
+
+
+class QuizPack:
+    """Read-only, memory-mapped view of a pack file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.size = os.fstat(f.fileno()).st_size
+            if self.size < HEADER.size:
+                raise PackError(f"{path}: truncated header")
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self._summary_off, self._summary_len, self._meta_off, self._meta_len,
+         self._table_off, self.num_questions, self._key_off, self._key_len) = HEADER.unpack_from(self._buf)
+        if magic != MAGIC or version != VERSION:
+            raise PackError(f"{path}: not a version {VERSION} quiz pack")
+        if self._key_off + self._key_len > self.size:
+            raise PackError(f"{path}: truncated")
+
+    def _json(self, offset: int, length: int):
+        return json.loads(self._buf[offset:offset + length])
+
+    def summary(self) -> dict:
+        """Listing summary, read from the header area only."""
+        return self._json(self._summary_off, self._summary_len)
+
+    def meta(self) -> dict:
+        """Quiz-level fields (id, lecture, topic, ...) without questions."""
+        return self._json(self._meta_off, self._meta_len)
+
+    def question(self, index: int) -> dict:
+        """One question record, without answer fields."""
+        if not 0 <= index < self.num_questions:
+            raise IndexError(index)
+        offset, length = TABLE_ENTRY.unpack_from(self._buf, self._table_off + index * TABLE_ENTRY.size)
+        return self._json(offset, length)
+
+    def questions(self) -> list[dict]:
+        """All question records, without answer fields."""
+        return [self.question(i) for i in range(self.num_questions)]
+
+    def public_quiz(self) -> dict:
+        """The quiz with answer fields removed; never reads the answer key."""
+        return {**self.meta(), "questions": self.questions()}
+
+    def answer_key(self) -> list[dict]:
+        """Per-question answer fields, in question order."""
+        return self._json(self._key_off, self._key_len)
+
+    def quiz(self) -> dict:
+        """Reassemble the full quiz, answers included."""
+        questions = self.questions()
+        for q, answers in zip(questions, self.answer_key()):
+            q.update(answers)
+        return {**self.meta(), "questions": questions}
+
+    def close(self) -> None:
+        self._buf.close()
@@ -0,0 +1,238 @@
+"""
+Results store - SQLite-backed record of every quiz attempt.
+
+Each submission is appended to the `attempts` table, and a `completions`
+table keyed by (user ID, quiz ID) is maintained in the same transaction, so
+"which quizzes has this user completed" is a single indexed read and retakes
+never overwrite earlier attempts. The default user is '' (single-user
+deployments and results recorded before users existed). The database runs
+in WAL mode so several server processes (e.g. gunicorn workers) can share
+it.
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterator
+
+DEFAULT_USER = ""
+
+# Applied in order; PRAGMA user_version records how many have run
+MIGRATIONS = [
+    # 1: attempt history and completion index
+    """
+    CREATE TABLE IF NOT EXISTS attempts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        quiz_id TEXT NOT NULL,
+        completed TEXT NOT NULL,
+        score INTEGER NOT NULL,
+        total INTEGER NOT NULL,
+        percentage INTEGER NOT NULL,
+        result TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS attempts_by_quiz ON attempts (quiz_id, id);
+    CREATE TABLE IF NOT EXISTS completions (
+        quiz_id TEXT PRIMARY KEY,
+        attempts INTEGER NOT NULL,
+        last_attempt_id INTEGER NOT NULL
+    );
+    """,
+    # 2: cursor for syncing completions across server processes
+    """
+    CREATE INDEX IF NOT EXISTS completions_by_attempt ON completions (last_attempt_id);
+    """,
+    # 3: unique submission IDs so replayed write-behind batches are idempotent
+    """
+    ALTER TABLE attempts ADD COLUMN uid TEXT;
+    CREATE UNIQUE INDEX IF NOT EXISTS attempts_by_uid ON attempts (uid);
+    """,
+    # 4: per-user attempts and completions; earlier results belong to the default user ''
+    """
+    ALTER TABLE attempts ADD COLUMN user_id TEXT NOT NULL DEFAULT '';
+    CREATE INDEX IF NOT EXISTS attempts_by_user ON attempts (user_id, quiz_id, id);
+    CREATE TABLE user_completions (
+        user_id TEXT NOT NULL,
+        quiz_id TEXT NOT NULL,
+        attempts INTEGER NOT NULL,
+        last_attempt_id INTEGER NOT NULL,
+        PRIMARY KEY (user_id, quiz_id)
+    );
+    INSERT INTO user_completions SELECT '', quiz_id, attempts, last_attempt_id FROM completions;
+    DROP TABLE completions;
+    ALTER TABLE user_completions RENAME TO completions;
+    CREATE INDEX IF NOT EXISTS completions_by_attempt ON completions (last_attempt_id);
+    """,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+class ResultsStore:
+    """Append-only attempt history with an index of completed quizzes."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self) -> None:
+        conn = self._connect()
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        with conn:
+            # Take the write lock so concurrent workers migrate exactly once
+            conn.execute("BEGIN IMMEDIATE")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                return
+            for migration in MIGRATIONS[version:]:
+                for statement in migration.split(";"):
+                    if statement.strip():
+                        conn.execute(statement)
+            if version == 0:
+                self._import_legacy_results(conn, self.db_path.parent)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _import_legacy_results(self, conn: sqlite3.Connection, results_dir: Path) -> None:
+        """Import `<quiz_id>_result.json` files written before the store existed."""
+        legacy = []
+        for result_file in results_dir.glob("*_result.json"):
+            try:
+                with open(result_file) as f:
+                    result = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            result.setdefault("quiz_id", result_file.stem.replace("_result", ""))
+            legacy.append(result)
+        legacy.sort(key=lambda r: r.get("completed", ""))
+        for result in legacy:
+            self._insert(conn, result)
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, result: dict) -> int | None:
+        user_id = result.get("user_id", DEFAULT_USER)
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO attempts "
+            "(uid, user_id, quiz_id, completed, score, total, percentage, result) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (result.get("uid"), user_id, result["quiz_id"], result.get("completed", ""),
+             result.get("score", 0), result.get("total", 0), result.get("percentage", 0), json.dumps(result))
+        )
+        if not cur.rowcount:
+            return None  # already recorded under this uid
+        conn.execute(
+            "INSERT INTO completions (user_id, quiz_id, attempts, last_attempt_id) VALUES (?, ?, 1, ?) "
+            "ON CONFLICT (user_id, quiz_id) DO UPDATE SET attempts = attempts + 1, "
+            "last_attempt_id = excluded.last_attempt_id",
+            (user_id, result["quiz_id"], cur.lastrowid)
+        )
+        return cur.lastrowid
+
+    def record(self, result: dict) -> int | None:
+        """
+        Append an attempt and mark its quiz completed. Returns the attempt ID,
+        or None if an attempt with the same `uid` was already recorded.
+        """
+        conn = self._connect()
+        with conn:
+            return self._insert(conn, result)
+
+    def record_many(self, results: list[dict]) -> list[int | None]:
+        """Record several attempts in one transaction."""
+        conn = self._connect()
+        with conn:
+            return [self._insert(conn, result) for result in results]
+
+    def update_results(self, updates: list[tuple[int, dict]]) -> None:
+        """Replace the stored result of existing attempts, e.g. after re-grading."""
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "UPDATE attempts SET score = ?, total = ?, percentage = ?, result = ? WHERE id = ?",
+                [(r.get("score", 0), r.get("total", 0), r.get("percentage", 0), json.dumps(r), attempt_id)
+                 for attempt_id, r in updates]
+            )
+
+    def completed_quiz_ids(self, user_id: str | None = DEFAULT_USER) -> set[str]:
+        """Return the IDs of quizzes a user (None: anyone) has attempted."""
+        if user_id is None:
+            rows = self._connect().execute("SELECT DISTINCT quiz_id FROM completions")
+        else:
+            rows = self._connect().execute("SELECT quiz_id FROM completions WHERE user_id = ?", (user_id,))
+        return {quiz_id for (quiz_id,) in rows}
+
+    def completions_since(self, cursor: int) -> tuple[set[tuple[str, str]], int]:
+        """
+        Return (user_id, quiz_id) pairs completed after attempt ID `cursor`
+        and the new cursor. Lets each server process pick up submissions
+        made by the others.
+        """
+        rows = self._connect().execute(
+            "SELECT user_id, quiz_id, last_attempt_id FROM completions WHERE last_attempt_id > ?", (cursor,)
+        )
+        completions = set()
+        for user_id, quiz_id, attempt_id in rows:
+            completions.add((user_id, quiz_id))
+            cursor = max(cursor, attempt_id)
+        return completions, cursor
+
+    def attempts_since(self, cursor: int, limit: int = 1000) -> list[tuple[int, dict]]:
+        """Return up to `limit` (attempt_id, result) pairs recorded after attempt ID `cursor`."""
+        rows = self._connect().execute(
+            "SELECT id, result FROM attempts WHERE id > ? ORDER BY id LIMIT ?", (cursor, limit)
+        )
+        return [(attempt_id, json.loads(result)) for attempt_id, result in rows]
+
+    def last_attempt_id(self) -> int:
+        """ID of the newest attempt (0 if there are none)."""
+        return self._connect().execute("SELECT COALESCE(MAX(id), 0) FROM attempts").fetchone()[0]
+
+    def iter_attempts(self, since: int = 0, until: int | None = None, user_id: str | None = None,
+                      batch_size: int = 1000) -> Iterator[tuple[int, dict]]:
+        """
+        Yield (attempt_id, result) for attempts with since < id <= until, by
+        one user (None: all users), oldest first. Reads `batch_size` rows at a
+        time, so memory use doesn't grow with the number of attempts.
+        """
+        if until is None:
+            until = self.last_attempt_id()
+        cursor = since
+        while cursor < until:
+            if user_id is None:
+                rows = self._connect().execute(
+                    "SELECT id, result FROM attempts WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+                    (cursor, until, batch_size)
+                ).fetchall()
+            else:
+                rows = self._connect().execute(
+                    "SELECT id, result FROM attempts WHERE id > ? AND id <= ? AND user_id = ? ORDER BY id LIMIT ?",
+                    (cursor, until, user_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for attempt_id, result in rows:
+                yield attempt_id, json.loads(result)
+            cursor = rows[-1][0]
+
+    def attempts(self, quiz_id: str, user_id: str | None = None) -> list[dict]:
+        """Return every attempt at a quiz by one user (None: all users), oldest first."""
+        if user_id is None:
+            rows = self._connect().execute(
+                "SELECT id, result FROM attempts WHERE quiz_id = ? ORDER BY id", (quiz_id,)
+            )
+        else:
+            rows = self._connect().execute(
+                "SELECT id, result FROM attempts WHERE user_id = ? AND quiz_id = ? ORDER BY id",
+                (user_id, quiz_id)
+            )
+        return [{"attempt_id": attempt_id, **json.loads(result)} for attempt_id, result in rows]
@@ -0,0 +1,204 @@
+"""
+Result writer - write-behind persistence for quiz submissions.
+
+Request handlers score a submission, hand it to `ResultWriter.submit()` and
+respond immediately. A background thread drains the queue in batches:
+
+1. the batch is written to a spool file in `spool_dir`, fsynced and renamed
+   into place (the durability point),
+2. it is recorded in the results store in a single transaction,
+3. the latest attempt per user and quiz is mirrored to
+   `<quiz_id>_result.json` (`users/<user_id>/<quiz_id>_result.json` for
+   users other than the default one) via write-to-temp, fsync and atomic
+   rename,
+4. the spool file is deleted.
+
+Spool files left behind by a crash are replayed on startup. Every result
+carries a `uid`, so replaying a batch the store already holds is a no-op.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable
+
+from results_store import DEFAULT_USER, ResultsStore
+
+log = logging.getLogger(__name__)
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Write a file via a fsynced temp file and atomic rename."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def mirror_path(results_dir: Path, user_id: str, quiz_id: str) -> Path:
+    """Latest-attempt JSON file of a user's quiz."""
+    if user_id == DEFAULT_USER:
+        return results_dir / f"{quiz_id}_result.json"
+    user_dir = results_dir / "users" / user_id
+    user_dir.mkdir(parents=True, exist_ok=True)
+    return user_dir / f"{quiz_id}_result.json"
+
+
+def _fsync_dir(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class ResultWriter:
+    """Background writer that batches, spools and persists quiz results."""
+
+    def __init__(self, store: ResultsStore, results_dir: Path, max_queue: int = 10000,
+                 batch_size: int = 100, max_wait: float = 0.05,
+                 on_flush: Callable[[int, float], None] | None = None):
+        self.store = store
+        self.results_dir = results_dir
+        self.spool_dir = results_dir / "spool"
+        self.spool_dir.mkdir(exist_ok=True)
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.on_flush = on_flush  # called with (results, seconds) after each flush
+        self._queue: queue.Queue[dict] = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._stats_lock = threading.Lock()
+        self._flushes = 0
+        self._flushed = 0
+        self._errors = 0
+        self._flush_seconds_total = 0.0
+        self._flush_seconds_last = 0.0
+        self._flush_seconds_max = 0.0
+
+    def start(self) -> None:
+        """Replay leftover spool files, then start the writer thread."""
+        self.recover()
+        self._thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, result: dict, timeout: float = 5.0) -> None:
+        """
+        Queue a scored result for persistence. Blocks for up to `timeout`
+        seconds if the queue is full, then raises queue.Full.
+        """
+        result.setdefault("uid", uuid.uuid4().hex)
+        self._queue.put(result, timeout=timeout)
+
+    def wait_idle(self, timeout: float | None = None) -> bool:
+        """Wait until every queued result has been flushed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Flush pending results and stop the writer thread."""
+        self.wait_idle(timeout)
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                batch = [self._queue.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=max(remaining, 0)) if remaining > 0
+                                 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.flush(batch)
+            except Exception:
+                # The spool file (if written) stays behind and is replayed on restart
+                log.exception("Failed to persist %d result(s)", len(batch))
+                with self._stats_lock:
+                    self._errors += 1
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self, batch: list[dict]) -> None:
+        """Durably persist a batch of results."""
+        started = time.perf_counter()
+        spool_file = self.spool_dir / f"{time.time_ns()}-{os.getpid()}.jsonl"
+        write_atomic(spool_file, b"".join(json.dumps(r).encode() + b"\n" for r in batch))
+        _fsync_dir(self.spool_dir)
+        self._apply(batch)
+        spool_file.unlink(missing_ok=True)
+
+        elapsed = time.perf_counter() - started
+        with self._stats_lock:
+            self._flushes += 1
+            self._flushed += len(batch)
+            self._flush_seconds_total += elapsed
+            self._flush_seconds_last = elapsed
+            self._flush_seconds_max = max(self._flush_seconds_max, elapsed)
+        if self.on_flush:
+            self.on_flush(len(batch), elapsed)
+
+    def _apply(self, batch: list[dict]) -> None:
+        self.store.record_many(batch)
+        # Latest attempt per user and quiz, for sync_results.sh and local review
+        latest = {(r.get("user_id", DEFAULT_USER), r["quiz_id"]): r for r in batch}
+        for (user_id, quiz_id), result in latest.items():
+            mirror = {k: v for k, v in result.items() if k != "uid"}
+            write_atomic(mirror_path(self.results_dir, user_id, quiz_id),
+                         json.dumps(mirror, indent=2).encode())
+
+    def recover(self) -> int:
+        """Replay spool files left by a crash. Returns the number of results replayed."""
+        replayed = 0
+        for tmp in self.spool_dir.glob(".*.tmp"):
+            # Never renamed into place; skip fresh ones another worker may be writing
+            try:
+                if time.time() - tmp.stat().st_mtime > 60:
+                    tmp.unlink()
+            except FileNotFoundError:
+                pass
+        for spool_file in sorted(self.spool_dir.glob("*.jsonl")):
+            try:
+                with open(spool_file) as f:
+                    batch = [json.loads(line) for line in f if line.strip()]
+            except FileNotFoundError:
+                continue  # replayed concurrently by another worker
+            self._apply(batch)
+            spool_file.unlink(missing_ok=True)
+            replayed += len(batch)
+        if replayed:
+            log.warning("Replayed %d unflushed result(s) from %s", replayed, self.spool_dir)
+        return replayed
+
+    def stats(self) -> dict:
+        """Return queue depth and flush latency counters."""
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_max": self._queue.maxsize,
+                "flushes": self._flushes,
+                "results_flushed": self._flushed,
+                "errors": self._errors,
+                "flush_ms_last": round(self._flush_seconds_last * 1000, 2),
+                "flush_ms_avg": round(self._flush_seconds_total / self._flushes * 1000, 2) if self._flushes else 0.0,
+                "flush_ms_max": round(self._flush_seconds_max * 1000, 2),
+            }
@@ -0,0 +1,217 @@
+"""
+Review scheduler - SM-2 spaced repetition over every answered question.
+
+Each (quiz_id, question_id) that has been answered gets a card with an
+easiness factor, interval and due time, updated by the SM-2 rules from the
+answer's correctness and time spent. Due cards sit in a min-heap keyed by
+due time, so the N most overdue questions across all quizzes are found in
+O(N log cards) without scanning the result history.
+
+ReviewSchedulers keeps a separate schedule per user.
+
+Review quizzes are served under the reserved quiz ID "review". Their
+question IDs are "<quiz_id>/<question_id>" so a submission can be graded
+against the source quizzes and attributed back to them.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from results_store import DEFAULT_USER
+
+REVIEW_QUIZ_ID = "review"
+
+DAY = 86400
+
+# Correct answers faster than these (seconds) rate as "perfect" / "good"
+FAST_ANSWER_SEC = 10
+SLOW_ANSWER_SEC = 30
+
+
+@dataclass
+class Card:
+    """SM-2 state of one question."""
+    easiness: float = 2.5
+    interval_days: int = 0
+    repetitions: int = 0
+    due: float = 0.0
+    version: int = 0  # heap entries carrying an older version are stale
+
+
+def answer_quality(answer: dict) -> int:
+    """Map a graded answer to an SM-2 quality grade (0-5)."""
+    if not answer.get("is_correct"):
+        # Partially right short answers are a near miss rather than a blackout
+        return 2 if answer.get("keywords_found") else 1
+    time_sec = answer.get("time_spent_sec") or 0
+    if time_sec <= FAST_ANSWER_SEC:
+        return 5
+    return 4 if time_sec <= SLOW_ANSWER_SEC else 3
+
+
+def review_question_id(quiz_id: str, question_id) -> str:
+    """Question ID used inside a review quiz."""
+    return f"{quiz_id}/{question_id}"
+
+
+def split_review_question_id(review_id: str) -> tuple[str, str] | None:
+    """Inverse of review_question_id(); None if the ID isn't one."""
+    quiz_id, sep, question_id = str(review_id).partition("/")
+    return (quiz_id, question_id) if sep else None
+
+
+def _timestamp(completed: str) -> float:
+    """Epoch seconds of a result's ISO 'completed' time (UTC unless it has an offset; now if missing)."""
+    try:
+        parsed = datetime.fromisoformat(completed.rstrip("Z"))
+    except (AttributeError, ValueError):
+        return time.time()
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class ReviewScheduler:
+    """Heap-ordered SM-2 cards for every answered question."""
+
+    def __init__(self):
+        self._cards: dict[tuple[str, str], Card] = {}
+        self._by_quiz: dict[str, set[str]] = {}
+        self._heap: list[tuple[float, int, tuple[str, str]]] = []  # (due, version, key)
+        self._versions = itertools.count(1)  # global, so a re-created card never matches old entries
+        self._lock = threading.Lock()
+
+    def review(self, quiz_id: str, question_id, quality: int, at: float) -> None:
+        """Apply one SM-2 review at epoch time `at`."""
+        key = (quiz_id, str(question_id))
+        with self._lock:
+            card = self._cards.get(key)
+            if card is None:
+                card = self._cards[key] = Card()
+                self._by_quiz.setdefault(quiz_id, set()).add(key[1])
+
+            if quality >= 3:
+                if card.repetitions == 0:
+                    card.interval_days = 1
+                elif card.repetitions == 1:
+                    card.interval_days = 6
+                else:
+                    card.interval_days = round(card.interval_days * card.easiness)
+                card.repetitions += 1
+            else:
+                card.repetitions = 0
+                card.interval_days = 1
+            card.easiness = max(1.3, card.easiness + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+            card.due = at + card.interval_days * DAY
+            card.version = next(self._versions)
+            heapq.heappush(self._heap, (card.due, card.version, key))
+            if len(self._heap) > 2 * len(self._cards) + 1024:
+                self._compact()
+
+    def _compact(self) -> None:
+        # Drop stale heap entries once they outnumber the live ones
+        self._heap = [(card.due, card.version, key) for key, card in self._cards.items()]
+        heapq.heapify(self._heap)
+
+    def add_attempt(self, result: dict) -> None:
+        """Review every question answered in a graded attempt."""
+        at = _timestamp(result.get("completed"))
+        for answer in result.get("answers", []):
+            quiz_id = answer.get("quiz_id") or result.get("quiz_id")
+            if quiz_id and quiz_id != REVIEW_QUIZ_ID:
+                self.review(quiz_id, answer["question_id"], answer_quality(answer), at)
+
+    def forget_quiz(self, quiz_id: str) -> None:
+        """Drop a quiz's cards; their heap entries become stale."""
+        with self._lock:
+            for question_id in self._by_quiz.pop(quiz_id, ()):
+                del self._cards[(quiz_id, question_id)]
+
+    def forget(self, quiz_id: str, question_id) -> None:
+        """Drop one card, e.g. for a question removed from its quiz."""
+        with self._lock:
+            question_id = str(question_id)
+            if self._cards.pop((quiz_id, question_id), None):
+                self._by_quiz[quiz_id].discard(question_id)
+
+    def apply_catalog_changes(self, upserted: list[dict], removed: list[str]) -> None:
+        """Catalog listener: forget the cards of deleted quizzes."""
+        for quiz_id in removed:
+            self.forget_quiz(quiz_id)
+
+    def due(self, n: int, now: float | None = None) -> list[tuple[str, str]]:
+        """The (up to) n most overdue (quiz_id, question_id) pairs, most overdue first."""
+        now = time.time() if now is None else now
+        picked = []
+        with self._lock:
+            heap = self._heap
+            while heap and len(picked) < n and heap[0][0] <= now:
+                entry = heapq.heappop(heap)
+                card = self._cards.get(entry[2])
+                if card is not None and card.version == entry[1]:
+                    picked.append(entry)
+            # Still due until reviewed
+            for entry in picked:
+                heapq.heappush(heap, entry)
+        return [key for _, _, key in picked]
+
+    def stats(self) -> dict:
+        """Card and heap entry counts."""
+        with self._lock:
+            return {"cards": len(self._cards), "heap_entries": len(self._heap)}
+
+
+class ReviewSchedulers:
+    """One ReviewScheduler per user."""
+
+    def __init__(self):
+        self._users: dict[str, ReviewScheduler] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> ReviewScheduler | None:
+        """A user's schedule, or None if they have no answers yet (doesn't create one)."""
+        with self._lock:
+            return self._users.get(user_id)
+
+    def add_attempt(self, result: dict) -> None:
+        """Review the answers of an attempt in its user's schedule (created on their first attempt)."""
+        user_id = result.get("user_id", DEFAULT_USER)
+        with self._lock:
+            scheduler = self._users.get(user_id)
+            if scheduler is None:
+                scheduler = self._users[user_id] = ReviewScheduler()
+        scheduler.add_attempt(result)
+
+    def apply_catalog_changes(self, upserted: list[dict], removed: list[str]) -> None:
+        """Catalog listener: forward deletions to every user's schedule."""
+        with self._lock:
+            schedulers = list(self._users.values())
+        for scheduler in schedulers:
+            scheduler.apply_catalog_changes(upserted, removed)
+
+    def stats(self) -> dict:
+        """User, card and heap entry counts."""
+        with self._lock:
+            schedulers = list(self._users.values())
+        totals = {"users": len(schedulers), "cards": 0, "heap_entries": 0}
+        for scheduler in schedulers:
+            for key, value in scheduler.stats().items():
+                totals[key] += value
+        return totals
+
+
+def build_review_quiz(questions: list[tuple[str, dict]]) -> dict:
+    """Review quiz from (source quiz_id, question) pairs."""
+    return {
+        "id": REVIEW_QUIZ_ID,
+        "lecture": "review",
+        "topic": "Spaced Review",
+        "questions": [
+            {**q, "id": review_question_id(quiz_id, q["id"])}
+            for quiz_id, q in questions
+        ],
+    }
@@ -0,0 +1,181 @@
+"""
+Search index - BM25 full-text search over quiz questions.
+
+Every question is one document made of its text, topic, slide reference and
+options, plus its quiz's topic and lecture; field weights let a topic match
+outrank a passing mention in an option. The index is an in-memory inverted
+index (term -> {document: weighted term frequency}) kept current by catalog
+deltas, so a query only touches the postings of its own terms and never
+reads quiz files.
+"""
+
+import heapq
+import math
+import re
+import threading
+from typing import Callable
+
+# Letters and digits; "SE(3)" -> "se", "3"
+TOKEN = re.compile(r"[^\W_]+")
+
+# Weight of a term occurrence per field
+FIELD_WEIGHTS = {
+    "question": 1.0,
+    "topic": 2.0,
+    "slide_ref": 1.0,
+    "options": 0.5,
+    "quiz_topic": 1.0,
+    "lecture": 1.0,
+}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+SNIPPET_CHARS = 200
+
+# Returns a quiz's answer-free questions and metadata, or None if it can't be read
+QuizLoader = Callable[[str], dict | None]
+
+
+def tokenize(text) -> list[str]:
+    return TOKEN.findall(str(text).casefold()) if text else []
+
+
+def _question_fields(quiz: dict, question: dict) -> dict[str, str]:
+    options = question.get("options")
+    return {
+        "question": question.get("question", ""),
+        "topic": question.get("topic", ""),
+        "slide_ref": question.get("slide_ref", ""),
+        "options": " ".join(map(str, options)) if isinstance(options, list) else "",
+        "quiz_topic": quiz.get("topic", ""),
+        "lecture": quiz.get("lecture", ""),
+    }
+
+
+class SearchIndex:
+    """Incrementally maintained BM25 index of every question in the catalog."""
+
+    def __init__(self, load: QuizLoader):
+        self.load = load
+        self._postings: dict[str, dict[int, float]] = {}
+        self._docs: list[dict | None] = []  # document ID -> hit fields and length (None: removed)
+        self._free: list[int] = []  # removed document IDs, reused first
+        self._quiz_docs: dict[str, list[int]] = {}
+        self._quizzes: dict[str, dict] = {}  # quiz ID -> lecture and topic
+        self._total_length = 0.0
+        self._live = 0
+        self._norms: list[float] | None = None  # BM25 length norm per document, rebuilt after changes
+        self._lock = threading.Lock()
+
+    def apply_catalog_changes(self, upserted: list[dict], removed: list[str]) -> None:
+        """Catalog listener: (re)index changed quizzes, drop removed ones."""
+        loaded = [(summary["id"], self.load(summary["id"])) for summary in upserted]
+        with self._lock:
+            for quiz_id in removed:
+                self._remove_quiz(quiz_id)
+            for quiz_id, quiz in loaded:
+                self._remove_quiz(quiz_id)
+                if quiz:
+                    self._add_quiz(quiz_id, quiz)
+            if upserted or removed:
+                self._norms = None
+
+    def _add_quiz(self, quiz_id: str, quiz: dict) -> None:
+        self._quizzes[quiz_id] = {"lecture": quiz.get("lecture", ""), "topic": quiz.get("topic", "")}
+        doc_ids = self._quiz_docs[quiz_id] = []
+        for question in quiz.get("questions", []):
+            if not isinstance(question, dict):
+                continue
+            weights: dict[str, float] = {}
+            for field, text in _question_fields(quiz, question).items():
+                for term in tokenize(text):
+                    weights[term] = weights.get(term, 0.0) + FIELD_WEIGHTS[field]
+            if not weights:
+                continue
+            length = sum(weights.values())
+            doc = {
+                "quiz_id": quiz_id,
+                "question_id": question.get("id"),
+                "question": str(question.get("question", ""))[:SNIPPET_CHARS],
+                "topic": question.get("topic", ""),
+                "slide_ref": question.get("slide_ref", ""),
+                "length": length,
+                "terms": tuple(weights),
+            }
+            if self._free:
+                doc_id = self._free.pop()
+                self._docs[doc_id] = doc
+            else:
+                doc_id = len(self._docs)
+                self._docs.append(doc)
+            for term, weight in weights.items():
+                self._postings.setdefault(term, {})[doc_id] = weight
+            doc_ids.append(doc_id)
+            self._total_length += length
+            self._live += 1
+
+    def _remove_quiz(self, quiz_id: str) -> None:
+        self._quizzes.pop(quiz_id, None)
+        for doc_id in self._quiz_docs.pop(quiz_id, []):
+            doc = self._docs[doc_id]
+            for term in doc["terms"]:
+                postings = self._postings[term]
+                del postings[doc_id]
+                if not postings:
+                    del self._postings[term]
+            self._docs[doc_id] = None
+            self._free.append(doc_id)
+            self._total_length -= doc["length"]
+            self._live -= 1
+
+    def search(self, query: str, limit: int = 20) -> dict:
+        """
+        Rank questions for a query (any term may match; more and rarer
+        matching terms rank higher). Returns the top `limit` questions and
+        the quizzes they belong to, best first.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            if not terms or not self._live:
+                return {"questions": [], "quizzes": []}
+            norms = self._norms
+            if norms is None:
+                avg_length = self._total_length / self._live
+                norms = self._norms = [K1 * (1 - B + B * doc["length"] / avg_length) if doc else 0.0
+                                       for doc in self._docs]
+            scores: dict[int, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (self._live - len(postings) + 0.5) / (len(postings) + 0.5))
+                weight = idf * (K1 + 1)
+                for doc_id, tf in postings.items():
+                    scores[doc_id] = scores.get(doc_id, 0.0) + weight * tf / (tf + norms[doc_id])
+
+            questions = []
+            for doc_id, score in heapq.nlargest(limit, scores.items(), key=lambda item: item[1]):
+                doc = self._docs[doc_id]
+                questions.append({
+                    "quiz_id": doc["quiz_id"], "question_id": doc["question_id"], "question": doc["question"],
+                    "topic": doc["topic"], "slide_ref": doc["slide_ref"], "score": round(score, 4),
+                })
+
+            # Quizzes rank by their best question, over every matching question
+            best: dict[str, tuple[float, int]] = {}
+            for doc_id, score in scores.items():
+                quiz_id = self._docs[doc_id]["quiz_id"]
+                top, matches = best.get(quiz_id, (0.0, 0))
+                best[quiz_id] = (max(top, score), matches + 1)
+            quizzes = [
+                {"quiz_id": quiz_id, **self._quizzes[quiz_id], "score": round(score, 4), "matches": matches}
+                for quiz_id, (score, matches) in heapq.nlargest(limit, best.items(), key=lambda item: item[1][0])
+            ]
+        return {"questions": questions, "quizzes": quizzes}
+
+    def stats(self) -> dict:
+        """Return index size counters."""
+        with self._lock:
+            return {"quizzes": len(self._quiz_docs), "questions": self._live, "terms": len(self._postings)}
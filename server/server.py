@@ -4,233 +4,577 @@ Quiz Server - Flask application for serving academic quizzes.
 Deploy to: /var/www/quizzes/server.py
 """
 
-import json
+import atexit
+import hmac
 import os
+import queue
+import threading
+import time
+from contextlib import nullcontext
 from datetime import datetime
 from pathlib import Path
-
-from flask import Flask, jsonify, render_template, request, abort
-
+from urllib.parse import urlencode
+
+from flask import (Flask, Response, g, jsonify, redirect, render_template, request, abort, stream_with_context,
+                   url_for)
+
+from analytics import DIMENSIONS, ClassStats
+from assets import AssetManifest
+from catalog import QuizCatalog
+from course_index import CourseIndex
+from export import answer_rows, ndjson_chunks
+from grading import grade_submission
+from ingest import GenerationConflict, IngestError, QuizIngest
+from keywords import compile_matchers
+from metrics import MetricsRegistry, SnapshotExporter, render
+from payloads import CompiledPayload, client_quiz, compile_json, compile_payload, public_attempt, public_quiz
+from profiler import SlowRequestProfiler
+from quiz_cache import CachedQuiz, QuizCache
+from quiz_schema import VALIDATOR
+from results_store import DEFAULT_USER, ResultsStore
+from results_writer import ResultWriter
+from scheduler import (REVIEW_QUIZ_ID, ReviewSchedulers, build_review_quiz, review_question_id,
+                       split_review_question_id)
+from search import SearchIndex
+from sessions import COOKIE_MAX_AGE, USER_COOKIE, USER_HEADER, resolve_user, valid_token
+from snapshot import code_digest, load_snapshot, save_snapshot
+
+STARTED = time.monotonic()
 app = Flask(__name__)
 
 # Configuration
-DATA_DIR = Path(__file__).parent / "data"
-RESULTS_DIR = Path(__file__).parent / "results"
+DATA_DIR = Path(os.environ.get("QUIZ_DATA_DIR", Path(__file__).parent / "data"))
+RESULTS_DIR = Path(os.environ.get("QUIZ_RESULTS_DIR", Path(__file__).parent / "results"))
 
 # Ensure directories exist
 DATA_DIR.mkdir(exist_ok=True)
 RESULTS_DIR.mkdir(exist_ok=True)
 
+# Seconds between full stat passes when the data directory mtime is unchanged
+CATALOG_RESCAN_SECONDS = 5.0
+
+# Upper bound on the on-disk size of quizzes kept parsed in memory, plus
+# their rendered pages, payloads and matchers
+QUIZ_CACHE_MAX_BYTES = int(os.environ.get("QUIZ_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+# Quiz pages and payloads may be stored but must be revalidated (ETag -> 304)
+QUIZ_CACHE_CONTROL = "no-cache"
+
+# Fingerprinted static assets never change under the same URL
+ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Give each browser its own identity (cookie token); otherwise everyone is DEFAULT_USER
+MULTI_USER = os.environ.get("QUIZ_MULTI_USER", "") not in ("", "0", "false")
+
+# Quiz uploads through /api/ingest (disabled unless QUIZ_INGEST_TOKEN is set)
+INGEST_TOKEN = os.environ.get("QUIZ_INGEST_TOKEN", "")
+INGEST_MAX_BYTES = int(os.environ.get("QUIZ_INGEST_MAX_BYTES", 64 * 1024 * 1024))
+ingest = QuizIngest(DATA_DIR, validate=VALIDATOR.errors, reserved_ids=frozenset({REVIEW_QUIZ_ID}))
+
+# Quizzes failing QUIZ_SCHEMA are rejected on load, so handlers can trust them.
+# With ingest enabled, scans share its lock, so an ingested batch appears all at once
+catalog = QuizCatalog(DATA_DIR, rescan_interval=CATALOG_RESCAN_SECONDS, validate=VALIDATOR.errors,
+                      scan_lock=ingest.reading if INGEST_TOKEN else nullcontext)
+quiz_cache = QuizCache(DATA_DIR, max_bytes=QUIZ_CACHE_MAX_BYTES, validate=VALIDATOR.errors)
+results_store = ResultsStore(RESULTS_DIR / "results.sqlite3")
+
+assets = AssetManifest(Path(app.static_folder))
+
+# Request and operation timings for /metrics; each worker publishes a
+# snapshot to RESULTS_DIR/metrics so any worker can report them all
+metrics = MetricsRegistry()
+metrics_exporter = SnapshotExporter(metrics, RESULTS_DIR / "metrics")
+metrics_exporter.start()
+atexit.register(metrics_exporter.close)
+
+# Collapsed-stack profiles of requests slower than QUIZ_PROFILE_SLOW_MS (off by default)
+PROFILE_SLOW_MS = float(os.environ.get("QUIZ_PROFILE_SLOW_MS", 0))
+PROFILE_INTERVAL_MS = float(os.environ.get("QUIZ_PROFILE_INTERVAL_MS", 5))
+profiler = None
+if PROFILE_SLOW_MS > 0:
+    profiler = SlowRequestProfiler(RESULTS_DIR / "profiles", threshold=PROFILE_SLOW_MS / 1000,
+                                   interval=PROFILE_INTERVAL_MS / 1000)
+    profiler.start()
+
+# Submissions are persisted by a background write-behind thread
+RESULT_QUEUE_MAX = int(os.environ.get("QUIZ_RESULT_QUEUE_MAX", 10000))
+result_writer = ResultWriter(results_store, RESULTS_DIR, max_queue=RESULT_QUEUE_MAX,
+                             on_flush=lambda n, seconds: metrics.observe("quiz_result_flush_seconds", seconds))
+result_writer.start()
+atexit.register(result_writer.close)
+
+METRICS_HELP = {
+    "quiz_request_duration_seconds": "Request latency by route",
+    "quiz_requests_total": "Requests by route and status",
+    "quiz_operation_duration_seconds": "Latency of quiz loads, catalog refreshes and page renders",
+    "quiz_result_flush_seconds": "Latency of persisting one batch of results",
+    "quiz_cache_hit_ratio": "Quiz cache hits / lookups",
+}
+
+
+def collect_component_metrics() -> list[tuple[str, dict, float, str]]:
+    """Cache, catalog and result writer counters for the metrics snapshot."""
+    cache, writer = quiz_cache.stats(), result_writer.stats()
+    return [
+        ("quiz_cache_hits_total", {}, cache["hits"], "counter"),
+        ("quiz_cache_misses_total", {}, cache["misses"], "counter"),
+        ("quiz_cache_evictions_total", {}, cache["evictions"], "counter"),
+        ("quiz_cache_bytes", {}, cache["bytes"], "gauge"),
+        ("quiz_disk_reads_total", {"component": "quiz_cache"}, cache["disk_reads"], "counter"),
+        ("quiz_disk_reads_total", {"component": "catalog"}, catalog.disk_reads, "counter"),
+        ("quiz_catalog_scans_total", {}, catalog.scans, "counter"),
+        ("quiz_results_flushed_total", {}, writer["results_flushed"], "counter"),
+        ("quiz_result_flush_errors_total", {}, writer["errors"], "counter"),
+        ("quiz_result_queue_depth", {}, writer["queue_depth"], "gauge"),
+    ]
+
+
+metrics.add_collector(collect_component_metrics)
+
+# Index page tree, kept current by catalog deltas and result submissions
+course_index = CourseIndex()
+completions_cursor = 0
+
+
+def sync_completed_quizzes() -> None:
+    """Apply completions recorded since the last sync (including by other workers)."""
+    global completions_cursor
+    completions, completions_cursor = results_store.completions_since(completions_cursor)
+    for user_id, quiz_id in completions:
+        course_index.mark_completed(quiz_id, user_id)
+
+
+# Mastery statistics and review schedule, folded in attempt by attempt
+# (including other workers')
+mastery_stats = ClassStats()
+review_schedulers = ReviewSchedulers()
+ATTEMPT_SYNC_BATCH = 1000
+attempts_cursor = 0
+attempts_lock = threading.Lock()
+
+# Questions per review quiz (?n= overrides, up to REVIEW_QUIZ_MAX)
+REVIEW_QUIZ_SIZE = int(os.environ.get("QUIZ_REVIEW_SIZE", 10))
+REVIEW_QUIZ_MAX = 50
+
+
+def sync_attempts() -> None:
+    """
+    Fold attempts recorded since the last sync into the stats and review
+    schedule. Skipped until the warm-up thread has folded in the backlog.
+    """
+    if warmed_up.is_set():
+        fold_attempts()
+
+
+def fold_attempts() -> None:
+    """Fold attempts recorded after attempts_cursor, in batches."""
+    global attempts_cursor
+    with attempts_lock:
+        while True:
+            batch = results_store.attempts_since(attempts_cursor, ATTEMPT_SYNC_BATCH)
+            for attempt_id, result in batch:
+                try:
+                    mastery_stats.add_attempt(result)
+                    review_schedulers.add_attempt(result)
+                except Exception:
+                    # One malformed record must not stall every later one
+                    app.logger.exception("Skipping attempt %s in stats and review schedules", attempt_id)
+                attempts_cursor = attempt_id
+            if len(batch) < ATTEMPT_SYNC_BATCH:
+                break
+
+
+def read_public_quiz(quiz_id: str) -> dict | None:
+    """Answer-free quiz for the search index, read without filling the quiz cache."""
+    entry = quiz_cache.read(quiz_id)
+    return entry.derive("public", public_quiz) if entry else None
+
+
+# Full-text index of every question, updated with catalog deltas
+search_index = SearchIndex(read_public_quiz)
+SEARCH_LIMIT_MAX = 100
+
+# Start-up: the catalog and completions come from the last snapshot (if it
+# still matches), so the first request doesn't wait for every quiz to be
+# parsed. The catalog re-scan, search index and attempt history are built by a
+# background warm-up thread; endpoints that need them wait up to
+# WARM_UP_WAIT_SECONDS, then answer 503.
+SNAPSHOT_FILE = RESULTS_DIR / "cache" / "startup-snapshot.json"
+SNAPSHOT_SECONDS = float(os.environ.get("QUIZ_SNAPSHOT_SECONDS", 300))
+SNAPSHOT_DIGEST = code_digest(*(Path(__file__).parent / name for name in ("catalog.py", "quiz_schema.py")))
+WARM_UP_WAIT_SECONDS = 10.0
+warmed_up = threading.Event()
+snapshot_stop = threading.Event()
+startup = {"snapshot": False, "ready_seconds": None, "warm_up_seconds": None, "warm_up_errors": []}
+
+
+def restore_snapshot() -> bool:
+    """Restore the catalog and completions from the start-up snapshot. Returns True if it was used."""
+    global completions_cursor
+    state = load_snapshot(SNAPSHOT_FILE, DATA_DIR, SNAPSHOT_DIGEST)
+    if not state:
+        return False
+    try:
+        catalog.restore(state["catalog"])
+        # A cursor beyond the newest attempt means the results store was replaced
+        if state["completions_cursor"] <= results_store.last_attempt_id():
+            for quiz_id, user_id in state["completions"]:
+                course_index.mark_completed(quiz_id, user_id)
+            completions_cursor = state["completions_cursor"]
+    except (KeyError, TypeError, ValueError) as e:
+        app.logger.warning("Ignoring start-up snapshot %s: %s", SNAPSHOT_FILE, e)
+        return False
+    return True
+
+
+def snapshot_key() -> tuple[int, int]:
+    """Changes whenever the snapshotted state does."""
+    return catalog.version, completions_cursor
+
+
+def save_startup_snapshot(saved_key: tuple | None = None) -> tuple | None:
+    """Write the start-up snapshot unless nothing changed since `saved_key`. Returns the new key."""
+    key = snapshot_key()  # taken first: the state saved may only be ahead of it
+    if key != saved_key:
+        state = {"catalog": catalog.snapshot(), "completions": course_index.completions(),
+                 "completions_cursor": key[1]}
+        try:
+            save_snapshot(SNAPSHOT_FILE, DATA_DIR, SNAPSHOT_DIGEST, state)
+        except OSError as e:
+            app.logger.warning("Could not write start-up snapshot %s: %s", SNAPSHOT_FILE, e)
+            return saved_key
+    return key
 
-def load_quiz(quiz_id: str) -> dict | None:
-    """Load a quiz by ID."""
-    quiz_file = DATA_DIR / f"{quiz_id}.json"
-    if quiz_file.exists():
-        with open(quiz_file) as f:
-            return json.load(f)
+
+def warm_up(saved_key: tuple | None) -> None:
+    """
+    Background start-up work, then periodic snapshots until shutdown. A step
+    that fails is logged and skipped: requests still get served, and the
+    catalog refresh and attempt sync they trigger retry it.
+    """
+    started = time.monotonic()
+    steps = (
+        ("catalog", lambda: catalog.refresh(force=True)),
+        ("search index", lambda: catalog.subscribe(search_index.apply_catalog_changes)),
+        ("completions", sync_completed_quizzes),
+        ("attempts", fold_attempts),
+    )
+    with metrics.timer("quiz_operation_duration_seconds", operation="warm_up"):
+        for name, step in steps:
+            try:
+                step()
+            except Exception as e:
+                app.logger.exception("Start-up warm-up of the %s failed", name)
+                startup["warm_up_errors"].append(f"{name}: {e}")
+    startup["warm_up_seconds"] = round(time.monotonic() - started, 3)
+    warmed_up.set()
+    while True:
+        try:
+            saved_key = save_startup_snapshot(saved_key)
+        except Exception:
+            app.logger.exception("Could not write start-up snapshot %s", SNAPSHOT_FILE)
+        if snapshot_stop.wait(SNAPSHOT_SECONDS):
+            break
+
+
+def stop_warm_up(thread: threading.Thread) -> None:
+    """atexit: stop the snapshot loop and save a final snapshot (if warm-up finished)."""
+    snapshot_stop.set()
+    if warmed_up.is_set():
+        thread.join(timeout=5)
+        save_startup_snapshot()
+
+
+def require_warm(what: str) -> None:
+    """Wait for the warm-up thread (up to WARM_UP_WAIT_SECONDS), else 503."""
+    if not warmed_up.wait(WARM_UP_WAIT_SECONDS):
+        abort(503, description=f"{what} is still being built after start-up, please retry")
+
+
+startup["snapshot"] = restore_snapshot()
+sync_completed_quizzes()
+catalog.subscribe(course_index.apply_catalog_changes)
+catalog.subscribe(mastery_stats.apply_catalog_changes)
+catalog.subscribe(review_schedulers.apply_catalog_changes)
+warm_up_thread = threading.Thread(
+    target=warm_up, args=(snapshot_key() if startup["snapshot"] else None,),
+    name="quiz-warm-up", daemon=True
+)
+warm_up_thread.start()
+atexit.register(stop_warm_up, warm_up_thread)
+startup["ready_seconds"] = round(time.monotonic() - STARTED, 3)
+
+
+@app.before_request
+def start_request_timer():
+    """Start timing (and, if enabled, sampling) the request."""
+    g.request_started = time.perf_counter()
+    if profiler:
+        profiler.begin()
+
+
+@app.after_request
+def record_request_metrics(response: Response) -> Response:
+    """Record the request's latency under its route pattern."""
+    started = g.get("request_started")
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.observe("quiz_request_duration_seconds", elapsed, route=route, method=request.method)
+    metrics.inc("quiz_requests_total", route=route, status=str(response.status_code))
+    if profiler:
+        profiler.end(elapsed, f"{request.method} {request.path}")
+    return response
+
+
+@app.before_request
+def identify_user():
+    """Set g.user_id for the request (see sessions.py)."""
+    g.user_id, g.new_user_cookie = DEFAULT_USER, None
+    if not MULTI_USER:
+        return None
+    if "user" in request.args and request.method == "GET":
+        return adopt_user_link(request.args["user"])
+    g.user_id, g.new_user_cookie = resolve_user(request.headers.get(USER_HEADER), request.cookies.get(USER_COOKIE))
     return None
 
 
-def list_quizzes() -> list[dict]:
-    """List all available quizzes."""
-    quizzes = []
-    for quiz_file in DATA_DIR.glob("*.json"):
-        try:
-            with open(quiz_file) as f:
-                quiz = json.load(f)
-                quizzes.append({
-                    "id": quiz.get("id", quiz_file.stem),
-                    "lecture": quiz.get("lecture", "Unknown"),
-                    "topic": quiz.get("topic", "Unknown"),
-                    "num_questions": len(quiz.get("questions", [])),
-                    "created": quiz.get("created", "Unknown")
-                })
-        except (json.JSONDecodeError, KeyError):
-            continue
-    # Sort by creation date, newest first
-    quizzes.sort(key=lambda x: x.get("created", ""), reverse=True)
-    return quizzes
+def adopt_user_link(token: str) -> Response:
+    """Store a ?user= token in the cookie, then redirect to the same page without it."""
+    if valid_token(token):
+        g.new_user_cookie = token
+    args = [(key, value) for key, value in request.args.items(multi=True) if key != "user"]
+    return redirect(request.script_root + request.path + (f"?{urlencode(args)}" if args else ""))
+
+
+@app.after_request
+def remember_user(response: Response) -> Response:
+    """Store a new or adopted user token in the browser."""
+    token = g.get("new_user_cookie")
+    if token:
+        response.set_cookie(USER_COOKIE, token, max_age=COOKIE_MAX_AGE, path=request.script_root or "/",
+                            httponly=True, samesite="Lax")
+    return response
+
+
+def get_quiz_entry(quiz_id: str) -> CachedQuiz | None:
+    """Timed quiz_cache.get_entry."""
+    with metrics.timer("quiz_operation_duration_seconds", operation="load_quiz"):
+        return quiz_cache.get_entry(quiz_id)
+
 
+def refresh_catalog() -> None:
+    """Timed catalog.refresh."""
+    with metrics.timer("quiz_operation_duration_seconds", operation="catalog_refresh"):
+        catalog.refresh()
 
-def extract_course(lecture: str) -> str:
-    """Extract course code from lecture string (e.g., 'pcv5' -> 'PCV')."""
-    import re
-    match = re.match(r'^([a-zA-Z]+)', lecture)
-    return match.group(1).upper() if match else "OTHER"
 
+def timed_render(template: str, **context) -> str:
+    """render_template, timed per template."""
+    with metrics.timer("quiz_operation_duration_seconds", operation="render", template=template):
+        return render_template(template, **context)
 
-def group_quizzes_by_course_and_lecture(quizzes: list[dict], completed: set[str]) -> dict:
+
+def cached_response(payload: CompiledPayload, mimetype: str,
+                    cache_control: str = QUIZ_CACHE_CONTROL) -> Response:
     """
-    Group quizzes hierarchically by course and lecture.
-    Returns: {
-        'PCV': {
-            'lectures': {
-                'pcv5': {'name': 'pcv5', 'quizzes': [...], 'completed': 2, 'total': 3},
-                ...
-            },
-            'completed': 5,
-            'total': 10
-        },
-        ...
-    }
+    Serve a precompiled payload in the best encoding the client accepts,
+    answering 304 if the client's ETag matches.
     """
-    courses = {}
-
-    for quiz in quizzes:
-        quiz["completed"] = quiz["id"] in completed
-        course = extract_course(quiz["lecture"])
-        lecture = quiz["lecture"]
-
-        if course not in courses:
-            courses[course] = {"lectures": {}, "completed": 0, "total": 0}
-
-        if lecture not in courses[course]["lectures"]:
-            courses[course]["lectures"][lecture] = {
-                "name": lecture,
-                "quizzes": [],
-                "completed": 0,
-                "total": 0
-            }
-
-        courses[course]["lectures"][lecture]["quizzes"].append(quiz)
-        courses[course]["lectures"][lecture]["total"] += 1
-        courses[course]["total"] += 1
-
-        if quiz["completed"]:
-            courses[course]["lectures"][lecture]["completed"] += 1
-            courses[course]["completed"] += 1
-
-    # Sort lectures within each course by lecture number
-    for course in courses.values():
-        course["lectures"] = dict(
-            sorted(course["lectures"].items(),
-                   key=lambda x: (x[0], x[1]["quizzes"][0]["created"] if x[1]["quizzes"] else ""))
-        )
+    encoding, body = payload.negotiate(request.accept_encodings)
+    response = Response(body, mimetype=mimetype)
+    # Each encoding is a different representation, so it gets its own ETag
+    response.set_etag(f"{payload.etag}-{encoding}" if encoding else payload.etag)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    if payload.encodings:
+        response.vary.add("Accept-Encoding")
+    response.headers["Cache-Control"] = cache_control
+    return response.make_conditional(request)
+
+
+@app.template_global()
+def asset_url(filename: str) -> str:
+    """URL of a static file under its content fingerprint (see assets.py)."""
+    url_name = assets.url_name(filename)
+    if url_name is None:
+        return url_for("static", filename=filename)
+    return url_for("asset", filename=url_name)
+
+
+def questions_by_id(entry, public: bool = False) -> dict[str, dict]:
+    """A quiz's questions keyed by str(question ID), with or without answers."""
+    if public:
+        return entry.derive("public_questions",
+                            lambda e: {str(q["id"]): q for q in e.derive("public", public_quiz)["questions"]})
+    return entry.derive("questions", lambda e: {str(q["id"]): q for q in e.quiz["questions"]})
+
+
+def pick_review_questions(user_id: str, n: int) -> list[tuple[str, dict]]:
+    """A user's n most overdue questions as (quiz_id, answer-free question)."""
+    require_warm("The review schedule")
+    sync_attempts()
+    review_scheduler = review_schedulers.get(user_id)
+    if review_scheduler is None:
+        return []
+    while True:
+        picked, missing = [], []
+        for quiz_id, question_id in review_scheduler.due(n):
+            entry = get_quiz_entry(quiz_id)
+            question = questions_by_id(entry, public=True).get(question_id) if entry else None
+            if question:
+                picked.append((quiz_id, question))
+            else:
+                missing.append((quiz_id, question_id))
+        if not missing:
+            return picked
+        # Questions deleted from their quiz since they were answered
+        for quiz_id, question_id in missing:
+            review_scheduler.forget(quiz_id, question_id)
+
+
+# Answer fields and their types; all optional, as unanswered questions only carry their ID
+REVIEW_ANSWER_TYPES = {"selected": (bool, int), "text": (str,), "time_spent_sec": (int, float)}
+
+
+def valid_review_answer(answer) -> bool:
+    """Whether a review answer has a string question ID and well-typed answer fields."""
+    return isinstance(answer, dict) and isinstance(answer.get("question_id"), str) and all(
+        answer.get(field) is None or isinstance(answer[field], types) for field, types in REVIEW_ANSWER_TYPES.items()
+    )
 
-    # Sort courses alphabetically
-    return dict(sorted(courses.items()))
 
+def grade_review(submission: dict) -> dict:
+    """
+    Grade a review quiz submission against the questions' source quizzes.
+    Aborts with 400 if an answer is malformed or no answer is for a known question.
+    """
+    answers = submission.get("answers")
+    if not isinstance(answers, list) or not all(map(valid_review_answer, answers)):
+        abort(400, description="Each answer needs a string 'question_id' and a valid 'selected' or 'text'")
+    questions, matchers, sources = [], {}, []
+    for answer in answers:
+        ids = split_review_question_id(answer.get("question_id"))
+        if not ids or review_question_id(*ids) in matchers:
+            continue
+        entry = get_quiz_entry(ids[0])
+        question = questions_by_id(entry).get(ids[1]) if entry else None
+        if not question:
+            continue
+        review_id = review_question_id(*ids)
+        questions.append({**question, "id": review_id})
+        matchers[review_id] = entry.derive(
+            "keyword_matchers", lambda e: compile_matchers(e.quiz)
+        ).get(question["id"])
+        sources.append((ids[0], question["id"]))
+    if not questions:
+        abort(400, description="Review has no answers to current questions")
+
+    result = grade_submission({"questions": questions}, submission, matchers)
+    # Attribute each answer back to its source quiz and question
+    for record, (quiz_id, question_id) in zip(result["answers"], sources):
+        record["quiz_id"] = quiz_id
+        record["question_id"] = question_id
+    return result
 
-def get_completed_quizzes() -> set[str]:
-    """Get set of quiz IDs that have been completed."""
-    completed = set()
-    for result_file in RESULTS_DIR.glob("*_result.json"):
-        # Extract quiz_id from filename (e.g., "pcv5_dlt_result.json" -> "pcv5_dlt")
-        quiz_id = result_file.stem.replace("_result", "")
-        completed.add(quiz_id)
-    return completed
+
+def list_quizzes() -> list[dict]:
+    """List all available quizzes, newest first."""
+    refresh_catalog()
+    return catalog.list()
 
 
 @app.route("/")
 def index():
     """List all available quizzes grouped by course and lecture."""
-    quizzes = list_quizzes()
-    completed = get_completed_quizzes()
-    courses = group_quizzes_by_course_and_lecture(quizzes, completed)
-    return render_template("index.html", courses=courses)
+    refresh_catalog()
+    sync_completed_quizzes()
+    try:
+        sync_attempts()
+    except Exception:
+        # The quiz list doesn't need the review counts to be current
+        app.logger.exception("Could not fold new attempts for the index page")
+    review_scheduler = review_schedulers.get(g.user_id)
+    review_due = len(review_scheduler.due(REVIEW_QUIZ_SIZE)) if review_scheduler else 0
+    with course_index.view(g.user_id) as (courses, progress):
+        return timed_render("index.html", courses=courses, progress=progress,
+                            review_due=review_due, review_size=REVIEW_QUIZ_SIZE)
+
+
+@app.route("/assets/<filename>")
+def asset(filename: str):
+    """Serve a fingerprinted, precompressed static file."""
+    found, current = assets.lookup(filename)
+    if not found:
+        abort(404)
+    return cached_response(found.payload, found.mimetype,
+                           ASSET_CACHE_CONTROL if current else QUIZ_CACHE_CONTROL)
 
 
 @app.route("/quiz/<quiz_id>")
 def take_quiz(quiz_id: str):
     """Render the quiz-taking interface."""
-    quiz = load_quiz(quiz_id)
-    if not quiz:
+    if quiz_id == REVIEW_QUIZ_ID:
+        return take_review()
+    entry = get_quiz_entry(quiz_id)
+    if not entry:
         abort(404, description="Quiz not found")
 
-    # Remove correct answers from questions sent to client
-    client_quiz = {
-        "id": quiz["id"],
-        "lecture": quiz.get("lecture", ""),
-        "topic": quiz.get("topic", ""),
-        "questions": []
-    }
-    for q in quiz.get("questions", []):
-        client_q = {
-            "id": q["id"],
-            "type": q["type"],
-            "question": q["question"],
-            "topic": q.get("topic", ""),
-        }
-        if q["type"] == "multiple_choice":
-            client_q["options"] = q["options"]
-        client_quiz["questions"].append(client_q)
+    # Answers are stripped and the page rendered once per quiz version
+    page = entry.derive(
+        ("quiz_page", request.script_root),
+        lambda e: compile_payload(
+            timed_render("quiz.html", quiz=client_quiz(e.derive("public", public_quiz))).encode()
+        )
+    )
+    return cached_response(page, "text/html")
+
 
-    return render_template("quiz.html", quiz=client_quiz)
+def take_review():
+    """Render a review quiz of the most overdue questions across all quizzes."""
+    n = request.args.get("n", REVIEW_QUIZ_SIZE, type=int)
+    questions = pick_review_questions(g.user_id, max(1, min(n, REVIEW_QUIZ_MAX)))
+    if not questions:
+        abort(404, description="Nothing is due for review")
+    # Changes with every answer, so it is rendered per request and never cached
+    response = Response(timed_render("quiz.html", quiz=client_quiz(build_review_quiz(questions))),
+                        mimetype="text/html")
+    response.headers["Cache-Control"] = "no-store"
+    return response
 
 
 @app.route("/quiz/<quiz_id>/submit", methods=["POST"])
 def submit_quiz(quiz_id: str):
     """Submit quiz answers and save results."""
-    quiz = load_quiz(quiz_id)
-    if not quiz:
+    entry = get_quiz_entry(quiz_id) if quiz_id != REVIEW_QUIZ_ID else None
+    if not entry and quiz_id != REVIEW_QUIZ_ID:
         abort(404, description="Quiz not found")
 
     data = request.get_json()
     if not data or "answers" not in data:
         abort(400, description="Invalid submission")
 
-    # Build result with scoring
+    if entry:
+        graded = grade_submission(entry.quiz, data,
+                                  entry.derive("keyword_matchers", lambda e: compile_matchers(e.quiz)))
+    else:
+        graded = grade_review(data)
     result = {
         "quiz_id": quiz_id,
+        "user_id": g.user_id,
+        "lecture": entry.quiz.get("lecture", "") if entry else REVIEW_QUIZ_ID,
         "completed": datetime.utcnow().isoformat() + "Z",
-        "answers": [],
-        "score": 0,
-        "total": len(quiz["questions"])
+        **graded
     }
 
-    # Create answer lookup
-    answers_by_id = {a["question_id"]: a for a in data["answers"]}
-
-    for q in quiz["questions"]:
-        answer_data = answers_by_id.get(q["id"], {})
-        answer_record = {
-            "question_id": q["id"],
-            "topic": q.get("topic", ""),
-            "slide_ref": q.get("slide_ref", ""),
-            "type": q["type"],
-        }
-
-        if q["type"] == "multiple_choice":
-            selected = answer_data.get("selected")
-            answer_record["selected"] = selected
-            answer_record["correct_index"] = q["correct"]
-            answer_record["is_correct"] = selected == q["correct"]
-            if answer_record["is_correct"]:
-                result["score"] += 1
-
-        elif q["type"] == "true_false":
-            selected = answer_data.get("selected")
-            answer_record["selected"] = selected
-            answer_record["correct_value"] = q["correct"]
-            answer_record["is_correct"] = selected == q["correct"]
-            if answer_record["is_correct"]:
-                result["score"] += 1
-
-        elif q["type"] == "short_answer":
-            text = answer_data.get("text", "")
-            answer_record["text"] = text
-            # Check for expected keywords (case-insensitive)
-            keywords = q.get("expected_keywords", [])
-            found = sum(1 for kw in keywords if kw.lower() in text.lower())
-            answer_record["keywords_found"] = found
-            answer_record["keywords_expected"] = len(keywords)
-            # Partial credit for short answers
-            if keywords and found >= len(keywords) // 2:
-                result["score"] += 1
-                answer_record["is_correct"] = found == len(keywords)
-            else:
-                answer_record["is_correct"] = False
-
-        answer_record["time_spent_sec"] = answer_data.get("time_spent_sec", 0)
-        result["answers"].append(answer_record)
-
-    result["total_time_sec"] = data.get("total_time_sec", 0)
-    result["percentage"] = round(result["score"] / result["total"] * 100) if result["total"] > 0 else 0
-
-    # Save result
-    result_file = RESULTS_DIR / f"{quiz_id}_result.json"
-    with open(result_file, "w") as f:
-        json.dump(result, f, indent=2)
+    # Hand off to the write-behind queue; the writer records the attempt and
+    # mirrors the latest one to <quiz_id>_result.json
+    try:
+        result_writer.submit(result)
+    except queue.Full:
+        abort(503, description="Server busy, please retry")
+    course_index.mark_completed(quiz_id, g.user_id)
 
     return jsonify({
         "success": True,
@@ -249,17 +593,175 @@ def api_list_quizzes():
 @app.route("/api/quiz/<quiz_id>")
 def api_get_quiz(quiz_id: str):
     """API endpoint to get quiz details (without answers)."""
-    quiz = load_quiz(quiz_id)
-    if not quiz:
+    entry = get_quiz_entry(quiz_id)
+    if not entry:
         abort(404)
-    # Strip correct answers
-    for q in quiz.get("questions", []):
-        q.pop("correct", None)
-        q.pop("expected_keywords", None)
-    return jsonify(quiz)
+    payload = entry.derive("api_payload", lambda e: compile_json(e.derive("public", public_quiz)))
+    return cached_response(payload, "application/json")
+
+
+@app.route("/api/quiz/<quiz_id>/attempts")
+def api_quiz_attempts(quiz_id: str):
+    """API endpoint to get the current user's attempts at a quiz, oldest first (without answer keys)."""
+    require_results_access()
+    return jsonify([public_attempt(result) for result in results_store.attempts(quiz_id, g.user_id)])
+
+
+@app.route("/api/stats")
+def api_stats():
+    """
+    API endpoint for accuracy and median answer time per topic, slide,
+    lecture and course, weakest first, for the current user (?scope=class for
+    everyone). Optional: ?by=<dimension>&min_answered=N
+    """
+    require_results_access()
+    by = request.args.get("by")
+    if by is not None and by not in DIMENSIONS:
+        abort(400, description=f"'by' must be one of {', '.join(DIMENSIONS)}")
+    min_answered = request.args.get("min_answered", 1, type=int)
+    refresh_catalog()
+    require_warm("Answer history")
+    sync_attempts()
+    user_id = None if request.args.get("scope") == "class" else g.user_id
+    return jsonify(mastery_stats.report(user_id, by, min_answered))
+
+
+def require_server_token() -> None:
+    """Abort unless the request carries QUIZ_INGEST_TOKEN as its bearer token."""
+    if not INGEST_TOKEN:
+        abort(404)
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), INGEST_TOKEN.encode()):
+        abort(401)
+
+
+def require_results_access() -> None:
+    """Without per-student sessions, results are only served to holders of the server token."""
+    if not MULTI_USER:
+        require_server_token()
+
+
+def require_ingest_token() -> dict:
+    """Authorize an ingest request and return its JSON body."""
+    require_server_token()
+    if request.content_length is not None and request.content_length > INGEST_MAX_BYTES:
+        abort(413)
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        abort(400, description="Expected a JSON object")
+    return data
+
+
+@app.route("/api/search")
+def api_search():
+    """
+    API endpoint for full-text search over question text, topics, slide
+    references and options: ?q=homography&limit=20. Returns the best
+    matching questions and their quizzes.
+    """
+    query = request.args.get("q", "").strip()
+    if not query:
+        abort(400, description="Missing search query 'q'")
+    limit = max(1, min(request.args.get("limit", 20, type=int), SEARCH_LIMIT_MAX))
+    refresh_catalog()
+    require_warm("The search index")
+    with metrics.timer("quiz_operation_duration_seconds", operation="search"):
+        return jsonify({"query": query, **search_index.search(query, limit)})
+
+
+@app.route("/api/export")
+def api_export():
+    """
+    Stream the current user's answers as NDJSON, one row per answered
+    question (see export.py). ?since=<cursor> limits it to attempts recorded
+    after a previous export; the X-Export-Cursor header carries the cursor
+    for the next one. ?scope=class exports every user and needs the server
+    token.
+    """
+    require_results_access()
+    since = request.args.get("since", 0, type=int)
+    user_id = g.user_id
+    if request.args.get("scope") == "class":
+        require_server_token()
+        user_id = None
+    until = results_store.last_attempt_id()
+    lectures = {summary["id"]: summary["lecture"] for summary in list_quizzes()}
+    rows = answer_rows(results_store.iter_attempts(since, until, user_id), lectures)
+    response = Response(stream_with_context(ndjson_chunks(rows)), mimetype="application/x-ndjson")
+    response.headers["X-Export-Cursor"] = str(max(since, until))
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+@app.route("/api/ingest/plan", methods=["POST"])
+def api_ingest_plan():
+    """
+    Which quizzes does the server need? Body: {"manifest": {quiz_id: sha256},
+    "prune": bool}. Returns the generation to ingest against and the IDs to
+    upload (and, with prune, to delete).
+    """
+    data = require_ingest_token()
+    manifest = data.get("manifest")
+    if not isinstance(manifest, dict):
+        abort(400, description="'manifest' must map quiz IDs to sha256 digests")
+    return jsonify(ingest.plan(manifest, prune=bool(data.get("prune"))))
+
+
+@app.route("/api/ingest", methods=["POST"])
+def api_ingest():
+    """
+    Atomically publish a batch of new, changed and deleted quizzes. Body:
+    {"upserts": [{"id", "sha256", "content"}], "deletes": [quiz_id],
+    "base_generation": n}. Nothing is written if any quiz is invalid.
+    """
+    data = require_ingest_token()
+    upserts, deletes = data.get("upserts", []), data.get("deletes", [])
+    if not isinstance(upserts, list) or not isinstance(deletes, list):
+        abort(400, description="'upserts' and 'deletes' must be arrays")
+    base_generation = data.get("base_generation")
+    if base_generation is not None and type(base_generation) is not int:
+        abort(400, description="'base_generation' must be an integer")
+    try:
+        result = ingest.apply(upserts, deletes, base_generation)
+    except GenerationConflict as e:
+        return jsonify({"success": False, "errors": e.errors}), 409
+    except IngestError as e:
+        return jsonify({"success": False, "errors": e.errors}), 400
+
+    # Other workers notice the new files through their mtimes; only the
+    # changed quizzes are reloaded anywhere
+    for quiz_id in result["upserted"] + result["deleted"]:
+        quiz_cache.invalidate(quiz_id)
+    catalog.refresh(force=True)
+    return jsonify({"success": True, **result})
+
+
+@app.route("/api/status")
+def api_status():
+    """API endpoint exposing cache and result writer counters."""
+    return jsonify({
+        "quiz_cache": quiz_cache.stats(),
+        "result_writer": result_writer.stats(),
+        "review_schedulers": review_schedulers.stats(),
+        "search_index": search_index.stats(),
+        "data_generation": ingest.generation(),
+        "startup": {**startup, "warming_up": not warmed_up.is_set()},
+    })
+
+
+@app.route("/metrics")
+def prometheus_metrics():
+    """Prometheus scrape endpoint covering every live worker."""
+    snapshot = metrics_exporter.collect()
+    totals = {name: value for name, labels, value, kind in snapshot["samples"] if not labels}
+    lookups = totals.get("quiz_cache_hits_total", 0) + totals.get("quiz_cache_misses_total", 0)
+    if lookups:
+        snapshot["samples"].append(["quiz_cache_hit_ratio", {}, totals["quiz_cache_hits_total"] / lookups, "gauge"])
+    return Response(render(snapshot, METRICS_HELP), mimetype="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
+    # Development server; production runs under gunicorn (see gunicorn.conf.py)
     import sys
     port = int(sys.argv[1]) if len(sys.argv) > 1 else 5050
     app.run(host="0.0.0.0", port=port, debug=True)
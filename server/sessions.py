@@ -0,0 +1,45 @@
+"""
+Sessions - lightweight per-student identity.
+
+With QUIZ_MULTI_USER enabled, every browser gets a random token in a
+long-lived cookie, and the token is the user ID that partitions results,
+completion, statistics and review schedules. Only the cookie and the
+X-Quiz-User header (for API clients) identify a request. To continue on
+another device, opening a page with `?user=<token>` stores that token in
+the cookie and redirects to the page without it, so the token is not kept
+in the address bar or in later request logs. Without QUIZ_MULTI_USER
+everyone is the default user, as before.
+"""
+
+import re
+import secrets
+
+USER_COOKIE = "quiz_user"
+USER_HEADER = "X-Quiz-User"
+COOKIE_MAX_AGE = 400 * 24 * 3600  # browsers cap cookie lifetimes at ~400 days
+
+# Tokens end up in result file paths, so only URL/path-safe characters
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9_-]{16,64}")
+
+
+def new_token() -> str:
+    """A fresh random user token."""
+    return secrets.token_urlsafe(18)
+
+
+def valid_token(token: str | None) -> bool:
+    return bool(token) and TOKEN_PATTERN.fullmatch(token) is not None
+
+
+def resolve_user(header_token: str | None, cookie_token: str | None) -> tuple[str, str | None]:
+    """
+    Pick the request's user from the header, then the cookie, minting a new
+    token if neither is valid. Returns (user_id, token to store in the
+    cookie, or None if the cookie is already right).
+    """
+    if valid_token(header_token):
+        return header_token, None
+    if valid_token(cookie_token):
+        return cookie_token, None
+    token = new_token()
+    return token, token
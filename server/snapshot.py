@@ -0,0 +1,59 @@
+"""
+Start-up snapshot - the catalog and completion index, persisted between runs.
+
+A worker writes its catalog entries (stat signature + summary per file) and
+the completions it has applied to one JSON file, periodically and on exit.
+The next worker to start loads it instead of parsing every quiz, so it can
+serve the index page straight away, then reconciles with the data directory
+and results store in the background (only files whose mtime or size changed
+are re-read).
+
+A snapshot is only used if it was written by the same snapshot format for
+the same data directory, and its code digest matches: a change to the quiz
+schema or to how summaries are built (catalog.py) discards it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+def code_digest(*paths: Path) -> str:
+    """SHA-256 over source files whose changes invalidate a snapshot."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def load_snapshot(path: Path, data_dir: Path, digest: str) -> dict | None:
+    """The snapshot's state, or None if it is missing, corrupt or doesn't match."""
+    try:
+        snapshot = json.loads(path.read_bytes())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        log.warning("Ignoring start-up snapshot %s: %s", path, e)
+        return None
+    if not isinstance(snapshot, dict) or (
+        snapshot.get("version"), snapshot.get("data_dir"), snapshot.get("digest")
+    ) != (SNAPSHOT_VERSION, str(data_dir), digest):
+        log.info("Start-up snapshot %s is from another version or data directory; ignoring it", path)
+        return None
+    return snapshot.get("state")
+
+
+def save_snapshot(path: Path, data_dir: Path, digest: str, state: dict) -> None:
+    """Atomically replace the snapshot (several workers may write it; the last one wins)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({
+        "version": SNAPSHOT_VERSION, "data_dir": str(data_dir), "digest": digest, "state": state,
+    }, separators=(",", ":")))
+    os.replace(tmp, path)
@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+# The server modules import each other as top-level modules (see server/server.py);
+# scripts are imported by module name too
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "server"))
+sys.path.insert(0, str(ROOT / "scripts"))
@@ -0,0 +1,19 @@
+import json
+
+from ingest import LOCK_FILE, QuizIngest, content_hash
+
+
+def test_reading_does_not_create_the_lock_file(tmp_path):
+    ingest = QuizIngest(tmp_path)
+    with ingest.reading():
+        pass
+    assert not (tmp_path / LOCK_FILE).exists()
+
+
+def test_reading_shares_the_lock_once_a_batch_was_applied(tmp_path):
+    ingest = QuizIngest(tmp_path)
+    content = json.dumps({"id": "pcv5_a", "lecture": "pcv5", "topic": "t", "questions": []})
+    ingest.apply([{"id": "pcv5_a", "content": content, "sha256": content_hash(content.encode())}])
+    assert (tmp_path / LOCK_FILE).exists()
+    with ingest.reading(), ingest.reading():
+        assert (tmp_path / "pcv5_a.json").exists()
@@ -0,0 +1,31 @@
+import copy
+
+import pytest
+
+from quiz_schema import VALIDATOR
+
+QUIZ = {
+    "id": "pcv5_test",
+    "lecture": "pcv5",
+    "topic": "Epipolar geometry",
+    "questions": [
+        {
+            "id": f"q{i}", "type": "true_false", "question": f"Statement {i}?", "correct": True,
+            "topic": "Fundamental matrix", "slide_ref": f"Slide {i}",
+        }
+        for i in range(5)
+    ],
+}
+
+
+def test_valid_quiz_has_no_problems():
+    assert VALIDATOR.check(QUIZ, "pcv5_test")[0] == []
+
+
+@pytest.mark.parametrize("field", ["topic", "slide_ref"])
+@pytest.mark.parametrize("value", [["Fundamental matrix"], {"name": "x"}, 3])
+def test_non_string_question_field_is_rejected(field, value):
+    quiz = copy.deepcopy(QUIZ)
+    quiz["questions"][2][field] = value
+    errors = VALIDATOR.errors(quiz, "pcv5_test")
+    assert errors == [f"Quiz 'pcv5_test', Question 3: '{field}' must be a string, got {type(value).__name__}"]
@@ -0,0 +1,75 @@
+import importlib
+import json
+import os
+
+import pytest
+
+TOKEN = "test-token"
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    root = tmp_path_factory.mktemp("quizzes")
+    (root / "data").mkdir()
+    quiz = {
+        "id": "pcv5_test", "lecture": "pcv5", "topic": "Epipolar geometry", "created": "2026-01-01",
+        "questions": [{"id": "q1", "type": "true_false", "question": "F is rank 2?", "correct": True}],
+    }
+    (root / "data" / "pcv5_test.json").write_text(json.dumps(quiz))
+    os.environ.update(QUIZ_DATA_DIR=str(root / "data"), QUIZ_RESULTS_DIR=str(root / "results"),
+                      QUIZ_INGEST_TOKEN=TOKEN)
+    os.environ.pop("QUIZ_MULTI_USER", None)
+    module = importlib.import_module("server")
+    module.warmed_up.wait()
+    return module
+
+
+@pytest.fixture
+def client(server):
+    return server.app.test_client()
+
+
+@pytest.mark.parametrize("path", ["/api/export", "/api/stats", "/api/quiz/pcv5_test/attempts"])
+def test_results_need_the_server_token_in_single_user_mode(client, path):
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get(path, headers={"Authorization": f"Bearer {TOKEN}"}).status_code == 200
+
+
+def test_user_link_moves_the_token_into_the_cookie(server, client, monkeypatch):
+    monkeypatch.setattr(server, "MULTI_USER", True)
+    token = "a" * 24
+    response = client.get(f"/?user={token}&n=5")
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/?n=5"
+    assert client.get_cookie("quiz_user").value == token
+
+
+def test_user_query_param_does_not_identify_the_request(server, client, monkeypatch):
+    monkeypatch.setattr(server, "MULTI_USER", True)
+    client.get("/")
+    own_token, other_token = client.get_cookie("quiz_user").value, "b" * 24
+    submission = {"answers": [{"question_id": "q1", "selected": True}]}
+    assert client.post(f"/quiz/pcv5_test/submit?user={other_token}", json=submission).status_code == 200
+    server.result_writer.wait_idle(10)
+    assert server.results_store.attempts("pcv5_test", other_token) == []
+    assert len(server.results_store.attempts("pcv5_test", own_token)) == 1
+    assert client.get_cookie("quiz_user").value == own_token
+
+
+@pytest.mark.parametrize("answers", [
+    [],
+    [{"question_id": ["pcv5_test/q1"], "selected": True}],
+    [{"question_id": {"id": "q1"}, "selected": True}],
+    [{"question_id": "pcv5_test/q1", "selected": [True]}],
+    ["pcv5_test/q1"],
+    [{"question_id": "pcv5_test/missing", "selected": True}],
+])
+def test_malformed_or_empty_review_is_rejected(client, answers):
+    assert client.post("/quiz/review/submit", json={"answers": answers}).status_code == 400
+
+
+def test_review_is_graded_against_the_source_quiz(client):
+    response = client.post("/quiz/review/submit", json={"answers": [{"question_id": "pcv5_test/q1", "selected": True}]})
+    assert response.status_code == 200
+    assert (response.json["score"], response.json["total"]) == (1, 1)
@@ -0,0 +1,23 @@
+import json
+
+from quizpack import pack_path
+from validate_quizzes import compile_packs, validate_files
+
+
+def write_quiz(data_dir, quiz_id, questions):
+    quiz = {"id": quiz_id, "lecture": "pcv5", "topic": "Epipolar geometry", "questions": questions}
+    (data_dir / f"{quiz_id}.json").write_text(json.dumps(quiz))
+
+
+def test_warnings_only_quiz_is_packed_but_erroneous_one_is_not(tmp_path):
+    question = {"id": "q1", "type": "true_false", "question": "F is rank 2?", "correct": True}
+    write_quiz(tmp_path, "pcv5_short", [question])  # fewer questions than recommended: a warning
+    write_quiz(tmp_path, "pcv5_broken", [{**question, "correct": "yes"}])
+
+    results, _ = validate_files(sorted(tmp_path.glob("*.json")), None, jobs=1)
+    assert not results["pcv5_short.json"]["valid"] and results["pcv5_short.json"]["loadable"]
+    assert not results["pcv5_broken.json"]["loadable"]
+
+    assert compile_packs(tmp_path, results) == (1, 0)
+    assert pack_path(tmp_path / "pcv5_short.json").exists()
+    assert not pack_path(tmp_path / "pcv5_broken.json").exists()